@@ -0,0 +1,113 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from typing import Tuple
+
+"""
+Benchmark client for the nesting job service (run_service.py).
+Submits jobs from several concurrent clients, polls until all jobs are finished and reports jobs/hour.
+
+Example:
+    python run_service.py --workers 4
+    python benchmarks/nesting_service_benchmark.py --clients 8 --jobs 40 --material aluminum --thickness 6.35
+"""
+
+async def request(host: str, port: int, method: str, path: str, body: dict = None) -> Tuple[int, dict]:
+    """ Send a single HTTP request and return status code and decoded JSON body. """
+    reader, writer = await asyncio.open_connection(host, port)
+    payload = json.dumps(body).encode('utf-8') if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode('latin-1') + payload
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    header, _, content = response.partition(b"\r\n\r\n")
+    status = int(header.split(b" ")[1])
+    return status, json.loads(content.decode('utf-8'))
+
+def generate_job(args: argparse.Namespace, rng: random.Random) -> dict:
+    """ Job consisting of randomly sized rectangular parts. """
+    parts = []
+    for i in range(args.parts):
+        width = rng.uniform(args.min_part_size, args.max_part_size)
+        height = rng.uniform(args.min_part_size, args.max_part_size)
+        parts.append({
+            'id': f"part{i}",
+            'contour': [[0, 0], [width, 0], [width, height], [0, height]],
+            'amount': 1
+        })
+    return {
+        'material': args.material,
+        'thickness': args.thickness,
+        'priority': rng.randint(0, 10),
+        'parts': parts
+    }
+
+async def run_client(args: argparse.Namespace, jobs: asyncio.Queue, latencies: list, failures: list):
+    """ Submit jobs from shared queue one at a time and wait for each to finish. """
+    while True:
+        try:
+            job = jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        status, body = await request(args.host, args.port, 'POST', '/jobs', job)
+        while status == 503:
+            await asyncio.sleep(args.poll_interval)
+            status, body = await request(args.host, args.port, 'POST', '/jobs', job)
+        if status != 202:
+            failures.append(body.get('error'))
+            continue
+        job_id = body['id']
+        while True:
+            await asyncio.sleep(args.poll_interval)
+            _, job_status = await request(args.host, args.port, 'GET', f"/jobs/{job_id}")
+            if job_status['status'] in ('completed', 'failed'):
+                break
+        if job_status['status'] == 'failed':
+            failures.append(job_status.get('error'))
+        else:
+            latencies.append(time.perf_counter() - start)
+
+async def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    jobs = asyncio.Queue()
+    for _ in range(args.jobs):
+        jobs.put_nowait(generate_job(args, rng))
+
+    latencies, failures = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[run_client(args, jobs, latencies, failures) for _ in range(args.clients)])
+    elapsed = time.perf_counter() - start
+
+    print(f"Completed jobs: {len(latencies)}, failed jobs: {len(failures)}, wall time: {elapsed:.2f} s")
+    if latencies:
+        print(f"Throughput: {len(latencies) / elapsed * 3600:.1f} jobs/hour")
+        print(f"Latency: median {statistics.median(latencies):.2f} s, max {max(latencies):.2f} s")
+    for error in set(failures):
+        print(f"Failure: {error}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure nesting service throughput under concurrent load.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--jobs', type=int, default=20)
+    parser.add_argument('--parts', type=int, default=10)
+    parser.add_argument('--min-part-size', type=float, default=20)
+    parser.add_argument('--max-part-size', type=float, default=150)
+    parser.add_argument('--material', default="Aluminum")
+    parser.add_argument('--thickness', type=float, default=1000)
+    parser.add_argument('--poll-interval', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
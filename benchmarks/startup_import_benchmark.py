@@ -0,0 +1,74 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import List, Tuple
+
+"""
+Startup import benchmark for the app.
+Imports the main window module with python -X importtime in a fresh interpreter and checks the result against a budget.
+Heavy dependencies (OpenCV, shapely, matplotlib) must be loaded on first use instead of at startup.
+Exits with status 1 if the budget is exceeded or a deferred module is imported.
+
+Example:
+    python benchmarks/startup_import_benchmark.py --runs 5 --budget-ms 800
+"""
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_MODULE = "src.app.mainwindow"
+DEFERRED_MODULES = ('cv2', 'shapely', 'matplotlib', 'stl', 'scipy')
+IMPORTTIME_PATTERN = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def measure_imports(module: str) -> List[Tuple[int, int, str]]:
+    """ Import module in fresh interpreter. Returns list of (cumulative time in us, nesting depth, module name). """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match:
+            imports.append((int(match.group(2)), len(match.group(3)), match.group(4)))
+    return imports
+
+def main(args: argparse.Namespace) -> int:
+    totals = []
+    for _ in range(args.runs):
+        imports = measure_imports(args.module)
+        totals.append(next(total for total, _, name in imports if name == args.module) / 1000)
+
+    deferred = sorted({name.split('.')[0] for _, _, name in imports if name.split('.')[0] in DEFERRED_MODULES})
+    median = statistics.median(totals)
+
+    print(f"Startup import of {args.module}: median {median:.0f} ms, min {min(totals):.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print("Slowest packages:")
+    packages = [(total, name) for total, _, name in imports if '.' not in name and not name.startswith('_') and name != 'src']
+    for total, name in sorted(packages, reverse=True)[:args.top]:
+        print(f"  {total / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if deferred:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(deferred)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: startup import exceeds budget by {median - args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure app startup import time and enforce a budget.")
+    parser.add_argument('--module', default=STARTUP_MODULE)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=800)
+    parser.add_argument('--top', type=int, default=10)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,35 @@
+import os
+import time
+import argparse
+
+from src.app.database import init_db, get_session, close_session, teardown_db
+from src.app.service.digitization_service import DigitizationService
+
+def main(args: argparse.Namespace):
+    init_db()
+    session = get_session()
+    try:
+        service = DigitizationService(session, args.workers)
+        tasks = service.tasks_from_manifest(args.manifest) if args.manifest else service.tasks_from_folder(args.folder)
+        print(f"Digitizing {len(tasks)} photos with {args.workers} workers")
+
+        start = time.perf_counter()
+        results = service.digitize(tasks, lambda finished, total: print(f"\r{finished}/{total}", end='', flush=True))
+        print()
+
+        review_path = args.review_file or os.path.join(args.folder, 'review_queue.json')
+        amt_review = DigitizationService.save_review_queue(results, review_path)
+        print(f"Digitized {len(results) - amt_review} of {len(results)} photos in {time.perf_counter() - start:.1f} s")
+        if amt_review:
+            print(f"{amt_review} photos need review in the image editor, see {review_path}")
+    finally:
+        close_session()
+        teardown_db()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch digitization of plate photos.")
+    parser.add_argument('folder', help="folder of photos named by plate id, also default location of review queue")
+    parser.add_argument('--manifest', default=None, help="csv with columns image, plate_id, x, y, z, material, used instead of file names")
+    parser.add_argument('--workers', type=int, default=DigitizationService.DEFAULT_WORKERS)
+    parser.add_argument('--review-file', default=None, help="json file listing photos that need review")
+    main(parser.parse_args())
@@ -0,0 +1,35 @@
+import asyncio
+import argparse
+
+from src.app.database import init_db, get_session, close_session, teardown_db
+from src.app.service.nesting_service import NestingService
+from src.app.service.nesting_server import NestingServer
+
+from src.paths import LAYOUT_JOB_PREVIEW_DIR
+
+async def main(args: argparse.Namespace):
+    init_db()
+    session = get_session()
+    service = NestingService(session, LAYOUT_JOB_PREVIEW_DIR, args.workers, args.queue_size)
+    await service.start()
+    server = NestingServer(service, args.host, args.port)
+    await server.start()
+    print(f"Nesting service listening on http://{server.host}:{server.port} with {args.workers} workers")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+        await service.stop()
+        close_session()
+        teardown_db()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local nesting job service.")
+    parser.add_argument('--host', default=NestingServer.DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=NestingServer.DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=NestingService.DEFAULT_WORKERS)
+    parser.add_argument('--queue-size', type=int, default=NestingService.DEFAULT_MAX_QUEUE_SIZE)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -4,10 +4,15 @@ Date: 2024/06/01
 """
 
 import os
-from typing import Union, TypeVar, Type, List
+import itertools
+import threading
+from typing import Union, TypeVar, Type, List, Dict, Callable, Any
 from sqlalchemy.orm import Session
 
 from ..models.utils import is_value_of_type, get_python_type
+from ..utils.preview_cache import PreviewCache
+from ..utils.plotting_util import PreviewJob
+from ..service.preview_service import PreviewService
 
 from ..logging import logger
 
@@ -20,14 +25,23 @@ class GenericController:
     - session: working session.
     - db_table: table ORM class.
     - preview_image_directory: directory for storing preview images. 
+    - preview_cache_directory: directory for persistent preview cache keyed by rendering inputs. Previews are not cached if None.
+    - preview_service: service for rendering previews in worker processes. Previews are rendered inline if None.
+    Only the most recently requested preview of an image path is saved, results of older background renders are dropped.
     """
-    def __init__(self, session: Session, db_table: Type[T], preview_image_directory: str):
+    def __init__(self, session: Session, db_table: Type[T], preview_image_directory: str, preview_cache_directory: str = None, preview_service: PreviewService = None):
         if not os.path.exists(preview_image_directory):
             logger.error(f"Attempted to create controller with invalid preview image directory: {preview_image_directory}")
             raise FileNotFoundError()
         self.session = session
         self.db_table = db_table
         self.preview_image_directory = preview_image_directory
+        self.preview_cache = PreviewCache(preview_cache_directory) if preview_cache_directory is not None else None
+        self.preview_service = preview_service
+        self._preview_generations = itertools.count(1)
+        ''' generation of most recent preview request by image path, removed once its result is saved '''
+        self._latest_previews: Dict[str, int] = {}
+        self._preview_lock = threading.Lock()
 
     def _add_item_to_db(self, item: T) -> None:
         """
@@ -179,6 +193,67 @@ class GenericController:
             self.session.rollback()
             return None
 
+    def _save_cached_preview(self, image_path: str, job: Union[PreviewJob, Callable[[], PreviewJob]], *inputs: Any, callback: Callable[[str, Union[str, None]], None] = None):
+        """
+        Copy preview image from cache if it was already rendered from the same inputs, otherwise render it to image_path and cache it.
+        Job may be given as a function building it, which is only called if the image is not cached.
+        If callback is given and controller has a preview service, rendering is done in a worker process 
+        and callback is called with (image path, error message or None) once the image is saved.
+        Background results are dropped without calling callback if a newer preview of image_path was requested in the meantime.
+        """
+        generation = self._request_preview(image_path)
+        key = PreviewCache.get_key(self.db_table.__tablename__, *inputs) if self.preview_cache is not None else None
+        if key is not None and self.preview_cache.get(key, image_path):
+            self._finish_preview(image_path, generation)
+            if callback is not None:
+                callback(image_path, None)
+            return
+
+        if callable(job):
+            job = job()
+        if callback is not None and self.preview_service is not None:
+            ''' each request renders to its own file, which only replaces image_path if no newer request was made '''
+            render_path = f"{image_path}.{generation}.tmp"
+            def on_rendered(path: str, error: Union[str, None]):
+                saved = self._finish_preview(image_path, generation, render_path if error is None else None)
+                if os.path.exists(render_path):
+                    os.remove(render_path)
+                if not saved:
+                    logger.debug(f"Dropped outdated preview {generation} of {image_path}")
+                    return
+                if error is None and key is not None:
+                    self.preview_cache.put(key, image_path)
+                callback(image_path, error)
+            self.preview_service.submit(job, render_path, on_rendered)
+            return
+
+        job.render(image_path)
+        self._finish_preview(image_path, generation)
+        if key is not None:
+            self.preview_cache.put(key, image_path)
+        if callback is not None:
+            callback(image_path, None)
+
+    def _request_preview(self, image_path: str) -> int:
+        """ Register new preview request of image path, superseding earlier ones. Returns generation of request. """
+        with self._preview_lock:
+            generation = next(self._preview_generations)
+            self._latest_previews[image_path] = generation
+            return generation
+
+    def _finish_preview(self, image_path: str, generation: int, render_path: str = None) -> bool:
+        """
+        Complete preview request, moving rendered image to image_path if render_path is given.
+        Returns False without touching image_path if a newer request of image_path was made.
+        """
+        with self._preview_lock:
+            if self._latest_previews.get(image_path) != generation:
+                return False
+            del self._latest_previews[image_path]
+            if render_path is not None:
+                os.replace(render_path, image_path)
+            return True
+
     def _get_preview_image_path(self, id: str) -> Union[str, None]:
         """ Get preview path from item id. Returns None for invalid input."""
         if id == "" or id is None:
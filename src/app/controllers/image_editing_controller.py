@@ -14,14 +14,16 @@ from sqlalchemy.orm import Session
 import cv2
 
 from ..models.plate_model import Plate, PlateConstants
-from ..models.utils import serialize_array_list
+from ..models.utils import serialize_contour_list
 
 from ..controllers.generic_controller import GenericController
 
-from ..utils.image_processing.binary_filter import BinaryFilter
+from ..utils.image_processing.binary_filter import BinaryFilter, ThresholdMethod, MIN_PYRAMID_HEIGHT
 from ..utils.image_processing.features import Features
+from ..utils.image_processing.feature_index import FeatureIndex
 from ..utils.image_processing.feature_extractor import FeatureExtractor
 from ..utils.image_processing.feature_plotter import FeaturePlotter
+from ..utils.image_processing.feature_renderer import FeatureRenderer
 from ..utils.image_processing.matrix_generator import MatrixGenerator
 from ..utils.image_processing.utils import Size, Colors
 
@@ -48,7 +50,6 @@ class EditorState(enum.Enum):
 image_filenames = {
     EditorState.RAW: 'raw.png',
     EditorState.BINARY: 'binary.png',
-    EditorState.FEATURES: 'features.png',
     EditorState.FLAT_FINALIZED: 'flat.png'
 }
 
@@ -59,11 +60,16 @@ class ImageEditingController(GenericController):
     - session: working session.
     - image_editing_directory: directory for storing plate images in various states.
     - plate: plate to be modified.
+    - write_stage_images (optional): if True, raw, binary and flattened stage images are also written to image_editing_directory for debugging, off by default.
+    Stages are passed in memory either way.
     """
     MAX_PROCESSING_SIZE = Size(2000, 2000)
     FLAT_IMAGE_REDUCTION_FACTOR = 5 
+    ''' flattened preview is drawn at 1 px per mm up to this size, larger plates are scaled down to fit '''
+    MAX_FLAT_PREVIEW_SIZE = Size(1000, 1000)
+    THRESHOLD_SUGGESTION_HEIGHT = 256
 
-    def __init__(self, session: Session, image_editing_directory: str, plate: Plate):
+    def __init__(self, session: Session, image_editing_directory: str, plate: Plate, write_stage_images: bool = False):
         self.session: Session
         self.plate: Plate
 
@@ -72,13 +78,21 @@ class ImageEditingController(GenericController):
         self.src_image_path: str
         self.raw_path: str
         self.bin_path: str
-        self.feat_path: str
         self.flat_path: str
 
         self.processing_resolution: Size
 
+        self.raw_image: Union[np.ndarray, None] = None
+        self.blurred_image: Union[np.ndarray, None] = None
+        ''' blurred image followed by downscaled levels used for interactive previews '''
+        self.blurred_pyramid: Union[List[np.ndarray], None] = None
+        self.binary_image: Union[np.ndarray, None] = None
+
         self.features: Features
+        ''' spatial index for hit testing, rebuilt lazily if features are replaced '''
+        self.feature_index: Union[FeatureIndex, None] = None
         self.flattened_contours: List[np.ndarray]
+        self.flat_image: Union[np.ndarray, None] = None
 
         if not os.path.exists(image_editing_directory):
             logger.error(f"Indicated image editing directory path does not exist: {image_editing_directory}")
@@ -97,6 +111,7 @@ class ImageEditingController(GenericController):
         self.session = session
         self.image_editing_directory = image_editing_directory
         self.plate = plate
+        self.write_stage_images = write_stage_images
 
         super().__init__(self.session, Plate, self.image_editing_directory)
         self.__init_image_paths__()
@@ -107,7 +122,6 @@ class ImageEditingController(GenericController):
         """ Initialize image filepaths. """
         self.raw_path = os.path.join(self.image_editing_directory, image_filenames.get(EditorState.RAW))
         self.bin_path = os.path.join(self.image_editing_directory, image_filenames.get(EditorState.BINARY))
-        self.feat_path = os.path.join(self.image_editing_directory, image_filenames.get(EditorState.FEATURES))
         self.flat_path = os.path.join(self.image_editing_directory, image_filenames.get(EditorState.FLAT_FINALIZED))  
 
     '''
@@ -134,7 +148,13 @@ class ImageEditingController(GenericController):
         
         try:
             self.src_image_path = filepath
-            self.processing_resolution = ImageEditingController.save_resized_image(self.src_image_path, self.raw_path, self.MAX_PROCESSING_SIZE)
+            self.raw_image = ImageEditingController._resize_image(cv2.imread(self.src_image_path, cv2.IMREAD_COLOR), self.MAX_PROCESSING_SIZE)
+            self.processing_resolution = Size(self.raw_image.shape[1], self.raw_image.shape[0])
+            if self.write_stage_images:
+                cv2.imwrite(self.raw_path, self.raw_image)
+            self.blurred_image = None
+            self.blurred_pyramid = None
+            self.binary_image = None
             self.state = EditorState.BINARY
             logger.debug(f"Raw image saved successfully: {filepath}")   
             return True
@@ -168,57 +188,118 @@ class ImageEditingController(GenericController):
     '''
     Binary image handling
     '''
-    def save_binary_image(self, threshold: int) -> bool:
+    def get_preview_scale(self, display_height: int = None) -> float:
+        """ 
+        Scale of smallest pyramid level that is at least display_height tall, relative to processing resolution. 
+        Returns 1.0 if display_height is None.
         """
-        Saves binary image with given threshold to preview directory. Checks for invalid state and raw image path.
-        Returns True if successful, False otherwise.
+        scale = 1.0
+        if display_height is None:
+            return scale
+        while self.processing_resolution.h * scale / 2 >= max(display_height, MIN_PYRAMID_HEIGHT):
+            scale /= 2
+        return scale
+
+    def get_binary_image(self, threshold: int, display_height: int = None) -> Union[np.ndarray, None]:
+        """
+        Get binary image with given threshold without writing it to disk. Checks for invalid state and raw image path.
+        Blurred grayscale image pyramid is computed on first call and reused, so only thresholding is repeated for new values.
+        If display_height is given, a preview is computed on the smallest pyramid level at least that tall. 
+        Otherwise image is computed at processing resolution and kept for finalize_binary.
+        Returns binary image, None if unsuccessful.
         """
         if self.state != EditorState.BINARY:
             logger.error("Attempted to get binary image in wrong state.")
-            return False
-        
-        if not os.path.exists(self.raw_path):
-            logger.error("Raw image file does not exist.")
-            return False
+            return None
         
         if threshold > 255 or threshold < 0 or not isinstance(threshold, int):
             logger.error("Attempted to generate binary image with invalid threshold value.")
-            return False
+            return None
 
         try:
-            bin_filter = BinaryFilter(self.raw_path, self.bin_path, threshold)
-            bin_filter.save_image()
-            logger.debug("Binary image saved successfully.")
-            return True
+            pyramid = self._get_blurred_pyramid()
+            if pyramid is None:
+                return None
+            if display_height is None:
+                self.binary_image = BinaryFilter.apply_threshold(self.blurred_image, threshold)
+                return self.binary_image
+            level = self._get_pyramid_level(display_height)
+            return BinaryFilter.apply_threshold(pyramid[level], threshold, 0.5 ** level)
         except Exception as e:
-            logger.error(f"Encountered exception while attempting to save binary image: {e}")
-            return False
-        
+            logger.error(f"Encountered exception while attempting to get binary image: {e}")
+            return None
+
+    def suggest_threshold(self, method: ThresholdMethod = ThresholdMethod.OTSU) -> Union[int, None]:
+        """
+        Suggest threshold value using automatic method, computed on a small pyramid level. 
+        Returns threshold value, None if unsuccessful.
+        """
+        if self.state != EditorState.BINARY:
+            logger.error("Attempted to suggest threshold in wrong state.")
+            return None
+        try:
+            pyramid = self._get_blurred_pyramid()
+            if pyramid is None:
+                return None
+            return BinaryFilter.suggest_threshold(pyramid[self._get_pyramid_level(self.THRESHOLD_SUGGESTION_HEIGHT)], method)
+        except Exception as e:
+            logger.error(f"Encountered exception while attempting to suggest threshold: {e}")
+            return None
+
+    def _get_blurred_pyramid(self) -> Union[List[np.ndarray], None]:
+        """ Blurred grayscale image pyramid, computed from raw image on first call. """
+        if self.blurred_pyramid is None:
+            if self.raw_image is None:
+                logger.error("Raw image has not been imported.")
+                return None
+            self.blurred_image = BinaryFilter.get_blurred_grayscale(self.raw_image)
+            self.blurred_pyramid = BinaryFilter.get_pyramid(self.blurred_image)
+        return self.blurred_pyramid
+
+    def _get_pyramid_level(self, display_height: int) -> int:
+        """ Index of pyramid level matching get_preview_scale. """
+        level = round(-math.log2(self.get_preview_scale(display_height)))
+        return min(level, len(self.blurred_pyramid) - 1)
+
     def finalize_binary(self) -> bool:
-        """ Modifies state to confirm finalization of binary image editing."""
-        if self.state == EditorState.BINARY:
-            self.state = EditorState.FEATURES
-            return True
-        return False
+        """ 
+        Modifies state to confirm finalization of binary image editing. 
+        Last binary image from get_binary_image is kept for feature extraction, and saved to preview directory if stage images are written.
+        """
+        if self.state != EditorState.BINARY:
+            return False
+        if self.binary_image is None:
+            logger.error("Attempted to finalize binary image before generating it.")
+            return False
+        if self.write_stage_images and not cv2.imwrite(self.bin_path, self.binary_image):
+            logger.error(f"Could not save binary image to {self.bin_path}")
+            return False
+        self.raw_image = None
+        self.blurred_image = None
+        self.blurred_pyramid = None
+        self.state = EditorState.FEATURES
+        return True
     '''
     Feature handling
     '''
     def extract_image_features(self) -> bool:
         """
-        Extract image features and save to class parameter. Checks for invalid state and image path.
+        Extract image features from finalized binary image held in memory and save to class parameter. Checks for invalid state and missing binary image.
         Returns True if successful, False otherwise.
         """
         if self.state != EditorState.FEATURES:
             logger.error("Attempted to extract features in wrong state.")
             return False
         
-        if not os.path.exists(self.bin_path):
-            logger.error("Binary image file does not exist.")
+        if self.binary_image is None:
+            logger.error("Binary image does not exist.")
             return False
         
         try:
-            feature_extractor = FeatureExtractor(self.bin_path, self.processing_resolution) 
+            feature_extractor = FeatureExtractor(self.binary_image, self.processing_resolution) 
             self.features = feature_extractor.features
+            ''' built here since extraction runs off the GUI thread '''
+            self.feature_index = FeatureIndex(self.features)
             self.state = EditorState.FEATURES_EXTRACTED
             logger.debug("Image features extracted successfully.")
             return True
@@ -226,27 +307,45 @@ class ImageEditingController(GenericController):
             logger.error(f"Encountered exception while attempting to extract image features: {e}")
             return False
 
-    def save_image_features(self) -> bool:
+    def get_features_image(self, features: Features = None, display_height: int = None) -> Union[np.ndarray, None]:
         """
-        Saves image features to preview directory. Checks for invalid state.
-        Returns True if successful, False otherwise. 
+        Get image of given features, or of current features if None, without writing it to disk.
+        If display_height is given, image is drawn at preview scale, feature coordinates remain at processing resolution.
+        Returns BGR image, None if unsuccessful.
         """
-        if self.state != EditorState.FEATURES_EXTRACTED:
-            logger.error("Attempted to save image features in wrong state.")
-            return False
-        
+        features = features if features is not None else getattr(self, 'features', None)
+        if features is None:
+            logger.error("Attempted to get features image before features were extracted.")
+            return None
         try:
-            feature_plotter = FeaturePlotter(
-                dst_path=self.feat_path, 
+            return FeaturePlotter(
+                dst_path=None, 
                 size=self.processing_resolution, 
-                features=self.features) 
-            feature_plotter.save_features()
-            logger.debug(f"Image features saved successfully to {self.feat_path}")
-            return True
+                features=features, 
+                scale=self.get_preview_scale(display_height)
+            ).get_image()
         except Exception as e:
-            logger.error(f"Encountered exception while attempting to save image features: {e}")
-            return False
-        
+            logger.error(f"Encountered exception while attempting to get features image: {e}")
+            return None
+
+    def get_feature_renderer(self, features: Features = None, display_height: int = None) -> Union[FeatureRenderer, None]:
+        """
+        Get layered renderer of given features, or of current features if None, for interactive editing.
+        Renderer is brought up to date after edits with FeatureRenderer.update_features, which only redraws changed regions.
+        If display_height is given, features are drawn at exactly that height, otherwise at processing resolution.
+        Returns None if unsuccessful.
+        """
+        features = features if features is not None else getattr(self, 'features', None)
+        if features is None:
+            logger.error("Attempted to get feature renderer before features were extracted.")
+            return None
+        try:
+            scale = display_height / self.processing_resolution.h if display_height is not None else 1.0
+            return FeatureRenderer(self.processing_resolution, features, scale=scale)
+        except Exception as e:
+            logger.error(f"Encountered exception while attempting to get feature renderer: {e}")
+            return None
+
     def _valid_features(self) -> bool:
         """ Returns True if features are valid for flattening. """
         return self.features and \
@@ -291,7 +390,9 @@ class ImageEditingController(GenericController):
         if self.features is None or self.features.selected_corner_idx is None:
             return False
         if 0 <= self.features.selected_corner_idx < len(self.features.corners):
+            feature_index = self._get_feature_index()
             del self.features.corners[self.features.selected_corner_idx]
+            feature_index.remove_corner(self.features.selected_corner_idx)
             self.unselect_corner()
             return True
         return False
@@ -301,7 +402,9 @@ class ImageEditingController(GenericController):
         if self.features is None or self.features.selected_contour_idx is None:
             return False
         if 0 <= self.features.selected_contour_idx < len(self.features.other_contours):
+            feature_index = self._get_feature_index()
             del self.features.other_contours[self.features.selected_contour_idx]
+            feature_index.remove_contour(self.features.selected_contour_idx)
             self.unselect_contour()
             return True
         return False
@@ -312,31 +415,37 @@ class ImageEditingController(GenericController):
         if not (0 <= x < self.processing_resolution.w) or not (0 <= y < self.processing_resolution.h):
             return False
         new_corner = (x, y)
+        feature_index = self._get_feature_index()
         self.features.corners.append(new_corner)
+        feature_index.add_corner(new_corner)
         return True
 
     def check_feature_selected(self, coordinates: Tuple[float, float]) -> bool:
-        """ Check if a feature is present near the selected coordinate, and select if true. """
+        """ Check if a feature is present near the selected coordinate, and select nearest one if true. Corners take precedence. """
         THRESHOLD: int = 100
 
-        if self.features.corners is not None:
-            for i, corner in enumerate(self.features.corners):
-                if ImageEditingController.distance(coordinates, corner) < THRESHOLD:
-                    self.unselect_contour()
-                    self.select_corner(i)
-                    return True
-        
-        ''' Skips points for increased speed '''
-        if self.features.other_contours is not None:
-            for i, contour in enumerate(self.features.other_contours):
-                for point in contour[::int(THRESHOLD*2)]:
-                    if ImageEditingController.distance(coordinates, point[0]) < THRESHOLD:
-                        self.unselect_corner()
-                        self.select_contour(i)
-                        return True
+        feature_index = self._get_feature_index()
+
+        corner = feature_index.nearest_corner(coordinates, THRESHOLD)
+        if corner is not None:
+            self.unselect_contour()
+            self.select_corner(corner)
+            return True
+
+        contour = feature_index.nearest_contour(coordinates, THRESHOLD)
+        if contour is not None:
+            self.unselect_corner()
+            self.select_contour(contour)
+            return True
 
         return False
 
+    def _get_feature_index(self) -> FeatureIndex:
+        """ Spatial index of current features, rebuilt if features were replaced or changed outside of controller methods. """
+        if self.feature_index is None or not self.feature_index.is_current(self.features):
+            self.feature_index = FeatureIndex(self.features)
+        return self.feature_index
+
     @staticmethod
     def distance(p1: tuple, p2: tuple) -> float:
         x1, y1 = p1
@@ -359,12 +468,7 @@ class ImageEditingController(GenericController):
             output_resolution = Size(self.plate.x, self.plate.y)
             matrix_generator = MatrixGenerator(output_resolution, self.features.corners)    
             transformation_matrix = matrix_generator.matrix()
-            flattened_contours = []
-            for contour in raw_contours:
-                contour32 = np.array(contour, dtype=np.float32).reshape(-1, 1, 2)
-                flattened_contour = cv2.perspectiveTransform(contour32, transformation_matrix)
-                flattened_contours.append(flattened_contour.astype(np.int32))
-            self.flattened_contours = flattened_contours
+            self.flattened_contours = MatrixGenerator.transform_contours(raw_contours, transformation_matrix)
             logger.debug("Successfully extracted flattened contours.")
             self.state = EditorState.FLAT_CTRS_EXTRACTED
             return True
@@ -372,37 +476,36 @@ class ImageEditingController(GenericController):
             logger.error(f"Encountered exception while attempting to retrieve flattened contours: {e}")
             return False
 
+    def get_flat_preview_scale(self) -> float:
+        """ Pixels per mm of flattened preview, at most 1 and small enough for preview to fit MAX_FLAT_PREVIEW_SIZE. """
+        return min(1.0, self.MAX_FLAT_PREVIEW_SIZE.w / self.plate.x, self.MAX_FLAT_PREVIEW_SIZE.h / self.plate.y)
+
     def save_flattened_image(self) -> bool:
         """
-        Save image containing flattened contours to preview directory.
+        Draw preview image containing flattened contours for display, saved to preview directory if stage images are written.
+        Preview size is bounded by MAX_FLAT_PREVIEW_SIZE regardless of plate size, flattened contours keep full precision.
         """
         if self.state != EditorState.FLAT_CTRS_EXTRACTED:
             logger.error("Attempted to save flattened image in wrong state.")
             return False 
 
-        try: 
-            for contour in self.flattened_contours:
-                assert contour.dtype == np.int32, f"Contour dtype is not np.int32, found {contour.dtype}"
-                assert isinstance(contour, np.ndarray), "Contour is not a numpy array"
-                assert contour.ndim == 3 and contour.shape[2] == 2, "Contour does not have the correct shape (should be Nx1x2)"
-                for point in contour:
-                    assert isinstance(point[0][0], np.int32), f"Point value is not np.int32, found type {type(point[0][0])}"
-                    assert isinstance(point[0][1], np.int32), f"Point value is not np.int32, found type {type(point[0][1])}"
-        except AssertionError as a:
-            logger.error(f"AssertionError while checking contour type: {a}")
-            return False
-        except Exception as e:
-            logger.error(f"Exception while checking contour type: {e}")
+        try:
+            self._check_flattened_contours()
+        except ValueError as e:
+            logger.error(f"Invalid flattened contours: {e}")
             return False
         
         feature_plotter = FeaturePlotter(
-                dst_path=self.flat_path, 
+                dst_path=None, 
                 size=Size(self.plate.x, self.plate.y), 
-                features=Features(other_contours=self.flattened_contours))
+                features=Features(other_contours=self.flattened_contours),
+                scale=self.get_flat_preview_scale())
         
         try:
-            feature_plotter.save_features()
-            logger.debug(f"Image features saved successfully to {self.flat_path}")
+            self.flat_image = feature_plotter.get_image()
+            if self.write_stage_images:
+                cv2.imwrite(self.flat_path, self.flat_image)
+                logger.debug(f"Image features saved successfully to {self.flat_path}")
         except Exception as e:
             logger.error(f"Encountered exception while attempting to save image features: {e}")
             return False   
@@ -410,15 +513,22 @@ class ImageEditingController(GenericController):
         self.state = EditorState.FLAT_FINALIZED
         return True
 
+    def _check_flattened_contours(self):
+        """ Check that flattened contours are Nx1x2 int32 arrays. Raises ValueError otherwise. """
+        for contour in self.flattened_contours:
+            if not isinstance(contour, np.ndarray) or contour.dtype != np.int32 or contour.ndim != 3 or contour.shape[1:] != (1, 2):
+                raise ValueError(f"Contour is not an Nx1x2 np.int32 array: {getattr(contour, 'dtype', type(contour))} {np.shape(contour)}")
+
     def update_plate(self) -> bool:
         """
-        Save flattened contours to db.
+        Save flattened contours to db, simplified to within MatrixGenerator.CONTOUR_TOLERANCE and compressed.
         """
         if self.state != EditorState.FLAT_FINALIZED:
             logger.error("Attempted to save flat contours in wrong state.")
             return False   
         try:
-            self._edit_item_attr(self.plate.id, 'contours', serialize_array_list(self.flattened_contours))
+            stored_contours = MatrixGenerator.simplify_contours(self.flattened_contours)
+            self._edit_item_attr(self.plate.id, 'contours', serialize_contour_list(stored_contours))
             return True
         except Exception as e:
             logger.error(f"Encountered exception while attempting to save flattened contours: {e}")
@@ -6,25 +6,18 @@ Date: 2024/06/23
 import os
 import enum
 from collections import defaultdict
-from typing import Union, Tuple, List
+from typing import Union, Tuple, List, Dict
 import numpy as np
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer
 
 from ..models.router_model import Router
-from ..models.plate_model import Plate
+from ..models.plate_model import Plate, normalize_material, quantize_thickness, get_plate_free_rectangles, decode_plate_contours
 from ..models.part_model import Part
-from ..models.utils import deserialize_array, deserialize_array_list, serialize_array, serialize_array_list
-
-from ..utils.packing.bin import Bin
-from ..utils.packing.utils.area2d import Area2D
-from ..utils.packing.utils.dimension2d import Dimension2D
-from ..utils.packing.packing_algo import execute_packing_algorithm
+from ..models.utils import deserialize_array, deserialize_array_list, serialize_contour_list, COMPRESSED_CONTOURS_PREFIX
 
 from ..logging import logger
 
-import matplotlib.pyplot as plt
-
 class OptimizationController:
     """
     Controller for managing layout optimization. 
@@ -62,8 +55,8 @@ class OptimizationController:
         part_materials = defaultdict(list)
 
         for part in imported_parts:
-            material = part.material.lower().strip()
-            thickness = OptimizationController._quantize_val(part.thickness)
+            material = normalize_material(part.material)
+            thickness = quantize_thickness(part.thickness)
             part_materials[material].append(part)
             part_thicknesses[thickness].append(part)
 
@@ -72,79 +65,127 @@ class OptimizationController:
         elif len(part_materials) > 1 or len(part_thicknesses) > 1:
             raise ValueError("All imported parts must be of same thickness and material.")
 
-        selected_plates: List[Plate] = self._get_selected_plates()
-        if selected_plates is None:
+        plate_keys = self._get_selected_plate_keys()
+        if plate_keys is None:
             raise ValueError("No plates selected.")
-        
-        plate_thicknesses = defaultdict(list)
-        plate_materials = defaultdict(list)
 
-        for plate in selected_plates:
-            material = plate.material.lower().strip()
-            thickness = OptimizationController._quantize_val(plate.z)
-            plate_materials[material].append(plate)
-            plate_thicknesses[thickness].append(plate)
+        plate_materials = {material for material, _ in plate_keys}
+        plate_thicknesses = {thickness for _, thickness in plate_keys}
 
         if len(plate_materials) != 1 or len(plate_thicknesses) != 1:
             raise ValueError("All imported plates must be of same thickness and material.")
         
-        if list(plate_thicknesses.keys())[0] != list(part_thicknesses.keys())[0]:
+        if list(plate_thicknesses)[0] != list(part_thicknesses.keys())[0]:
             raise ValueError("Imported part and plate thicknesses do not match.")      
-        if list(plate_materials.keys())[0] != list(part_materials.keys())[0]:
+        if list(plate_materials)[0] != list(part_materials.keys())[0]:
             raise ValueError("Imported part and plate materials do not match.")    
 
+        selected_plates: List[Plate] = self._get_selected_plates()
+        if selected_plates is None:
+            raise ValueError("No plates selected.")
+
         self.routers_orm = selected_routers 
         self.parts_orm = imported_parts
         self.plates_orm = selected_plates 
 
-        mill_bit_diameter = max([router.mill_bit_diameter for router in self.routers_orm])
-        drill_bit_diameter = max([router.drill_bit_diameter for router in self.routers_orm])
+        parts = [
+            (part.id, OptimizationController._get_formatted_part_ctr(part), part.amount) 
+            for part in self.parts_orm
+        ]
+        plates, parts, max_bit_diameter, edge_distance = OptimizationController.get_packing_input(
+            self.routers_orm, 
+            self.plates_orm, 
+            parts
+        )
+
+        ''' packing depends on shapely and matplotlib, loaded when first optimizing '''
+        from ..utils.packing.packing_algo import execute_packing_algorithm
+        self.placements = execute_packing_algorithm(
+            plates, 
+            parts, 
+            max_bit_diameter, 
+            edge_distance,
+            self.preview_path, 
+            self.conversion_factor,
+            contour_loader=self._load_plate_contours
+        )
+
+    @staticmethod
+    def get_packing_input(
+        routers: List[Router], 
+        plates: List[Plate], 
+        parts: List[Tuple[str, List[Tuple[float, float]], int]]
+    ) -> Tuple[list, list, float, float]:
+        """
+        Convert routers, plates, and (part id, contour, amount) tuples into packing algorithm input.
+        Plates are given by their stored free rectangles and free area, so plate contours are not decoded.
+        Returns tuple of (bins, pieces, max bit diameter, edge distance). Raises ValueError if no plate fits the routers.
+        """
+        if not routers:
+            raise ValueError("No routers selected.")
+
+        mill_bit_diameter = max([router.mill_bit_diameter for router in routers])
+        drill_bit_diameter = max([router.drill_bit_diameter for router in routers])
         max_bit_diameter = max(drill_bit_diameter, mill_bit_diameter)
 
-        edge_distance = max([router.min_safe_dist_from_edge for router in self.routers_orm])
+        edge_distance = max([router.min_safe_dist_from_edge for router in routers])
 
-        router_sizes = [(router.plate_x, router.plate_y) for router in self.routers_orm]
+        router_sizes = [(router.plate_x, router.plate_y) for router in routers]
         max_plate_x = min(router_sizes, key=lambda size: size[0])[0]
         max_plate_y = min(router_sizes, key=lambda size: size[1])[1]
 
-        plates = []
+        packing_bins = []
 
-        for plate in self.plates_orm:
+        for plate in plates:
             if plate.x <= max_plate_x and plate.y <= max_plate_y:
-                contour_list = OptimizationController._get_formatted_plate_ctrs(plate)
-                plates.append((plate.id, (plate.x, plate.y), contour_list))
-
-        if len(plates) == 0:
+                free_rectangles = get_plate_free_rectangles(plate)
+                free_area = plate.free_area if plate.free_area is not None else sum(rectangle.area for rectangle in free_rectangles)
+                packing_bins.append((
+                    plate.id, 
+                    (plate.x, plate.y), 
+                    [(rectangle.min_x, rectangle.min_y, rectangle.width, rectangle.height) for rectangle in free_rectangles], 
+                    free_area
+                ))
+
+        if len(packing_bins) == 0:
             raise ValueError("Selected plates exceed maximum size of selected router.")
 
-        parts = []
+        packing_pieces = []
 
-        for part in self.parts_orm:
-            part_id = part.id
-            amount = part.amount
-            contour = OptimizationController._get_formatted_part_ctr(part)
+        for part_id, contour, amount in parts:
             for i in range(amount):
-                parts.append((OptimizationController._get_part_id_with_amt(part_id, i), contour))
+                packing_pieces.append((OptimizationController._get_part_id_with_amt(part_id, i), list(contour)))
 
-        self.placements = execute_packing_algorithm(
-            plates, 
-            parts, 
-            max_bit_diameter, 
-            edge_distance,
-            self.preview_path, 
-            self.conversion_factor
-        )
+        return packing_bins, packing_pieces, max_bit_diameter, edge_distance
 
     def save_layout(self) -> Tuple[set, set]:
         """ Save generated layout to database. Returns tuple of used pieces and used bins. """
         if self.placements is None:
             return
 
+        part_contours = {}
+        for piece_id in self.placements:
+            if 'edge' in piece_id or 'ctr' in piece_id:
+                continue
+            stripped_id = OptimizationController._strip_amt_part_id(piece_id)
+            if stripped_id not in part_contours:
+                used_part = self.session.query(Part).filter(Part.id == stripped_id).all()[0]
+                part_contours[stripped_id] = OptimizationController._get_formatted_part_ctr(used_part)
+
+        return OptimizationController.save_placements(self.session, self.placements, part_contours)
+
+    @staticmethod
+    def save_placements(session: Session, placements: dict, part_contours: dict) -> Tuple[set, set]:
+        """
+        Append placed part contours to the contours of the plates they were placed on.
+        Part contours are looked up by part id without the amount suffix. Returns tuple of used pieces and used bins.
+        Contours of each used plate are decoded and stored once, in the compressed format used by the image editor.
+        """
         used_pieces = set()
-        used_bins = set()
+        placed_contours = defaultdict(list)
 
-        for piece_id, placement in self.placements.items():
-            if 'edge' in piece_id or 'ctr' in piece_id:
+        for piece_id, placement in placements.items():
+            if 'edge' in piece_id or 'ctr' in piece_id or placement is None:
                 continue
 
             stripped_id = OptimizationController._strip_amt_part_id(piece_id)
@@ -153,29 +194,27 @@ class OptimizationController:
             bin_id, coordinates = placement
             delta_x, delta_y = coordinates
 
-            used_bins.add(bin_id)
+            used_part_contour = part_contours[stripped_id]
+            placed_contours[bin_id].append([(int(point[0] + delta_x), int(point[1] + delta_y)) for point in used_part_contour])
 
-            used_part = self.session.query(Part).filter(Part.id == stripped_id).all()[0]
-            used_part_contour = OptimizationController._get_formatted_part_ctr(used_part)
-
-            used_plate = self.session.query(Plate).filter(Plate.id == bin_id).all()[0]
-            used_plate_contours = OptimizationController._get_formatted_plate_ctrs(used_plate)
-
-            shifted_contour = []
-
-            for point in used_part_contour:
-                shifted_contour.append((int(point[0] + delta_x), int(point[1] + delta_y)))
-
-            used_plate_contours.append(shifted_contour)
-
-            setattr(
-                used_plate, 
-                'contours', 
-                OptimizationController._get_reverted_plate_ctrs(used_plate_contours)
-            )
-            self.session.commit()
+        try:
+            with session.no_autoflush:
+                for bin_id, contours in placed_contours.items():
+                    used_plate = session.query(Plate).filter(Plate.id == bin_id).all()[0]
+                    setattr(
+                        used_plate, 
+                        'contours', 
+                        OptimizationController._get_reverted_plate_ctrs(used_plate.contours, contours)
+                    )
+
+            ''' free space summary of each used plate is recomputed once on commit '''
+            session.commit()
+        except Exception as e:
+            logger.error(f"Encountered exception while saving placements: {e}")
+            session.rollback()
+            raise
         
-        return (used_pieces, used_bins)
+        return (used_pieces, set(placed_contours))
 
     """ Part ID handling """
 
@@ -192,21 +231,30 @@ class OptimizationController:
     """ Contour retrieval and formatting """ 
 
     @staticmethod
-    def _get_formatted_plate_ctrs(plate: Plate) -> List[List[Tuple[float, float]]]:
-        """ Get properly formatted contour list for given plate """ 
-        formatted_contours =  [contour.reshape(-1, 2).tolist() for contour in deserialize_array_list(plate.contours)] if plate.contours is not None else []
-        for contour in formatted_contours:
-            for i, point in enumerate(contour):
-                contour[i] = (point[0], point[1])
-        return formatted_contours
-    
-    @staticmethod
-    def _get_reverted_plate_ctrs(contours: List[List[Tuple[float, float]]]) -> str:
-        """ Get plate contours reverted back to serialized string format. Returns in format [np.array([[[x, y]], [[x, y]], [[x, y]], ...]), ...] serialized as a string. """
-        contour_list = []
-        for contour in contours:
-            contour_list.append(np.array([[[point[0], point[1]]] for point in contour]))
-        return serialize_array_list(contour_list)
+    def _get_reverted_plate_ctrs(stored_contours: Union[str, None], new_contours: List[List[Tuple[int, int]]]) -> str:
+        """
+        Get stored plate contours with new contours appended, serialized with serialize_contour_list.
+        New contours are simplified like contours saved by the image editor. Contours stored in the legacy format are simplified once 
+        when they are converted, compressed ones already are and are kept as they are so that simplification error does not accumulate.
+        """
+        ''' imported here since cv2 is not needed during application startup '''
+        from ..utils.image_processing.matrix_generator import MatrixGenerator
+
+        existing_contours = deserialize_array_list(stored_contours) if stored_contours is not None else []
+        if existing_contours is None:
+            raise ValueError("Stored plate contours could not be read.")
+        if stored_contours is not None and not stored_contours.startswith(COMPRESSED_CONTOURS_PREFIX):
+            existing_contours = MatrixGenerator.simplify_contours([np.rint(contour).astype(np.int32) for contour in existing_contours])
+
+        appended_contours = MatrixGenerator.simplify_contours([np.array(contour, dtype=np.int32).reshape(-1, 1, 2) for contour in new_contours])
+        serialized_contours = serialize_contour_list(list(existing_contours) + appended_contours)
+        if serialized_contours is None:
+            raise ValueError("Plate contours could not be serialized.")
+        return serialized_contours
+
+    def _load_plate_contours(self, plate_ids: List[str]) -> Dict[str, List[List[Tuple[float, float]]]]:
+        """ Get existing contours of plates by plate id, used for drawing the layout preview. """
+        return decode_plate_contours(dict(self.session.query(Plate.id, Plate.contours).filter(Plate.id.in_(plate_ids)).all()))
 
     @staticmethod
     def _get_formatted_part_ctr(part: Part) -> List[Tuple[float, float]]:
@@ -233,10 +281,18 @@ class OptimizationController:
             logger.error(f"Encountered exception while attempting to get imported parts: {e}")
             return None
 
+    def _get_selected_plate_keys(self) -> List[Tuple[str, float]]:
+        """ Get distinct (normalized material, quantized thickness) pairs of selected plates. """
+        try:
+            return self.session.query(Plate.material_key, Plate.thickness_key).filter(Plate.selected == True).distinct().all()
+        except Exception as e:
+            logger.error(f"Encountered exception while attempting to get selected plate properties: {e}")
+            return None
+
     def _get_selected_plates(self) -> List[Plate]:
-        """ Get all selected plates. """
+        """ Get all selected plates, fullest first. Contours are not loaded, packing uses stored free space. """
         try:
-            return self.session.query(Plate).filter(Plate.selected == True).all()
+            return self.session.query(Plate).options(defer(Plate.contours)).filter(Plate.selected == True).order_by(Plate.free_area).all()
         except Exception as e:
             logger.error(f"Encountered exception while attempting to get selected plates: {e}")
             return None
@@ -245,5 +301,5 @@ class OptimizationController:
 
     @staticmethod
     def _quantize_val(value: float) -> float:
-        return round(value, 2)
+        return quantize_thickness(value)
     
\ No newline at end of file
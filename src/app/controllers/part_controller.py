@@ -4,30 +4,107 @@ Date: 2024/06/01
 """
 
 import os
-from typing import Union
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Union, Tuple, List, Dict, Set, Callable
 
 import numpy as np
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from ..models.part_model import Part
-from ..models.utils import serialize_array, deserialize_array
-from ..utils.stl_parser import STLParser
+from ..models.utils import serialize_array, deserialize_array, get_uuid
+from ..utils.stl_parser import STLParser, MIN_POINT_DISTANCE
+from ..utils.part_cache import PartCache, get_file_hash
 from ..logging import logger
 
 from .generic_controller import GenericController 
 
+def parse_part_file(filepath: str, preview_path: str, point_spacing: float = MIN_POINT_DISTANCE) -> Tuple[float, str]:
+    """
+    Parse STL file and save its preview image. Runs inside import worker processes.
+    Returns tuple of (thickness, serialized outer contour).
+    """
+    parser = STLParser(filepath, point_spacing)
+    parser.parse_stl()
+    parser.save_preview_image(preview_path)
+    return parser.thickness, serialize_array(parser.outer_contour)
+
+''' called with (files done, total files, filepath, error message or None) '''
+ProgressCallback = Callable[[int, int, str, Union[str, None]], None]
+
+class PartImport:
+    """
+    State of a batch import, passed between the phases of PartController.add_from_files.
+    ### Parameters:
+    - filepaths: files to be imported, duplicate paths are imported once.
+    - existing_hashes: content hashes of imported parts.
+    - existing_filenames: filenames of imported parts.
+    - progress_callback: called after each file with (files done, total files, filepath, error message or None).
+    """
+    def __init__(
+        self, 
+        filepaths: List[str], 
+        existing_hashes: Set[str], 
+        existing_filenames: Set[str], 
+        progress_callback: ProgressCallback = None
+    ):
+        self.filepaths = list(dict.fromkeys(filepaths))
+        self.existing_hashes = set(existing_hashes)
+        self.existing_filenames = set(existing_filenames)
+        self.progress_callback = progress_callback
+        self.total = len(self.filepaths)
+        self.done = 0
+        self.errors: Dict[str, str] = {}
+        ''' (part id, preview path, content hash) of files that are imported if parsed successfully '''
+        self.jobs: Dict[str, Tuple[str, str, str]] = {}
+        ''' (thickness, serialized outer contour) of parsed files '''
+        self.parsed: Dict[str, Tuple[float, str]] = {}
+
+    def report(self, filepath: str, error: Union[str, None]):
+        """ Count file as done and report progress. """
+        self.done += 1
+        if error is not None:
+            self.errors[filepath] = error
+            logger.error(f"Failed to import file {filepath}: {error}")
+        if self.progress_callback is not None:
+            self.progress_callback(self.done, self.total, filepath, error)
+
 class PartController(GenericController):
     """
     Controller for handling part logic.
     ### Parameters:
     - session: working session.
     - preview_image_directory: directory for storing part preview images.
+    - cache_directory: directory for persistent parse cache keyed by file content hash. Parse results are not cached if None.
+    - point_spacing: distance between points of imported part contours.
+    - import_workers: amount of processes parsing imported files. Files are parsed inline if 1.
+    The process pool is started on first import and kept until shutdown is called.
     """
     MAX_PART_AMOUNT: int = 20
+    DEFAULT_IMPORT_WORKERS = os.cpu_count() or 1
 
-    def __init__(self, session: Session, preview_image_directory: str):
+    def __init__(
+        self, 
+        session: Session, 
+        preview_image_directory: str, 
+        cache_directory: str = None, 
+        point_spacing: float = MIN_POINT_DISTANCE,
+        import_workers: int = DEFAULT_IMPORT_WORKERS
+    ):
+        if import_workers < 1:
+            raise ValueError(f"Attempted to initialize PartController with invalid amount of import workers: {import_workers}")
         super().__init__(session, Part, preview_image_directory)
+        self.point_spacing = point_spacing
+        self.cache = PartCache(cache_directory) if cache_directory is not None else None
+        self.import_workers = import_workers
+        self._import_pool: Union[ProcessPoolExecutor, None] = None
+
+    def shutdown(self):
+        """ Stop import worker processes. """
+        if self._import_pool is not None:
+            self._import_pool.shutdown(wait=False, cancel_futures=True)
+            self._import_pool = None
     '''
     Add new parts
     '''
@@ -36,31 +113,151 @@ class PartController(GenericController):
         Extract part from STL file and add to db, create preview image.
         Returns newly created part if successful, None otherwise
         """
-        if not os.path.exists(filepath):
-            logger.error(f"STL file does not exist: {filepath}")
-            return None
+        parts, _ = self.add_from_files([filepath])
+        return parts[0] if parts else None
+
+    def add_from_files(self, filepaths: List[str], progress_callback: ProgressCallback = None) -> Tuple[List[Part], Dict[str, str]]:
+        """
+        Import multiple STL files. Files are parsed and previewed in worker processes, parts are committed in a single transaction.
+        Files are identified by content hash: files with already imported geometry are rejected, cached files are not parsed again.
+        progress_callback is called after each file with (files done, total files, filepath, error message or None).
+        Returns tuple of (added parts, dict of error messages by filepath for files that were not imported).
+        Runs all import phases on the calling thread, see prepare_import for importing without blocking the GUI.
+        """
+        batch = self.prepare_import(filepaths, progress_callback)
+        self.parse_import(batch)
+        return self.commit_import(batch)
 
-        duplicates = self.session.query(Part).filter(Part.filename == os.path.basename(filepath)).first()
-        if duplicates is not None:
-            logger.debug(f"Attempted to add already existing STL file: {filepath}")
+    def add_from_directory(self, directory: str, progress_callback: ProgressCallback = None) -> Tuple[List[Part], Dict[str, str]]:
+        """
+        Import all STL files in directory. See add_from_files.
+        """
+        filepaths = self.get_directory_files(directory)
+        if filepaths is None:
+            return [], {directory: "Directory does not exist."}
+        return self.add_from_files(filepaths, progress_callback)
+
+    @staticmethod
+    def get_directory_files(directory: str) -> Union[List[str], None]:
+        """ Get sorted paths of STL files in directory. Returns None if directory does not exist. """
+        if not os.path.isdir(directory):
+            logger.error(f"Import directory does not exist: {directory}")
             return None
+        return sorted(
+            os.path.join(directory, filename) for filename in os.listdir(directory) 
+            if filename.lower().endswith('.stl') and os.path.isfile(os.path.join(directory, filename))
+        )
 
-        try:
-            parser = STLParser(filepath) 
-            parser.parse_stl()
-            part = Part(
+    def prepare_import(self, filepaths: List[str], progress_callback: ProgressCallback = None) -> PartImport:
+        """
+        First import phase, reads imported filenames and content hashes from db. Must run on the thread owning the session.
+        """
+        existing_hashes = {content_hash for (content_hash,) in self.session.query(Part.content_hash).all() if content_hash}
+        existing_filenames = {filename for (filename,) in self.session.query(Part.filename).all()}
+        return PartImport(filepaths, existing_hashes, existing_filenames, progress_callback)
+
+    def parse_import(self, batch: PartImport):
+        """
+        Second import phase, hashes files, rejects duplicates and parses remaining files unless cached. 
+        Does not access the db, so it can run on a background thread. Progress callback is called from that thread.
+        """
+        ''' filenames are unique in db, so different geometry under an existing filename is still rejected '''
+        for filepath in batch.filepaths:
+            if not os.path.isfile(filepath):
+                batch.report(filepath, "File does not exist.")
+                continue
+            try:
+                content_hash = get_file_hash(filepath, self.point_spacing)
+            except OSError as e:
+                batch.report(filepath, f"File could not be read: {e}")
+                continue
+            filename = os.path.basename(filepath)
+            if content_hash in batch.existing_hashes:
+                batch.report(filepath, "A part with the same geometry has already been imported.")
+            elif filename in batch.existing_filenames:
+                batch.report(filepath, "A different part with the same filename has already been imported.")
+            else:
+                batch.existing_hashes.add(content_hash)
+                batch.existing_filenames.add(filename)
+                part_id = get_uuid()
+                batch.jobs[filepath] = (part_id, self._get_preview_image_path(part_id), content_hash)
+
+        if self.cache is not None:
+            for filepath, (_, preview_path, content_hash) in batch.jobs.items():
+                cached = self.cache.get(content_hash, preview_path)
+                if cached is not None:
+                    batch.parsed[filepath] = cached
+                    batch.report(filepath, None)
+
+        def store(filepath: str, result: Tuple[float, str]):
+            batch.parsed[filepath] = result
+            if self.cache is not None:
+                _, preview_path, content_hash = batch.jobs[filepath]
+                self.cache.put(content_hash, result[0], result[1], preview_path)
+            batch.report(filepath, None)
+
+        pending = {filepath: job for filepath, job in batch.jobs.items() if filepath not in batch.parsed}
+
+        ''' a single file is parsed faster inline than by starting the pool '''
+        if self.import_workers <= 1 or (len(pending) <= 1 and self._import_pool is None):
+            for filepath, (_, preview_path, _) in pending.items():
+                try:
+                    store(filepath, parse_part_file(filepath, preview_path, self.point_spacing))
+                except Exception as e:
+                    batch.report(filepath, str(e))
+            return
+
+        pool = self._get_import_pool()
+        futures = {
+            pool.submit(parse_part_file, filepath, preview_path, self.point_spacing): filepath 
+            for filepath, (_, preview_path, _) in pending.items()
+        }
+        for future in as_completed(futures):
+            filepath = futures[future]
+            try:
+                store(filepath, future.result())
+            except Exception as e:
+                batch.report(filepath, str(e))
+
+    def commit_import(self, batch: PartImport) -> Tuple[List[Part], Dict[str, str]]:
+        """
+        Last import phase, adds parsed parts to db in a single transaction. Must run on the thread owning the session.
+        Returns tuple of (added parts, dict of error messages by filepath for files that were not imported).
+        """
+        jobs, parsed, errors = batch.jobs, batch.parsed, batch.errors
+        parts = [
+            Part(
+                id=jobs[filepath][0], 
                 filename=os.path.basename(filepath), 
-                thickness=parser.thickness,
-                contours=serialize_array(parser.outer_contour)
+                thickness=parsed[filepath][0], 
+                contours=parsed[filepath][1],
+                content_hash=jobs[filepath][2]
             )
-            self._add_item_to_db(part)
-            dst_path = self._get_preview_image_path(str(part.id))
-            parser.save_preview_image(dst_path)
-            logger.debug(f"Imported file {filepath} successfully")
-            return part
+            for filepath in jobs if filepath in parsed
+        ]
+
+        try:
+            self.session.add_all(parts)
+            self.session.commit()
+            logger.debug(f"Imported {len(parts)} of {batch.total} files successfully")
+            return parts, errors
         except Exception as e:
-            logger.error(f"Encountered error while attempting to import file {filepath}: {e}")
-            return None
+            logger.error(f"Encountered error while committing imported parts: {e}")
+            self.session.rollback()
+            for filepath in parsed:
+                errors[filepath] = str(e)
+                preview_path = jobs[filepath][1]
+                if os.path.exists(preview_path):
+                    os.remove(preview_path)
+            return [], errors
+
+    def _get_import_pool(self) -> ProcessPoolExecutor:
+        """ Get import process pool, started on first use. """
+        if self._import_pool is None:
+            ''' spawned workers do not inherit the Qt application or database connections '''
+            context = multiprocessing.get_context('spawn')
+            self._import_pool = ProcessPoolExecutor(max_workers=self.import_workers, mp_context=context)
+        return self._import_pool
     '''
     Remove parts
     '''
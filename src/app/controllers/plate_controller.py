@@ -3,17 +3,17 @@ Author: nagan319
 Date: 2024/06/01
 """
 
-from typing import Union, Tuple, List
+from typing import Union, Tuple, List, Callable
 
 import numpy as np
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from ..models.plate_model import Plate, PlateConstants
+from ..models.plate_model import Plate, PlateConstants, query_candidate_plates, normalize_material, quantize_thickness
 from ..models.utils import serialize_array, deserialize_array, deserialize_array_list
 
-import matplotlib.pyplot as plt
-from ..utils.plotting_util import PlottingConstants, _generate_rectangle_coordinates
+from ..utils.plotting_util import PreviewJob, _generate_rectangle_coordinates, PREVIEW_STYLE
+from ..service.preview_service import PreviewService
 
 from ..logging import logger
 
@@ -24,16 +24,27 @@ class PlateController(GenericController):
     Controller for handling plate logic.
     - session: working session.
     - preview_image_directory: directory for storing plate preview images.
+    - conversion_factor: factor for converting dimensions to display units.
+    - preview_cache_directory: directory for persistent preview cache. Previews are not cached if None.
+    - preview_service: service for rendering previews in worker processes. 
+    If None, previews of all plates are rendered during initialization, otherwise save_all_previews must be called.
     """
     MAX_PLATE_AMOUNT: int = 50
 
-    def __init__(self, session: Session, preview_image_directory: str, conversion_factor: float = 1.0):
+    def __init__(
+        self, 
+        session: Session, 
+        preview_image_directory: str, 
+        conversion_factor: float = 1.0, 
+        preview_cache_directory: str = None, 
+        preview_service: PreviewService = None
+    ):
         if conversion_factor <= 0:
             raise ValueError(f"Attempted to initialize RouterController with invalid conversion factor: {conversion_factor}")
         self.conversion_factor = conversion_factor
-        super().__init__(session, Plate, preview_image_directory)
-        for plate in self._get_all_items():
-            self.save_preview(plate)
+        super().__init__(session, Plate, preview_image_directory, preview_cache_directory, preview_service)
+        if preview_service is None:
+            self.save_all_previews()
     '''
     Add new plates
     '''
@@ -152,27 +163,43 @@ class PlateController(GenericController):
         Z_THRESH = .01
 
         try:
-            material = material.strip().lower()
-            all_plates = self.get_all()
-            
-            for plate in all_plates:
-                plate_z = plate.z  
-                plate_material = plate.material.strip().lower()
-                selection_status = (plate_material == material and abs(plate_z - z) <= Z_THRESH)
-                self.edit_selected(plate.id, selection_status)                 
-                
+            matching_ids = self.session.query(Plate.id).filter(
+                Plate.material_key == normalize_material(material),
+                Plate.thickness_key.between(quantize_thickness(z - Z_THRESH), quantize_thickness(z + Z_THRESH))
+            )
+            self.session.query(Plate).update({Plate.selected: Plate.id.in_(matching_ids.scalar_subquery())}, synchronize_session=False)
+            self.session.commit()
+            self.session.expire_all()
             return True
         
         except Exception as e:
             logger.error(f"Encountered exception while attempting to automatically select plates: {e}")
+            self.session.rollback()
             return False
 
+    def get_candidates(self, z: float, material: str, min_width: float = 0, min_height: float = 0) -> Union[List[Plate], None]:
+        """
+        Get plates with desired thickness and material that have a free rectangle of at least min_width x min_height in either orientation.
+        Returns None if an error occurs.
+        """
+        try:
+            return query_candidate_plates(self.session, material, z, min_width, min_height)
+        except Exception as e:
+            logger.error(f"Encountered exception while attempting to query candidate plates: {e}")
+            return None
+
     '''
     Preview image logic
     '''
-    def save_preview(self, plate: Plate, figsize: Tuple[int, int] = (4, 4), dpi: int = 80):
+    def save_all_previews(self, callback: Callable[[str, Union[str, None]], None] = None):
+        """ Save preview images of all plates. See save_preview. """
+        for plate in self._get_all_items():
+            self.save_preview(plate, callback=callback)
+
+    def save_preview(self, plate: Plate, figsize: Tuple[int, int] = (4, 4), dpi: int = 80, callback: Callable[[str, Union[str, None]], None] = None):
         """
-        Saves a preview image for a plate using matplotlib.
+        Saves a preview image for a plate. Cached image is used if plate dimensions and contours are unchanged.
+        If callback is given, image is rendered by preview service and callback is called with (image path, error or None).
 
         Arguments:
         - plate: Plate ORM instance.
@@ -181,36 +208,25 @@ class PlateController(GenericController):
         """
         try:
             image_path = self._get_preview_image_path(plate.id)
-            image_contours = deserialize_array_list(plate.contours)
-            plate_xy = (plate.x * self.conversion_factor, plate.y * self.conversion_factor)
-            plate_rect_x, plate_rect_y = _generate_rectangle_coordinates(*plate_xy)
+            plate_x, plate_y, serialized_contours = plate.x, plate.y, plate.contours
         except AttributeError as e:
             logger.debug(f"Encountered error while attempting to create preview image for plate with id {plate.id}: {e}")
             return
 
-        plt.figure(figsize=figsize)
-
-        plt.plot(plate_rect_x, plate_rect_y, color=PlottingConstants.PLOT_LINE_COLOR)
-
-        if image_contours:
-            for contour in image_contours:
-                x_coords = [point[0][0] * self.conversion_factor for point in contour]
-                y_coords = [point[0][1] * self.conversion_factor for point in contour]
-                plt.plot(x_coords, y_coords, color=PlottingConstants.PLOT_LINE_COLOR, linewidth=1)
-
-        plt.grid(True)
-        plt.gca().set_facecolor(PlottingConstants.PLOT_BG_COLOR)
-        plt.gca().set_aspect('equal')
-        plt.gca().invert_yaxis()
-        plt.grid(False)
-        plt.tick_params(axis='x', colors=PlottingConstants.PLOT_TEXT_COLOR)
-        plt.tick_params(axis='y', colors=PlottingConstants.PLOT_TEXT_COLOR)
-
-        plt.gca().spines['top'].set_color(PlottingConstants.PLOT_TEXT_COLOR)
-        plt.gca().spines['bottom'].set_color(PlottingConstants.PLOT_TEXT_COLOR)
-        plt.gca().spines['left'].set_color(PlottingConstants.PLOT_TEXT_COLOR)
-        plt.gca().spines['right'].set_color(PlottingConstants.PLOT_TEXT_COLOR)
-
-        plt.savefig(image_path, bbox_inches='tight', facecolor=PlottingConstants.PLOT_BG_COLOR, dpi=dpi)
+        def build_job() -> PreviewJob:
+            ''' contours are only decoded if the preview is not cached '''
+            image_contours = deserialize_array_list(serialized_contours)
+            plate_rect_x, plate_rect_y = _generate_rectangle_coordinates(plate_x * self.conversion_factor, plate_y * self.conversion_factor)
+            contour_lines = [np.asarray(contour).reshape(-1, 2) * self.conversion_factor for contour in image_contours or []]
+            return PreviewJob(
+                [([np.column_stack((plate_rect_x, plate_rect_y))], 'solid', None), (contour_lines, 'solid', 1)],
+                tuple(figsize), dpi, {'invert_y': True}
+            )
+
+        self._save_cached_preview(
+            image_path,
+            build_job,
+            plate_x, plate_y, serialized_contours, self.conversion_factor, tuple(figsize), dpi, PREVIEW_STYLE,
+            callback=callback
+        )
         logger.debug(f"Preview image for plate with id {plate.id} saved successfully.")
-        plt.close()
@@ -4,7 +4,7 @@ Date: 2024/06/03
 """
 
 import os
-from typing import Union, Tuple, List
+from typing import Union, Tuple, List, Callable
 
 import numpy as np
 from sqlalchemy import func
@@ -12,8 +12,8 @@ from sqlalchemy.orm import Session
 
 from ..models.router_model import Router, RouterConstants
 
-import matplotlib.pyplot as plt
-from ..utils.plotting_util import PlottingConstants, _generate_rectangle_coordinates
+from ..utils.plotting_util import PreviewJob, _generate_rectangle_coordinates, PREVIEW_STYLE
+from ..service.preview_service import PreviewService
 
 from ..logging import logger
 
@@ -25,16 +25,27 @@ class RouterController(GenericController):
     ### Parameters:
     - session: working session.
     - preview_image_directory: directory for storing router preview images.
+    - conversion_factor: factor for converting dimensions to display units.
+    - preview_cache_directory: directory for persistent preview cache. Previews are not cached if None.
+    - preview_service: service for rendering previews in worker processes. 
+    If None, previews of all routers are rendered during initialization, otherwise save_all_previews must be called.
     """
     MAX_ROUTER_AMOUNT: int = 10
 
-    def __init__(self, session: Session, preview_image_directory: str, conversion_factor: float = 1.0):
+    def __init__(
+        self, 
+        session: Session, 
+        preview_image_directory: str, 
+        conversion_factor: float = 1.0, 
+        preview_cache_directory: str = None, 
+        preview_service: PreviewService = None
+    ):
         if conversion_factor <= 0:
             raise ValueError(f"Attempted to initialize RouterController with invalid conversion factor: {conversion_factor}")
         self.conversion_factor = conversion_factor
-        super().__init__(session, Router, preview_image_directory)
-        for router in self._get_all_items():
-            self.save_preview(router)
+        super().__init__(session, Router, preview_image_directory, preview_cache_directory, preview_service)
+        if preview_service is None:
+            self.save_all_previews()
     '''
     Add new routers
     '''
@@ -213,9 +224,15 @@ class RouterController(GenericController):
     '''
     Preview image logic
     '''
-    def save_preview(self, router: Router, figsize: Tuple[int, int] = (8, 8), dpi: int = 80):
+    def save_all_previews(self, callback: Callable[[str, Union[str, None]], None] = None):
+        """ Save preview images of all routers. See save_preview. """
+        for router in self._get_all_items():
+            self.save_preview(router, callback=callback)
+
+    def save_preview(self, router: Router, figsize: Tuple[int, int] = (8, 8), dpi: int = 80, callback: Callable[[str, Union[str, None]], None] = None):
         """
-        Saves a preview image for a router using matplotlib.
+        Saves a preview image for a router. Cached image is used if router dimensions are unchanged.
+        If callback is given, image is rendered by preview service and callback is called with (image path, error or None).
 
         Arguments:
         - router: Router ORM instance.
@@ -240,23 +257,16 @@ class RouterController(GenericController):
         router_rect_x, router_rect_y = _generate_rectangle_coordinates(*router_xy, router_x_offset, router_y_offset)
         safe_rect_x, safe_rect_y = _generate_rectangle_coordinates(*(dim - 2 * safe_distance for dim in plate_xy), safe_distance, safe_distance)
 
-        plt.figure(figsize=figsize)
-
-        plt.plot(plate_rect_x, plate_rect_y, color=PlottingConstants.PLOT_LINE_COLOR, linestyle=':')
-        plt.plot(router_rect_x, router_rect_y, color=PlottingConstants.PLOT_LINE_COLOR)
-        plt.plot(safe_rect_x, safe_rect_y, color=PlottingConstants.PLOT_LINE_COLOR, linestyle='--')
-
-        plt.grid(True)
-        plt.gca().set_facecolor(PlottingConstants.PLOT_BG_COLOR)
-        plt.gca().set_aspect('equal')
-        plt.grid(False)
-        plt.tick_params(axis='x', colors=PlottingConstants.PLOT_TEXT_COLOR)
-        plt.tick_params(axis='y', colors=PlottingConstants.PLOT_TEXT_COLOR)
-
-        plt.gca().spines['top'].set_color(PlottingConstants.PLOT_TEXT_COLOR)
-        plt.gca().spines['bottom'].set_color(PlottingConstants.PLOT_TEXT_COLOR)
-        plt.gca().spines['left'].set_color(PlottingConstants.PLOT_TEXT_COLOR)
-        plt.gca().spines['right'].set_color(PlottingConstants.PLOT_TEXT_COLOR)
-
-        plt.savefig(image_path, bbox_inches='tight', facecolor=PlottingConstants.PLOT_BG_COLOR, dpi=dpi)
-        plt.close()
+        self._save_cached_preview(
+            image_path,
+            PreviewJob(
+                [
+                    ([np.column_stack((plate_rect_x, plate_rect_y))], 'dotted', None),
+                    ([np.column_stack((router_rect_x, router_rect_y))], 'solid', None),
+                    ([np.column_stack((safe_rect_x, safe_rect_y))], 'dashed', None)
+                ],
+                tuple(figsize), dpi
+            ),
+            router_xy, plate_xy, safe_distance, tuple(figsize), dpi, PREVIEW_STYLE,
+            callback=callback
+        )
@@ -3,7 +3,7 @@ Author: nagan319
 Date: 2024/05/31
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base
 
 from .logging import logger
@@ -15,6 +15,43 @@ Base = declarative_base()
 
 def init_db():
     Base.metadata.create_all(engine)
+    add_missing_columns(engine)
+    backfill_columns(engine)
+
+def add_missing_columns(target_engine):
+    """
+    Add columns and indexes introduced after a table was created.
+    create_all only creates missing tables, so databases from older versions are upgraded here.
+    """
+    existing_tables = inspect(target_engine).get_table_names()
+    with target_engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column['name'] for column in inspect(connection).get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                logger.debug(f"Added column {column.name} to table {table.name}.")
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+def backfill_columns(target_engine):
+    """
+    Compute values of columns added by add_missing_columns for rows stored before they existed.
+    Done once when the database is initialized, so every view and service sees complete rows.
+    """
+    ''' models import Base from this module, so they are imported here to avoid a cycle '''
+    from .models.plate_model import index_plates
+    session = sessionmaker(bind=target_engine)()
+    try:
+        amt_indexed = index_plates(session)
+        if amt_indexed:
+            logger.debug(f"Backfilled inventory columns of {amt_indexed} plates.")
+    finally:
+        session.close()
 
 def get_session():
     return Session()
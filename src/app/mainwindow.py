@@ -18,12 +18,14 @@ from .views.optimization_view import OptimizationView
 from .views.settings_view import SettingsView
 from .views.help_view import HelpView
 from .widgets.nav_bar import NavBar
+from .controllers.part_controller import PartController
+from .service.preview_service import PreviewService
 
 from .utils.clear_dir import clear_dir
 from .utils.settings_enum import DEFAULT_LANGUAGE, DEFAULT_UNITS
 
 from .database import init_db, teardown_db, get_session, close_session
-from ..paths import PART_PREVIEW_DIR, PLATE_PREVIEW_DIR, ROUTER_PREVIEW_DIR, ICON_PATH, USER_SETTINGS_PATH, TEMP_DIRS
+from ..paths import PART_PREVIEW_DIR, PART_CACHE_DIR, PREVIEW_CACHE_DIR, PLATE_PREVIEW_DIR, ROUTER_PREVIEW_DIR, ICON_PATH, USER_SETTINGS_PATH, TEMP_DIRS
 
 from .translations import main_window
 from .logging import logger
@@ -43,27 +45,30 @@ class MainWindow(QMainWindow):
         self.setMinimumSize(MIN_WIDTH, MIN_HEIGHT)
 
         self.setup_db()
+        self.clear_imported_parts()
+        self.preview_service = PreviewService()
 
         self.texts = main_window
 
         user_language = user_settings['language']
         user_units = user_settings['units']
 
+        ''' views are constructed on first navigation, only home view is created before window is shown '''
         views = {
             self.texts['home_button'][user_language]: \
-                HomeView(user_language),
+                lambda: HomeView(user_language),
             self.texts['part_button'][user_language]: \
-                PartView(self.session, PART_PREVIEW_DIR, user_language, user_units),
+                lambda: PartView(self.session, PART_PREVIEW_DIR, user_language, user_units, PART_CACHE_DIR),
             self.texts['stock_button'][user_language]: \
-                PlateView(self.session, PLATE_PREVIEW_DIR, user_language, user_units),
+                lambda: PlateView(self.session, PLATE_PREVIEW_DIR, user_language, user_units, PREVIEW_CACHE_DIR, self.preview_service),
             self.texts['router_button'][user_language]: \
-                RouterView(self.session, ROUTER_PREVIEW_DIR, user_language, user_units),
+                lambda: RouterView(self.session, ROUTER_PREVIEW_DIR, user_language, user_units, PREVIEW_CACHE_DIR, self.preview_service),
             self.texts['layout_button'][user_language]: \
-                OptimizationView(self.session, user_language, user_units),
+                lambda: OptimizationView(self.session, user_language, user_units),
             self.texts['settings_button'][user_language]: \
-                SettingsView(USER_SETTINGS_PATH, user_language),
+                lambda: SettingsView(USER_SETTINGS_PATH, user_language),
             self.texts['help_button'][user_language]: \
-                HelpView(user_language)
+                lambda: HelpView(user_language)
         }
 
         nav_bar = NavBar(views.keys())
@@ -92,9 +97,17 @@ class MainWindow(QMainWindow):
         except Exception as e:
             logger.error(f"Error initializing database: {e}")   
 
+    def clear_imported_parts(self):
+        """ Imported parts are only kept for a single session. """
+        try:
+            PartController(self.session, PART_PREVIEW_DIR).remove_all_with_previews()
+        except Exception as e:
+            logger.error(f"Error clearing imported parts: {e}")
+
     def closeEvent(self, event):
         """ Close application at exit. """
         try:
+            self.preview_service.shutdown(wait=False)
             if self.session:
                 close_session()
                 logger.debug("Database session closed.")
@@ -0,0 +1,33 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+from typing import NamedTuple
+from sqlalchemy import Column, String, Float, Integer, Text, Boolean
+from ..database import Base
+from .utils import get_uuid
+
+class LayoutJobConstants(NamedTuple):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    DEFAULT_PRIORITY = 10
+
+class LayoutJob(Base):
+    """
+    ORM model for layouts generated by the nesting job service.
+    Placements are stored as a JSON string mapping piece ids to (bin id, (x, y)) or null.
+    """
+    __tablename__ = 'layout_jobs'
+    id = Column(String, primary_key=True, default=get_uuid)
+    status = Column(String, nullable=False, default=LayoutJobConstants.STATUS_QUEUED)
+    priority = Column(Integer, nullable=False, default=LayoutJobConstants.DEFAULT_PRIORITY)
+    request = Column(Text, nullable=False)
+    placements = Column(Text, nullable=True, default=None)
+    preview_path = Column(String, nullable=True, default=None)
+    error = Column(Text, nullable=True, default=None)
+    committed = Column(Boolean, nullable=False, default=False)
+    created_at = Column(Float, nullable=False)
+    finished_at = Column(Float, nullable=True, default=None)
@@ -15,6 +15,7 @@ class PartConstants(NamedTuple):
 class Part(Base):
     """
     ORM part model.
+    Content hash identifies part geometry, used for detecting duplicate imports.
     """
     __tablename__ = 'parts'
     id = Column(String, primary_key=True, default=get_uuid)
@@ -23,3 +24,4 @@ class Part(Base):
     material = Column(String, nullable=False, default=PartConstants.DEFAULT_MATERIAL)
     contours = Column(Text, nullable=False)
     amount = Column(Integer, nullable=False, default=1)
+    content_hash = Column(String, nullable=True, default=None, index=True)
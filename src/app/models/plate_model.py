@@ -4,10 +4,17 @@ Date: 2024/05/31
 """
 
 import sys
-from typing import NamedTuple
-from sqlalchemy import Column, String, Float, Text, Boolean
+from typing import NamedTuple, Union, List, Dict, Tuple
+import numpy as np
+from sqlalchemy import Column, String, Float, Text, Boolean, Index, event, inspect, or_, and_
+from sqlalchemy.orm import Session, Query, defer
 from ..database import Base
-from .utils import get_uuid
+from .utils import get_uuid, serialize_array, deserialize_array, deserialize_array_list
+
+from ..utils.packing.free_space import get_free_rectangles, get_bounding_boxes, get_largest_rectangle
+from ..utils.packing.utils.rectangle2d import Rectangle2D
+
+from ..logging import logger
 
 class PlateConstants(NamedTuple):
     MAX_X = 5000
@@ -21,6 +28,8 @@ class PlateConstants(NamedTuple):
 class Plate(Base):
     """
     ORM plate model.
+    Normalized material, quantized thickness and free space summary (bounding boxes of existing contours, free rectangles,
+    largest free rectangle, free area) are kept in sync automatically and indexed for inventory queries.
     """
     __tablename__ = 'plates'
     id = Column(String, primary_key=True, default=get_uuid)
@@ -30,4 +39,160 @@ class Plate(Base):
     material = Column(String, nullable=False, default=PlateConstants.DEFAULT_MATERIAL)
     contours = Column(Text, nullable=True, default=None)
     selected = Column(Boolean, nullable=False, default=False)
-    
\ No newline at end of file
+    material_key = Column(String, nullable=True, default=None)
+    thickness_key = Column(Float, nullable=True, default=None)
+    usable_x = Column(Float, nullable=True, default=None)
+    usable_y = Column(Float, nullable=True, default=None)
+    occupied_boxes = Column(Text, nullable=True, default=None)
+    free_rectangles = Column(Text, nullable=True, default=None)
+    free_area = Column(Float, nullable=True, default=None)
+
+    __table_args__ = (
+        Index('ix_plates_stock', 'material_key', 'thickness_key', 'usable_x', 'usable_y'),
+        Index('ix_plates_size', 'x', 'y'),
+        Index('ix_plates_free_area', 'free_area'),
+    )
+
+def normalize_material(material: str) -> str:
+    """ Material name used for comparisons. """
+    return material.strip().lower()
+
+def quantize_thickness(thickness: float) -> float:
+    """ Thickness rounded to hundredths, used for comparisons. """
+    return round(thickness, 2)
+
+def update_plate_index(plate: Plate):
+    """ Recompute normalized material, quantized thickness, and free space summary of plate. """
+    material = plate.material if plate.material is not None else PlateConstants.DEFAULT_MATERIAL
+    thickness = plate.z if plate.z is not None else PlateConstants.DEFAULT_Z
+    plate.material_key = normalize_material(material)
+    plate.thickness_key = quantize_thickness(thickness)
+    _update_free_space(plate)
+
+def _update_free_space(plate: Plate):
+    """ Store bounding boxes of existing contours, free rectangles remaining around them, dimensions of the largest one, and total free area. """
+    x = plate.x if plate.x is not None else PlateConstants.DEFAULT_X
+    y = plate.y if plate.y is not None else PlateConstants.DEFAULT_Y
+    try:
+        contours = deserialize_array_list(plate.contours) if plate.contours else []
+        occupied_boxes = get_bounding_boxes(contours)
+        free_rectangles = get_free_rectangles(x, y, contours)
+    except (ValueError, TypeError) as e:
+        logger.debug(f"Could not compute free space of plate with id {plate.id}, using full plate: {e}")
+        occupied_boxes = []
+        free_rectangles = get_free_rectangles(x, y, [])
+
+    largest = get_largest_rectangle(free_rectangles)
+    plate.usable_x = largest.width if largest is not None else 0.0
+    plate.usable_y = largest.height if largest is not None else 0.0
+    plate.free_area = float(sum(rectangle.area for rectangle in free_rectangles))
+    plate.occupied_boxes = _serialize_rectangles(occupied_boxes)
+    plate.free_rectangles = _serialize_rectangles(free_rectangles)
+
+def _serialize_rectangles(rectangles: List[Rectangle2D]) -> str:
+    """ Serialize rectangles as (n, 4) array of min x, min y, width, height. """
+    return serialize_array(np.array([[r.min_x, r.min_y, r.width, r.height] for r in rectangles], dtype=float).reshape(-1, 4))
+
+def _deserialize_rectangles(serialized: Union[str, None]) -> List[Rectangle2D]:
+    """ Deserialize rectangles stored by _serialize_rectangles. Returns empty list if nothing is stored. """
+    rectangles = deserialize_array(serialized)
+    if rectangles is None:
+        return []
+    return [Rectangle2D(*[float(value) for value in rectangle]) for rectangle in rectangles]
+
+def index_plates(session: Session) -> int:
+    """ Compute inventory columns of plates stored before they were introduced. Returns amount of plates indexed. """
+    try:
+        unindexed_plates = session.query(Plate).filter((Plate.material_key == None) | (Plate.occupied_boxes == None)).all()
+        for plate in unindexed_plates:
+            update_plate_index(plate)
+        session.commit()
+        return len(unindexed_plates)
+    except Exception as e:
+        logger.error(f"Encountered error while attempting to index existing plates: {e}")
+        session.rollback()
+        return 0
+
+def get_plate_free_rectangles(plate: Plate) -> List[Rectangle2D]:
+    """ Get stored free rectangles of plate, computed from contours if no summary is stored. """
+    if plate.free_rectangles is None:
+        x = plate.x if plate.x is not None else PlateConstants.DEFAULT_X
+        y = plate.y if plate.y is not None else PlateConstants.DEFAULT_Y
+        return get_free_rectangles(x, y, deserialize_array_list(plate.contours) if plate.contours else [])
+    return _deserialize_rectangles(plate.free_rectangles)
+
+def decode_plate_contours(serialized_contours: Dict[str, Union[str, None]]) -> Dict[str, List[List[Tuple[float, float]]]]:
+    """ Decode serialized contours of plates by plate id into lists of points. Plates whose contours cannot be read get no contours. """
+    decoded = {}
+    for plate_id, serialized in serialized_contours.items():
+        contours = deserialize_array_list(serialized) if serialized else []
+        if contours is None:
+            logger.debug(f"Could not decode contours of plate with id {plate_id}")
+            contours = []
+        decoded[plate_id] = [[(float(x), float(y)) for x, y in np.asarray(contour).reshape(-1, 2)] for contour in contours]
+    return decoded
+
+def get_plate_occupied_boxes(plate: Plate) -> List[Rectangle2D]:
+    """ Get stored bounding boxes of existing contours of plate, computed from contours if no summary is stored. """
+    if plate.occupied_boxes is None:
+        return get_bounding_boxes(deserialize_array_list(plate.contours) if plate.contours else [])
+    return _deserialize_rectangles(plate.occupied_boxes)
+
+@event.listens_for(Plate, 'before_insert')
+def _index_new_plate(mapper, connection, plate: Plate):
+    update_plate_index(plate)
+
+@event.listens_for(Plate, 'before_update')
+def _index_modified_plate(mapper, connection, plate: Plate):
+    state = inspect(plate)
+    if state.attrs.material.history.has_changes() or state.attrs.z.history.has_changes():
+        plate.material_key = normalize_material(plate.material)
+        plate.thickness_key = quantize_thickness(plate.z)
+    if any(state.attrs[attr].history.has_changes() for attr in ('x', 'y', 'contours')) or plate.occupied_boxes is None:
+        _update_free_space(plate)
+
+def query_candidate_plates(
+    session: Session,
+    material: str,
+    thickness: float,
+    min_width: float = 0,
+    min_height: float = 0,
+    max_x: Union[float, None] = None,
+    max_y: Union[float, None] = None,
+    selected_only: bool = False
+) -> List[Plate]:
+    """
+    Get plates of given material and thickness with a free rectangle of at least min_width x min_height in either orientation,
+    whose dimensions do not exceed max_x x max_y.
+    Plates are pre-filtered in SQL using indexed columns and free area, stored free rectangles of the remaining ones are checked exactly.
+    Plates are ordered by free area, fullest first. Contours are not loaded unless accessed.
+    """
+    query = session.query(Plate).options(defer(Plate.contours)).filter(
+        Plate.material_key == normalize_material(material),
+        Plate.thickness_key == quantize_thickness(thickness)
+    )
+    needs_space = min_width > 0 or min_height > 0
+    if needs_space:
+        query = query.filter(
+            Plate.free_area >= min_width * min_height,
+            or_(
+                and_(Plate.x >= min_width, Plate.y >= min_height),
+                and_(Plate.x >= min_height, Plate.y >= min_width)
+            )
+        )
+    if max_x is not None:
+        query = query.filter(Plate.x <= max_x)
+    if max_y is not None:
+        query = query.filter(Plate.y <= max_y)
+    if selected_only:
+        query = query.filter(Plate.selected == True)
+
+    plates = query.order_by(Plate.free_area).all()
+    if needs_space:
+        plates = [plate for plate in plates if _has_free_rectangle(plate, min_width, min_height)]
+    return plates
+
+def _has_free_rectangle(plate: Plate, width: float, height: float) -> bool:
+    """ Check whether any stored free rectangle of plate fits width x height, rotated or not. """
+    container = Rectangle2D(0, 0, width, height)
+    return any(container.fits_inside(rectangle) or container.fits_inside_rotated(rectangle) for rectangle in get_plate_free_rectangles(plate))
@@ -6,6 +6,7 @@ Date: 2024/05/31
 import numpy as np
 import base64
 import uuid
+import zlib
 import io
 
 from ..logging import logger
@@ -97,9 +98,12 @@ def serialize_array_list(array_list: List[np.ndarray]) -> str:
 def deserialize_array_list(base64_str: str) -> List[np.ndarray]:
     """
     Deserialize base 64 SQL string back into a list of np arrays.
+    Strings written by serialize_contour_list are recognized by their prefix and decoded accordingly.
     """
     if base64_str is None:
         return None
+    if base64_str.startswith(COMPRESSED_CONTOURS_PREFIX):
+        return deserialize_contour_list(base64_str)
     try:
         serialized_arrays = base64_str.split(DELIMITER)
         array_list = [deserialize_array(arr_str) for arr_str in serialized_arrays]
@@ -107,4 +111,47 @@ def deserialize_array_list(base64_str: str) -> List[np.ndarray]:
     except Exception as e:
         logger.error(f"Error deserializing array list: {e}")
         return None
-    
\ No newline at end of file
+    
+''' not a base64 character, so compressed strings can never be mistaken for the delimited format '''
+COMPRESSED_CONTOURS_PREFIX = 'zc1:'
+
+def serialize_contour_list(contours: List[np.ndarray]) -> str:
+    """
+    Serialize list of integer contours in compressed form for storage in SQL.
+    Points of all contours are delta encoded as one sequence and deflated, so neighbouring points cost a few bits each.
+    Lossless, contours are read back by deserialize_array_list as Nx1x2 int32 arrays.
+    """
+    if contours is None:
+        return None
+    try:
+        contours = [np.asarray(contour) for contour in contours]
+        if not all(np.issubdtype(contour.dtype, np.integer) for contour in contours):
+            raise ValueError("contours must have integer coordinates")
+        points = np.concatenate([contour.reshape(-1, 2) for contour in contours]).astype(np.int64) if contours else np.empty((0, 2), dtype=np.int64)
+        ''' bounded so that differences between points also fit into int32 '''
+        if np.abs(points).max(initial=0) > np.iinfo(np.int32).max // 2:
+            raise ValueError("contour coordinates out of range")
+        deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+        header = np.array([len(contours)] + [contour.size // 2 for contour in contours], dtype='<i4')
+        binary_data = zlib.compress(header.tobytes() + deltas.astype('<i4').tobytes(), 9)
+        return COMPRESSED_CONTOURS_PREFIX + base64.b64encode(binary_data).decode('utf-8')
+    except Exception as e:
+        logger.error(f"Error serializing contour list: {e}")
+        return None
+
+def deserialize_contour_list(base64_str: str) -> List[np.ndarray]:
+    """
+    Deserialize compressed SQL string written by serialize_contour_list back into a list of Nx1x2 int32 contours.
+    """
+    if base64_str is None:
+        return None
+    try:
+        data = np.frombuffer(zlib.decompress(base64.b64decode(base64_str[len(COMPRESSED_CONTOURS_PREFIX):])), dtype='<i4')
+        amt_contours = int(data[0])
+        counts = data[1:1 + amt_contours]
+        ''' partial sums are the original coordinates, so accumulating in int32 cannot overflow '''
+        points = np.cumsum(data[1 + amt_contours:].reshape(-1, 2), axis=0, dtype=np.int32)
+        return [contour.reshape(-1, 1, 2) for contour in np.split(points, np.cumsum(counts)[:-1])] if amt_contours else []
+    except Exception as e:
+        logger.error(f"Error deserializing contour list: {e}")
+        return None
@@ -0,0 +1,211 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import os
+import csv
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple, Union, Tuple, List, Callable
+
+import numpy as np
+import cv2
+from sqlalchemy.orm import Session
+
+from ..models.plate_model import Plate, PlateConstants
+from ..models.utils import serialize_contour_list
+
+from ..controllers.image_editing_controller import ImageEditingController, SUPPORTED_IMAGE_FORMATS
+from ..utils.image_processing.binary_filter import BinaryFilter, ThresholdMethod
+from ..utils.image_processing.feature_extractor import FeatureExtractor
+from ..utils.image_processing.matrix_generator import MatrixGenerator
+from ..utils.image_processing.utils import Size
+
+from ..logging import logger
+
+class DigitizationTask(NamedTuple):
+    """ Photo of a plate to be digitized. """
+    image_path: str
+    plate_id: str
+
+class DigitizationResult(NamedTuple):
+    """ Outcome of digitizing one photo. Photos with an error need to be reviewed in the image editor. """
+    image_path: str
+    plate_id: str
+    contours: Union[List[np.ndarray], None] = None
+    threshold: Union[int, None] = None
+    error: Union[str, None] = None
+
+def digitize_photo(image_path: str, plate_size: Tuple[float, float]) -> Tuple[Union[List[np.ndarray], None], Union[int, None], Union[str, None]]:
+    """
+    Digitize plate photo the way the image editor would without user input. Runs inside a worker process.
+    Threshold methods are tried in order until exactly four plate corners are detected.
+    Returns (flattened contours simplified for storage, threshold, None) if successful, (None, None, reason for review) otherwise.
+    """
+    try:
+        image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        if image is None:
+            return None, None, "Unable to read image file."
+        image = ImageEditingController._resize_image(image, ImageEditingController.MAX_PROCESSING_SIZE)
+        size = Size(image.shape[1], image.shape[0])
+
+        blurred_image = BinaryFilter.get_blurred_grayscale(image)
+        pyramid = BinaryFilter.get_pyramid(blurred_image)
+        ''' same pyramid level the editor uses for threshold suggestions '''
+        suggestion_level = max([0] + [i for i, level in enumerate(pyramid) if level.shape[0] >= ImageEditingController.THRESHOLD_SUGGESTION_HEIGHT])
+
+        attempts = []
+        for method in ThresholdMethod:
+            threshold = BinaryFilter.suggest_threshold(pyramid[suggestion_level], method)
+            binary_image = BinaryFilter.apply_threshold(blurred_image, threshold)
+            features = FeatureExtractor(binary_image, size, refine_corners=True).features
+            if features.plate_contour is None:
+                attempts.append(f"{method.name.lower()} threshold {threshold}: no plate outline")
+                continue
+            if len(features.corners) != 4:
+                attempts.append(f"{method.name.lower()} threshold {threshold}: {len(features.corners)} corners")
+                continue
+            matrix = MatrixGenerator(Size(*plate_size), features.corners).matrix()
+            flattened_contours = MatrixGenerator.transform_contours(features.other_contours, matrix)
+            return MatrixGenerator.simplify_contours(flattened_contours), threshold, None
+
+        return None, None, f"Could not detect exactly four plate corners ({', '.join(attempts)})."
+    except Exception as e:
+        return None, None, f"Encountered exception while digitizing photo: {e}"
+
+class DigitizationService:
+    """
+    Headless batch digitization of plate photos.
+    Photos are thresholded automatically, features are extracted and flattened on a process pool,
+    and contours are written to the plates in the database. Photos where detection fails are returned for review.
+    ### Parameters:
+    - session: working session.
+    - workers: amount of worker processes.
+
+    ### Manifest format (csv with header):
+    - image: photo path, relative to manifest directory.
+    - plate_id: plate the photo shows. If empty, a new plate is created from x, y, z and material.
+    - x, y, z, material: dimensions and material of new plate.
+    """
+    DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+    def __init__(self, session: Session, workers: int = DEFAULT_WORKERS):
+        if workers < 1:
+            raise ValueError(f"Digitization service requires at least one worker, not {workers}")
+        self.session = session
+        self.workers = workers
+
+    '''
+    Task creation
+    '''
+    def tasks_from_folder(self, folder: str) -> List[DigitizationTask]:
+        """ Tasks for photos in folder whose file name, without extension, is the id of an existing plate. """
+        if not os.path.isdir(folder):
+            logger.error(f"Indicated photo folder does not exist: {folder}")
+            raise FileNotFoundError(f"Directory not found: {folder}")
+        tasks = []
+        for filename in sorted(os.listdir(folder)):
+            plate_id, extension = os.path.splitext(filename)
+            if extension.lower() not in SUPPORTED_IMAGE_FORMATS:
+                continue
+            if self.session.get(Plate, plate_id) is None:
+                logger.debug(f"Skipping photo without matching plate: {filename}")
+                continue
+            tasks.append(DigitizationTask(os.path.join(folder, filename), plate_id))
+        return tasks
+
+    def tasks_from_manifest(self, manifest_path: str) -> List[DigitizationTask]:
+        """ Tasks for rows of manifest file. Plates are created for rows without a plate id. """
+        if not os.path.exists(manifest_path):
+            logger.error(f"Indicated manifest file does not exist: {manifest_path}")
+            raise FileNotFoundError(f"File not found: {manifest_path}")
+        folder = os.path.dirname(os.path.abspath(manifest_path))
+        tasks = []
+        try:
+            with open(manifest_path, newline='') as manifest:
+                for row in csv.DictReader(manifest):
+                    plate_id = (row.get('plate_id') or '').strip()
+                    if not plate_id:
+                        plate_id = self._add_plate(row).id
+                    tasks.append(DigitizationTask(os.path.join(folder, row['image'].strip()), plate_id))
+            self.session.commit()
+        except (KeyError, ValueError) as e:
+            self.session.rollback()
+            logger.error(f"Invalid digitization manifest {manifest_path}: {e}")
+            raise ValueError(f"Invalid manifest: {e}")
+        return tasks
+
+    def _add_plate(self, row: dict) -> Plate:
+        """ Add plate with dimensions from manifest row to session. """
+        x, y, z = float(row['x']), float(row['y']), float(row['z'])
+        if not (0 < x <= PlateConstants.MAX_X and 0 < y <= PlateConstants.MAX_Y and 0 < z <= PlateConstants.MAX_Z):
+            raise ValueError(f"Plate dimensions out of range for {row['image']}: {x}, {y}, {z}")
+        plate = Plate(x=x, y=y, z=z, material=(row.get('material') or '').strip() or PlateConstants.DEFAULT_MATERIAL)
+        self.session.add(plate)
+        self.session.flush()
+        return plate
+
+    '''
+    Digitization
+    '''
+    def digitize(self, tasks: List[DigitizationTask], progress: Callable[[int, int], None] = None) -> List[DigitizationResult]:
+        """
+        Digitize photos in parallel and save contours of successful ones to their plates.
+        progress is called with (finished amount, total amount) after each photo.
+        Returns results in task order, results with an error form the review queue.
+        """
+        results: List[Union[DigitizationResult, None]] = [None] * len(tasks)
+        jobs = {}
+        for i, task in enumerate(tasks):
+            plate = self.session.get(Plate, task.plate_id)
+            if plate is None:
+                results[i] = DigitizationResult(task.image_path, task.plate_id, error="Plate does not exist.")
+            elif not os.path.exists(task.image_path):
+                results[i] = DigitizationResult(task.image_path, task.plate_id, error="Image file does not exist.")
+            else:
+                jobs[i] = (task.image_path, (plate.x, plate.y))
+
+        finished = len(tasks) - len(jobs)
+        if jobs:
+            ''' spawned workers do not inherit the database connection '''
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs)), mp_context=context) as pool:
+                futures = {pool.submit(digitize_photo, *args): i for i, args in jobs.items()}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        contours, threshold, error = future.result()
+                    except Exception as e:
+                        contours, threshold, error = None, None, f"Worker failed: {e}"
+                    results[i] = DigitizationResult(tasks[i].image_path, tasks[i].plate_id, contours, threshold, error)
+                    finished += 1
+                    if progress is not None:
+                        progress(finished, len(tasks))
+
+        self._save_contours([result for result in results if result.error is None])
+        logger.debug(f"Digitized {sum(result.error is None for result in results)} of {len(results)} photos.")
+        return results
+
+    def _save_contours(self, results: List[DigitizationResult]):
+        """ Write flattened contours to plates compressed, in a single commit. """
+        try:
+            for result in results:
+                self.session.get(Plate, result.plate_id).contours = serialize_contour_list(result.contours)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Encountered exception while saving digitized contours: {e}")
+            raise e
+
+    @staticmethod
+    def save_review_queue(results: List[DigitizationResult], path: str) -> int:
+        """ Write photos that need review to json file as list of {image, plate_id, reason}. Returns amount of photos. """
+        review = [
+            {'image': result.image_path, 'plate_id': result.plate_id, 'reason': result.error}
+            for result in results if result.error is not None
+        ]
+        with open(path, 'w') as file:
+            json.dump(review, file, indent=4)
+        return len(review)
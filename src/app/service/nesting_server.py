@@ -0,0 +1,144 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import json
+import asyncio
+from typing import Tuple, Union
+from http import HTTPStatus
+
+from .nesting_service import NestingService
+
+from ..logging import logger
+
+class NestingServer:
+    """
+    Minimal asyncio HTTP/1.1 front end for NestingService. Uses only the standard library so it runs fully offline.
+    ### Parameters:
+    - service: started nesting service.
+    - host: interface to bind to.
+    - port: port to listen on (0 picks a free port).
+
+    ### Endpoints:
+    - POST /jobs: submit job, returns {"id": ...} (202), 400 for invalid jobs, 503 if the queue is full.
+    - GET /jobs/<id>: job status and progress.
+    - GET /jobs/<id>/result: job placements.
+    - GET /health: queue size and worker amount.
+    """
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_PORT = 8765
+    MAX_BODY_SIZE = 16 * 1024 * 1024
+    MAX_HEADER_LINES = 100
+
+    def __init__(self, service: NestingService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.service = service
+        self.host = host
+        self.port = port
+        self._server: asyncio.AbstractServer = None
+
+    async def start(self):
+        """ Start listening. Updates port if a free port was requested. """
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.debug(f"Nesting server listening on {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        """ Serve requests until cancelled. """
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """ Stop accepting connections. """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """ Read a single request, route it, and write the JSON response. """
+        try:
+            request = await self._read_request(reader)
+            if request is None:
+                status, body = HTTPStatus.BAD_REQUEST, {'error': "Malformed HTTP request."}
+            else:
+                status, body = self.route(*request)
+        except Exception as e:
+            logger.error(f"Encountered exception while handling nesting server request: {e}")
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+        payload = json.dumps(body).encode('utf-8')
+        header = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: close\r\n\r\n"
+        ).encode('latin-1')
+        try:
+            writer.write(header + payload)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Union[Tuple[str, str, bytes], None]:
+        """ Parse request line, headers, and body. Returns None for malformed requests. """
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            return None
+        method, path, _ = parts
+
+        content_length = 0
+        for _ in range(self.MAX_HEADER_LINES):
+            line = (await reader.readline()).decode('latin-1').strip()
+            if line == "":
+                break
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                try:
+                    content_length = int(value.strip())
+                except ValueError:
+                    return None
+        else:
+            return None
+
+        if content_length < 0 or content_length > self.MAX_BODY_SIZE:
+            return None
+        body = await reader.readexactly(content_length) if content_length > 0 else b""
+        return method.upper(), path, body
+
+    def route(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, dict]:
+        """ Dispatch request to service. Returns HTTP status and JSON-serializable body. """
+        segments = [segment for segment in path.split('?')[0].split('/') if segment]
+
+        if segments == ['health'] and method == 'GET':
+            return HTTPStatus.OK, {'queued': self.service.get_queue_size(), 'workers': self.service.workers}
+
+        if segments == ['jobs'] and method == 'POST':
+            try:
+                request = json.loads(body.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                return HTTPStatus.BAD_REQUEST, {'error': "Request body must be valid JSON."}
+            try:
+                job = self.service.submit(request)
+            except ValueError as e:
+                return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+            except asyncio.QueueFull:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {'error': "Job queue is full."}
+            return HTTPStatus.ACCEPTED, {'id': job.id}
+
+        if len(segments) == 2 and segments[0] == 'jobs' and method == 'GET':
+            status = self.service.get_status(segments[1])
+            if status is None:
+                return HTTPStatus.NOT_FOUND, {'error': f"Job {segments[1]} does not exist."}
+            return HTTPStatus.OK, status
+
+        if len(segments) == 3 and segments[0] == 'jobs' and segments[2] == 'result' and method == 'GET':
+            result = self.service.get_result(segments[1])
+            if result is None:
+                return HTTPStatus.NOT_FOUND, {'error': f"Job {segments[1]} does not exist."}
+            return HTTPStatus.OK, result
+
+        return HTTPStatus.NOT_FOUND, {'error': f"No route for {method} {path}"}
@@ -0,0 +1,405 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Union, Tuple, List, Dict
+
+from sqlalchemy.orm import Session, defer
+
+from ..models.router_model import Router
+from ..models.plate_model import Plate, query_candidate_plates, normalize_material, quantize_thickness, decode_plate_contours
+from ..models.layout_model import LayoutJob, LayoutJobConstants
+
+from ..controllers.optimization_controller import OptimizationController
+from ..utils.packing.packing_algo import execute_packing_algorithm
+
+from ..logging import logger
+
+def run_packing_job(job_id: str, packing_input: tuple, preview_path: str, conversion_factor: float, progress, plate_contours: Dict[str, Union[str, None]] = None) -> dict:
+    """
+    Execute packing algorithm for a single job. Runs inside a worker process.
+    Progress is reported through a shared dict keyed by job id.
+    Serialized plate contours by plate id are only decoded for plates drawn in the preview.
+    """
+    bins, pieces, bit_diameter, edge_distance = packing_input
+
+    def report_progress(fraction: float):
+        progress[job_id] = fraction
+
+    return execute_packing_algorithm(
+        bins,
+        pieces,
+        bit_diameter,
+        edge_distance,
+        preview_path,
+        conversion_factor,
+        report_progress,
+        contour_loader=lambda plate_ids: decode_plate_contours({plate_id: (plate_contours or {}).get(plate_id) for plate_id in plate_ids})
+    )
+
+class _PendingJob:
+    """ In-memory data for a job that has been accepted but not yet finished. """
+    def __init__(self, packing_input: tuple, part_contours: dict, plate_contours: Dict[str, Union[str, None]], commit: bool):
+        self.packing_input = packing_input
+        self.part_contours = part_contours
+        self.plate_contours = plate_contours
+        self.plate_hashes = {plate_id: NestingService._hash_contours(contours) for plate_id, contours in plate_contours.items()}
+        self.commit = commit
+
+class NestingService:
+    """
+    Local nesting job service. Jobs are validated against the database, stored as LayoutJob rows,
+    queued in a bounded priority queue and executed on a process pool.
+    ### Parameters:
+    - session: working session.
+    - preview_directory: directory for storing layout previews.
+    - workers: amount of worker processes.
+    - max_queue_size: maximum amount of jobs waiting in queue.
+    - conversion_factor: conversion factor used for layout previews.
+
+    ### Job request format (dict):
+    - parts: list of {"id": str, "contour": [[x, y], ...], "amount": int}
+    - material, thickness: stock used for the job.
+    - plate_ids (optional): plates to nest on. Defaults to all plates of matching material and thickness.
+    - router_ids (optional): routers to use. Defaults to selected routers.
+    - priority (optional): lower values are executed first.
+    - commit (optional): append placed parts to plate contours once the job completes.
+    """
+    DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+    DEFAULT_MAX_QUEUE_SIZE = 64
+
+    def __init__(
+        self,
+        session: Session,
+        preview_directory: str,
+        workers: int = DEFAULT_WORKERS,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        conversion_factor: float = 1.0
+    ):
+        if not os.path.exists(preview_directory):
+            logger.error(f"Indicated nesting service preview directory does not exist: {preview_directory}")
+            raise FileNotFoundError(f"Directory not found: {preview_directory}")
+        if workers < 1:
+            raise ValueError(f"Nesting service requires at least one worker, not {workers}")
+        if max_queue_size < 1:
+            raise ValueError(f"Nesting service queue size must be positive, not {max_queue_size}")
+
+        self.session = session
+        self.preview_directory = preview_directory
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.conversion_factor = conversion_factor
+
+        self._queue: asyncio.PriorityQueue = None
+        self._pool: ProcessPoolExecutor = None
+        self._manager = None
+        self._progress = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._pending: Dict[str, _PendingJob] = {}
+        self._sequence = itertools.count()
+
+    '''
+    Service lifecycle
+    '''
+    async def start(self):
+        """ Create queue, process pool, and worker tasks. Must be called from a running event loop. """
+        self._fail_interrupted_jobs()
+        self._queue = asyncio.PriorityQueue(maxsize=self.max_queue_size)
+        ''' spawned workers do not inherit open client sockets from the event loop '''
+        context = multiprocessing.get_context('spawn')
+        self._manager = context.Manager()
+        self._progress = self._manager.dict()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.debug(f"Nesting service started with {self.workers} workers.")
+
+    async def stop(self):
+        """ Cancel worker tasks and shut down process pool. """
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        logger.debug("Nesting service stopped.")
+
+    def _fail_interrupted_jobs(self):
+        """ Mark jobs left queued or running by a previous service instance as failed. """
+        try:
+            interrupted = self.session.query(LayoutJob).filter(
+                LayoutJob.status.in_([LayoutJobConstants.STATUS_QUEUED, LayoutJobConstants.STATUS_RUNNING])
+            ).all()
+            for job in interrupted:
+                job.status = LayoutJobConstants.STATUS_FAILED
+                job.error = "Service was restarted before job completed."
+                job.finished_at = time.time()
+            self.session.commit()
+        except Exception as e:
+            logger.error(f"Encountered exception while updating interrupted jobs: {e}")
+            self.session.rollback()
+
+    '''
+    Job submission
+    '''
+    def submit(self, request: dict) -> LayoutJob:
+        """
+        Validate job request and add it to the queue.
+        Raises ValueError for invalid requests and asyncio.QueueFull if the queue is at capacity.
+        """
+        if self._queue is None:
+            raise RuntimeError("Nesting service has not been started.")
+        if self._queue.full():
+            raise asyncio.QueueFull()
+
+        priority, pending = self._parse_request(request)
+
+        job = LayoutJob(
+            status=LayoutJobConstants.STATUS_QUEUED,
+            priority=priority,
+            request=json.dumps(request),
+            created_at=time.time()
+        )
+        try:
+            self.session.add(job)
+            self.session.commit()
+        except Exception as e:
+            logger.error(f"Encountered exception while storing nesting job: {e}")
+            self.session.rollback()
+            raise
+
+        self._pending[job.id] = pending
+        self._queue.put_nowait((priority, next(self._sequence), job.id))
+        logger.debug(f"Queued nesting job {job.id} with priority {priority}.")
+        return job
+
+    def _parse_request(self, request: dict) -> Tuple[int, _PendingJob]:
+        """ Validate job request and build packing input from current database state. """
+        if not isinstance(request, dict):
+            raise ValueError("Job request must be a JSON object.")
+
+        priority = request.get('priority', LayoutJobConstants.DEFAULT_PRIORITY)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ValueError("Job priority must be an integer.")
+
+        commit = request.get('commit', False)
+        if not isinstance(commit, bool):
+            raise ValueError("Job commit flag must be a boolean.")
+
+        material = request.get('material')
+        thickness = request.get('thickness')
+        if not isinstance(material, str) or material.strip() == "":
+            raise ValueError("Job material must be a non-empty string.")
+        if not isinstance(thickness, (int, float)) or isinstance(thickness, bool) or thickness <= 0:
+            raise ValueError("Job thickness must be a positive number.")
+
+        parts = NestingService._parse_parts(request.get('parts'))
+        routers = self._get_routers(request.get('router_ids'))
+        plates = self._get_plates(request.get('plate_ids'), material, float(thickness), routers)
+
+        packing_input = OptimizationController.get_packing_input(routers, plates, parts)
+        part_contours = {part_id: contour for part_id, contour, _ in parts}
+        ''' serialized contours are loaded in one query, for the preview and for detecting plates modified while the job runs '''
+        plate_contours = dict(self.session.query(Plate.id, Plate.contours).filter(Plate.id.in_([bin[0] for bin in packing_input[0]])).all())
+        return priority, _PendingJob(packing_input, part_contours, plate_contours, commit)
+
+    @staticmethod
+    def _parse_parts(parts: list) -> List[Tuple[str, List[Tuple[float, float]], int]]:
+        """ Convert requested parts to (id, contour, amount) tuples. """
+        if not isinstance(parts, list) or len(parts) == 0:
+            raise ValueError("Job must contain a non-empty list of parts.")
+
+        parsed = []
+        for part in parts:
+            if not isinstance(part, dict):
+                raise ValueError("Each part must be a JSON object.")
+            part_id = part.get('id')
+            amount = part.get('amount', 1)
+            contour = part.get('contour')
+            if not isinstance(part_id, str) or part_id == "" or OptimizationController.ID_AMOUNT_DELIMITER in part_id:
+                raise ValueError(f"Invalid part id: {part_id}")
+            if 'edge' in part_id or 'ctr' in part_id:
+                raise ValueError(f"Part id {part_id} may not contain reserved substrings 'edge' or 'ctr'.")
+            if not isinstance(amount, int) or isinstance(amount, bool) or amount < 1:
+                raise ValueError(f"Invalid amount for part {part_id}: {amount}")
+            if not isinstance(contour, list) or len(contour) < 3:
+                raise ValueError(f"Contour of part {part_id} must contain at least three points.")
+            try:
+                formatted_contour = [(float(point[0]), float(point[1])) for point in contour]
+            except (TypeError, ValueError, IndexError):
+                raise ValueError(f"Contour of part {part_id} must be a list of [x, y] points.")
+            parsed.append((part_id, formatted_contour, amount))
+        return parsed
+
+    def _get_routers(self, router_ids: Union[list, None]) -> List[Router]:
+        """ Get requested routers, or selected routers if none are requested. """
+        if router_ids is None:
+            routers = self.session.query(Router).filter(Router.selected == True).all()
+        else:
+            if not isinstance(router_ids, list):
+                raise ValueError("Router ids must be a list.")
+            routers = self.session.query(Router).filter(Router.id.in_(router_ids)).all()
+            if len(routers) != len(set(router_ids)):
+                raise ValueError("One or more requested routers do not exist.")
+        if len(routers) == 0:
+            raise ValueError("No routers selected.")
+        return routers
+
+    def _get_plates(self, plate_ids: Union[list, None], material: str, thickness: float, routers: List[Router]) -> List[Plate]:
+        """ Get requested plates, or all plates of matching material and thickness that fit the routers if none are requested. """
+        if plate_ids is None:
+            max_x = min(router.plate_x for router in routers)
+            max_y = min(router.plate_y for router in routers)
+            plates = query_candidate_plates(self.session, material, thickness, max_x=max_x, max_y=max_y)
+            if len(plates) == 0:
+                raise ValueError("No plates of matching material and thickness fit the selected routers.")
+            return plates
+
+        if not isinstance(plate_ids, list):
+            raise ValueError("Plate ids must be a list.")
+        plates = self.session.query(Plate).options(defer(Plate.contours)).filter(Plate.id.in_(plate_ids)).all()
+        if len(plates) != len(set(plate_ids)):
+            raise ValueError("One or more requested plates do not exist.")
+
+        material_key, thickness_key = normalize_material(material), quantize_thickness(thickness)
+        if any(plate.material_key != material_key or plate.thickness_key != thickness_key for plate in plates):
+            raise ValueError("Requested plates must match job material and thickness.")
+        return plates
+
+    @staticmethod
+    def _hash_contours(contours: Union[str, None]) -> str:
+        """ Hash of serialized plate contours, used to detect plates modified while a job was running. """
+        return hashlib.sha1((contours or "").encode('utf-8')).hexdigest()
+
+    '''
+    Job execution
+    '''
+    async def _worker(self):
+        """ Consume jobs from queue and execute them on the process pool. """
+        while True:
+            _, _, job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except Exception as e:
+                logger.error(f"Encountered exception while running nesting job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str):
+        """ Run a single job and store its result. """
+        job = self.session.query(LayoutJob).filter(LayoutJob.id == job_id).first()
+        pending = self._pending.pop(job_id, None)
+        if job is None or pending is None:
+            logger.error(f"Attempted to run unknown nesting job {job_id}")
+            return
+
+        job.status = LayoutJobConstants.STATUS_RUNNING
+        job.preview_path = os.path.join(self.preview_directory, f"{job_id}.png")
+        self.session.commit()
+        self._progress[job_id] = 0.0
+
+        loop = asyncio.get_running_loop()
+        try:
+            placements = await loop.run_in_executor(
+                self._pool,
+                run_packing_job,
+                job_id,
+                pending.packing_input,
+                job.preview_path,
+                self.conversion_factor,
+                self._progress,
+                pending.plate_contours
+            )
+        except Exception as e:
+            logger.error(f"Nesting job {job_id} failed: {e}")
+            job.status = LayoutJobConstants.STATUS_FAILED
+            job.error = str(e)
+            job.finished_at = time.time()
+            self.session.commit()
+            return
+        finally:
+            self._progress.pop(job_id, None)
+
+        job.placements = json.dumps(placements)
+        job.status = LayoutJobConstants.STATUS_COMPLETED
+        job.finished_at = time.time()
+        self.session.commit()
+
+        if pending.commit:
+            self._commit_placements(job, placements, pending)
+        logger.debug(f"Nesting job {job_id} completed.")
+
+    def _commit_placements(self, job: LayoutJob, placements: dict, pending: _PendingJob):
+        """ Append placed parts to plate contours unless a used plate was modified after job submission. """
+        used_bins = {placement[0] for piece_id, placement in placements.items() if placement is not None}
+        for plate in self.session.query(Plate).filter(Plate.id.in_(used_bins)).all():
+            if NestingService._hash_contours(plate.contours) != pending.plate_hashes.get(plate.id):
+                job.error = f"Plate {plate.id} was modified after job submission; layout was not committed."
+                self.session.commit()
+                logger.warning(job.error)
+                return
+        try:
+            OptimizationController.save_placements(self.session, placements, pending.part_contours)
+            job.committed = True
+            self.session.commit()
+        except Exception as e:
+            logger.error(f"Encountered exception while committing layout of job {job.id}: {e}")
+            self.session.rollback()
+            job.error = f"Failed to commit layout: {e}"
+            self.session.commit()
+
+    '''
+    Job queries
+    '''
+    def get_status(self, job_id: str) -> Union[dict, None]:
+        """ Get job status and progress. Returns None if job does not exist. """
+        job = self.session.query(LayoutJob).filter(LayoutJob.id == job_id).first()
+        if job is None:
+            return None
+        if job.status == LayoutJobConstants.STATUS_COMPLETED:
+            progress = 1.0
+        elif job.status == LayoutJobConstants.STATUS_RUNNING and self._progress is not None:
+            progress = self._progress.get(job_id, 0.0)
+        else:
+            progress = 0.0
+        return {
+            'id': job.id,
+            'status': job.status,
+            'priority': job.priority,
+            'progress': progress,
+            'committed': job.committed,
+            'error': job.error,
+            'created_at': job.created_at,
+            'finished_at': job.finished_at
+        }
+
+    def get_result(self, job_id: str) -> Union[dict, None]:
+        """ Get placements of a finished job. Returns None if job does not exist. """
+        job = self.session.query(LayoutJob).filter(LayoutJob.id == job_id).first()
+        if job is None:
+            return None
+        placements = json.loads(job.placements) if job.placements is not None else None
+        return {
+            'id': job.id,
+            'status': job.status,
+            'placements': placements,
+            'preview_path': job.preview_path,
+            'committed': job.committed,
+            'error': job.error
+        }
+
+    def get_queue_size(self) -> int:
+        """ Get amount of jobs waiting in queue. """
+        return self._queue.qsize() if self._queue is not None else 0
@@ -0,0 +1,106 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import os
+import pickle
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Union, List, Dict, Callable
+
+from ..utils.plotting_util import PreviewJob
+from ..logging import logger
+
+''' called with (image path, error message or None) '''
+PreviewCallback = Callable[[str, Union[str, None]], None]
+
+def render_preview_job(job: PreviewJob, dst_path: str) -> str:
+    """ Render single preview job. Runs inside a worker process. """
+    return job.render(dst_path)
+
+class PreviewService:
+    """
+    Renders preview jobs on a small process pool.
+    Identical requests for the same image path that are still in flight are rendered once, all of their callbacks are called.
+    Callbacks are called from a pool management thread, Qt receivers should be notified through signals.
+    ### Parameters:
+    - workers: amount of worker processes. Worker processes are started on first submitted job.
+    """
+    DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        if workers < 1:
+            raise ValueError(f"Attempted to create preview service with invalid amount of workers: {workers}")
+        ''' spawned workers do not inherit the Qt application or database connections '''
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        self._lock = threading.Condition()
+        self._in_flight: Dict[str, List[PreviewCallback]] = {}
+        ''' submitted jobs whose callbacks have not finished yet '''
+        self._pending = 0
+
+    def submit(self, job: PreviewJob, dst_path: str, callback: PreviewCallback = None) -> str:
+        """
+        Render job to dst_path in a worker process. Returns request key.
+        Job is not submitted again if an identical request is already in flight.
+        """
+        key = hashlib.sha256(pickle.dumps((dst_path, job))).hexdigest()
+        with self._lock:
+            if key in self._in_flight:
+                if callback is not None:
+                    self._in_flight[key].append(callback)
+                logger.debug(f"Preview request for {dst_path} already in flight.")
+                return key
+            try:
+                future = self._pool.submit(render_preview_job, job, dst_path)
+            except Exception as e:
+                logger.error(f"Encountered error while submitting preview {dst_path}: {e}")
+                future = None
+            else:
+                self._in_flight[key] = [callback] if callback is not None else []
+                self._pending += 1
+        if future is None:
+            if callback is not None:
+                callback(dst_path, "Preview service is not available.")
+            return key
+        future.add_done_callback(lambda future: self._on_done(key, dst_path, future))
+        return key
+
+    def get_pending_amount(self) -> int:
+        """ Amount of requests in flight. """
+        with self._lock:
+            return len(self._in_flight)
+
+    def wait(self, timeout: float = None) -> bool:
+        """ Wait until all submitted requests are done and their callbacks have been called. Returns False on timeout. """
+        with self._lock:
+            return self._lock.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self, wait: bool = True):
+        """ Stop worker processes. Requests that have not started are cancelled. """
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _on_done(self, key: str, dst_path: str, future: Future):
+        with self._lock:
+            callbacks = self._in_flight.pop(key, [])
+        try:
+            if not future.cancelled():
+                self._call_callbacks(callbacks, dst_path, future)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._lock.notify_all()
+
+    def _call_callbacks(self, callbacks: List[PreviewCallback], dst_path: str, future: Future):
+        error = None
+        exception = future.exception()
+        if exception is not None:
+            error = str(exception)
+            logger.error(f"Encountered error while rendering preview {dst_path}: {exception}")
+        for callback in callbacks:
+            try:
+                callback(dst_path, error)
+            except Exception as e:
+                logger.error(f"Encountered error in preview callback for {dst_path}: {e}")
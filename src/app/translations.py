@@ -122,6 +122,22 @@ part_view = {
         LanguageEnum.RUS.value: "Импортировать детали: ",  
         LanguageEnum.JP.value: "部品をインポートする： "     
     },
+    'folder_button_text': {
+        LanguageEnum.ENG_UK.value: "Import Folder",
+        LanguageEnum.ENG_US.value: "Import Folder",
+        LanguageEnum.CN_TRAD.value: "導入文件夾",  
+        LanguageEnum.CN_SIMP.value: "导入文件夹",  
+        LanguageEnum.RUS.value: "Импортировать папку",  
+        LanguageEnum.JP.value: "フォルダをインポートする"     
+    },
+    'import_progress_text': {
+        LanguageEnum.ENG_UK.value: "Importing: ",
+        LanguageEnum.ENG_US.value: "Importing: ",
+        LanguageEnum.CN_TRAD.value: "正在導入：",  
+        LanguageEnum.CN_SIMP.value: "正在导入：",  
+        LanguageEnum.RUS.value: "Импорт: ",  
+        LanguageEnum.JP.value: "インポート中： "     
+    },
 }
 
 part_widget = {
@@ -427,6 +443,14 @@ image_threshold_widget = {
         LanguageEnum.CN_SIMP.value: "保存结果",
         LanguageEnum.RUS.value: "Сохранить результат",
         LanguageEnum.JP.value: "結果を保存"
+    },
+    'auto_button': {
+        LanguageEnum.ENG_UK.value: "Auto Threshold",
+        LanguageEnum.ENG_US.value: "Auto Threshold",
+        LanguageEnum.CN_TRAD.value: "自動閾值",
+        LanguageEnum.CN_SIMP.value: "自动阈值",
+        LanguageEnum.RUS.value: "Автоматический порог",
+        LanguageEnum.JP.value: "自動しきい値"
     }
 }
 
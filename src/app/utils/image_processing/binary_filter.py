@@ -4,6 +4,7 @@ Date: 2024/04/15
 """
 
 import os
+import enum
 import numpy as np
 import cv2
 from typing import Tuple, List
@@ -13,6 +14,16 @@ from .constants import SUPPORTED_IMAGE_FORMATS
 
 from ...logging import logger
 
+BLUR_KERNEL_SIZE = (7, 7)
+OPENING_KERNEL_SIZE = 10
+OPENING_KERNEL = np.ones((OPENING_KERNEL_SIZE, OPENING_KERNEL_SIZE), np.uint8)
+MIN_PYRAMID_HEIGHT = 64
+
+class ThresholdMethod(enum.Enum):
+    """ Automatic threshold selection methods. Otsu suits bimodal histograms, triangle suits a dominant background. """
+    OTSU = cv2.THRESH_OTSU
+    TRIANGLE = cv2.THRESH_TRIANGLE
+
 class BinaryFilter:
     """
     Filter for converting color image to thresholded binary. Assumes valid src and dst paths.
@@ -60,8 +71,37 @@ class BinaryFilter:
         """
         Applies CV binary filter after preprocessing using Gaussian blur.
         """
-        image = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY) 
-        image = cv2.GaussianBlur(image, (7, 7), 0)
-        _, image = cv2.threshold(image, self.threshold, 255, cv2.THRESH_BINARY) 
-        image = cv2.morphologyEx(image, cv2.MORPH_OPEN, np.ones((10, 10), np.uint8))
-        self.image = image
+        self.image = BinaryFilter.apply_threshold(BinaryFilter.get_blurred_grayscale(self.image), self.threshold)
+
+    @staticmethod
+    def get_blurred_grayscale(image: np.ndarray) -> np.ndarray:
+        """ 
+        Threshold-independent preprocessing stage: grayscale conversion and Gaussian blur. 
+        Result can be kept and thresholded repeatedly with apply_threshold.
+        """
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) 
+        return cv2.GaussianBlur(image, BLUR_KERNEL_SIZE, 0)
+
+    @staticmethod
+    def apply_threshold(blurred_image: np.ndarray, threshold: int, scale: float = 1.0) -> np.ndarray:
+        """ 
+        Threshold preprocessed grayscale image and remove noise with morphological opening. Returns new binary image.
+        Scale is the resolution of the image relative to full resolution, opening kernel is scaled accordingly.
+        """
+        _, image = cv2.threshold(blurred_image, threshold, 255, cv2.THRESH_BINARY) 
+        kernel = OPENING_KERNEL if scale == 1.0 else np.ones((max(1, round(OPENING_KERNEL_SIZE * scale)),) * 2, np.uint8)
+        return cv2.morphologyEx(image, cv2.MORPH_OPEN, kernel, dst=image)
+
+    @staticmethod
+    def get_pyramid(image: np.ndarray, min_height: int = MIN_PYRAMID_HEIGHT) -> List[np.ndarray]:
+        """ Image pyramid starting with given image, each level half the resolution of the previous one. """
+        pyramid = [image]
+        while pyramid[-1].shape[0] // 2 >= min_height and pyramid[-1].shape[1] // 2 > 0:
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+
+    @staticmethod
+    def suggest_threshold(blurred_image: np.ndarray, method: ThresholdMethod = ThresholdMethod.OTSU) -> int:
+        """ Threshold value chosen automatically from the histogram of a preprocessed grayscale image. """
+        threshold, _ = cv2.threshold(blurred_image, 0, 255, cv2.THRESH_BINARY | method.value)
+        return int(threshold)
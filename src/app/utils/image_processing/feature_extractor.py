@@ -19,8 +19,9 @@ class FeatureExtractor:
     Class for retrieving critical features from plate image. Saves features in Features class as an attribute. Extracts features when initialized.
 
     ### Parameters:
-    - src_path: Source image filepath.
+    - src: Source image filepath, or binary image array.
     - size: Size of image.    
+    - refine_corners: If True, corners are replaced by vertices of the plate contour simplified to a quadrilateral when possible.
 
     ### Attributes:
     - features: Found features. Corners are of type numpy.cint
@@ -35,17 +36,21 @@ class FeatureExtractor:
     MIN_CORNER_ANGLE = 60
     MIN_CORNER_SEPARATION = 1000
 
-    def __init__(self, src_path: str, size: Size):
+    def __init__(self, src: Union[str, np.ndarray], size: Size, refine_corners: bool = False):
         self.features: Features
+        self.refine_corners = refine_corners
 
-        if not os.path.exists(src_path):
-            raise FileNotFoundError(f"File '{src_path}' not found.")
+        if isinstance(src, np.ndarray):
+            if src.ndim != 2 or src.dtype != np.uint8:
+                raise ValueError("Image array must be single channel uint8.")
+        elif not os.path.exists(src):
+            raise FileNotFoundError(f"File '{src}' not found.")
         if size.w <= 0 or size.h <= 0:
             raise ValueError("Size dimensions must be positive values.")
 
-        image = cv2.imread(src_path, cv2.IMREAD_GRAYSCALE)
+        image = src if isinstance(src, np.ndarray) else cv2.imread(src, cv2.IMREAD_GRAYSCALE)
         if image is None:
-            raise ValueError(f"Unable to read image file '{src_path}'.")
+            raise ValueError(f"Unable to read image file '{src}'.")
 
         max_contour, other_contours = self._get_contours(image, size)
         corners = self._get_corners(max_contour) if max_contour is not None else None
@@ -55,48 +60,63 @@ class FeatureExtractor:
     def _get_contours(self, image, size: Size) -> Tuple[np.array, List[np.array]]:
         """
         Finds contours that exceed area threshold and are a certain threshold away from the edge of the image. 
+        The largest such contour is the plate outline. Contour hierarchy is used to keep only contours nested inside the plate outline,
+        i.e. holes, cutouts and anything inside them, contours of objects outside the plate are discarded.
         """
-        contours, _ = cv2.findContours(image, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)
-        filtered_contours: List[np.array] = []
+        contours, hierarchy = cv2.findContours(image, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)
+        if not contours:
+            return (None, None)
 
-        for contour in contours:
-            area: float = cv2.contourArea(contour)
+        ''' hierarchy rows are [next, previous, first child, parent] '''
+        parents = hierarchy[0][:, 3]
 
-            if area < self.MIN_CTR_AREA:
-                continue
+        ''' a closed pixel contour of n points encloses at most n^2 / 2pi, smaller contours are skipped without computing area '''
+        lengths = np.fromiter(map(len, contours), dtype=np.int64, count=len(contours))
+        min_length = math.sqrt(2 * math.pi * self.MIN_CTR_AREA)
+        areas = {i: cv2.contourArea(contours[i]) for i in np.flatnonzero(lengths >= min_length)}
 
-            edge_flag = False
+        epsilon: float = self.MIN_CTR_DIST_FROM_EDGE
+        filtered_indices: List[int] = []
 
-            for point in contour:
-                x, y = point[0] # points stored as [[x, y]]
+        for i, area in areas.items():
+            if area < self.MIN_CTR_AREA:
+                continue
 
-                epsilon: float = self.MIN_CTR_DIST_FROM_EDGE
+            x, y, w, h = cv2.boundingRect(contours[i])
+            edge_flag = x < epsilon or x + w - 1 > size.w - epsilon or y < epsilon or y + h - 1 > size.h - epsilon
 
-                if x < epsilon or x > size.w - epsilon or y < epsilon or y > size.h - epsilon:
-                    edge_flag = True
-                    break
-        
             if edge_flag and area < size.w * size.h // 4: # checks size in case plate is close to edge
                 continue
 
-            filtered_contours.append(contour)
+            filtered_indices.append(i)
 
-        if not filtered_contours:
+        if not filtered_indices:
             return (None, None)
-        
-        areas = [cv2.contourArea(contour) for contour in filtered_contours]
-        max_area_idx = areas.index(max(areas))
-        max_contour = filtered_contours.pop(max_area_idx)
-        other_contours = filtered_contours
+
+        max_contour_idx = max(filtered_indices, key=lambda i: areas[i])
+        other_contours = [contours[i] for i in filtered_indices if self._is_descendant(parents, i, max_contour_idx)]
 
         if len(other_contours) == 0:
             other_contours = None
 
-        return max_contour, other_contours
+        return contours[max_contour_idx], other_contours
+
+    @staticmethod
+    def _is_descendant(parents: np.ndarray, idx: int, ancestor_idx: int) -> bool:
+        """ Check whether contour is nested inside ancestor contour using parent indices from contour hierarchy. """
+        idx = parents[idx]
+        while idx != -1:
+            if idx == ancestor_idx:
+                return True
+            idx = parents[idx]
+        return False
 
     def _get_corners(self, max_contour: np.ndarray) -> List[Tuple[float, float]]:
         """
-        Finds plate corners using derivatives and norm product.
+        Finds plate corners using turning angle between contour segments of length CORNER_DIST_DELTA.
+        Each run of consecutive points turning more than MIN_CORNER_ANGLE is reduced to its sharpest point (non-maximum suppression),
+        corners closer than MIN_CORNER_SEPARATION to the previously kept corner are discarded.
+        If corner refinement is enabled and the contour simplifies to a quadrilateral, its vertices are returned instead.
 
         Arguments:
         - max_contour: Plate contour.
@@ -104,41 +124,64 @@ class FeatureExtractor:
         Returns:
         - List of found corners stored as tuples of floats.
         """
-        corners: List[Tuple[float, float]] = []
-        length = len(max_contour)
-
-        for i, point in enumerate(max_contour):
+        points = max_contour.reshape(-1, 2)
+        angles = self._get_turning_angles(points, self.CORNER_DIST_DELTA)
 
-            delta: int = self.CORNER_DIST_DELTA
-
-            prev_idx: int = (i - delta) % length 
-            next_idx: int = (i + delta) % length
-
-            x_prev, y_prev = max_contour[prev_idx][0]
-            x, y = point[0]
-            x_next, y_next = max_contour[next_idx][0]
-            
-            dx1, dy1 = x - x_prev, y - y_prev
-            dx2, dy2 = x_next - x, y_next - y
-
-            dot_product = dx1 * dx2 + dy1 * dy2
-            norm_product = np.sqrt((dx1 ** 2 + dy1 ** 2) * (dx2 ** 2 + dy2 ** 2))
-
-            if norm_product == 0:
-                angle = 0
-            else:
-                cos_theta = max(min(dot_product / norm_product, 1.0), -1.0) # ensures valid range
-                angle = np.arccos(cos_theta) * (180.0 / np.pi)
-
-            if angle > self.MIN_CORNER_ANGLE:
-                corners.append((x, y))
-
-        filtered_corners = [corners[0]]  
-
-        for i in range(1, len(corners)):
-            distance = ((corners[i][0] - filtered_corners[-1][0]) ** 2 + (corners[i][1] - filtered_corners[-1][1]) ** 2) ** 0.5 
-            if distance > self.MIN_CORNER_SEPARATION:
-                filtered_corners.append(corners[i])
-
-        return filtered_corners
-    
\ No newline at end of file
+        corners: List[Tuple[float, float]] = []
+        for i in self._get_angle_peaks(angles, self.MIN_CORNER_ANGLE):
+            x, y = points[i]
+            if corners and math.hypot(x - corners[-1][0], y - corners[-1][1]) <= self.MIN_CORNER_SEPARATION:
+                continue
+            corners.append((x, y))
+
+        if self.refine_corners:
+            quadrilateral = self._get_quadrilateral(max_contour)
+            if quadrilateral is not None:
+                return [(x, y) for x, y in quadrilateral]
+
+        return corners
+
+    @staticmethod
+    def _get_turning_angles(points: np.ndarray, delta: int) -> np.ndarray:
+        """ Angle in degrees between (point - point delta before) and (point delta after - point) for every contour point. """
+        points = points.astype(np.float64)
+        incoming = points - np.roll(points, delta, axis=0)
+        outgoing = np.roll(points, -delta, axis=0) - points
+
+        dot_product = np.einsum('ij,ij->i', incoming, outgoing)
+        norm_product = np.sqrt(np.einsum('ij,ij->i', incoming, incoming) * np.einsum('ij,ij->i', outgoing, outgoing))
+
+        ''' zero length segments are treated as straight '''
+        cos_theta = np.divide(dot_product, norm_product, out=np.ones_like(dot_product), where=norm_product != 0)
+        return np.degrees(np.arccos(np.clip(cos_theta, -1.0, 1.0)))
+
+    @staticmethod
+    def _get_angle_peaks(angles: np.ndarray, min_angle: float) -> List[int]:
+        """ Index of largest angle in each circular run of angles exceeding min_angle, in contour order. """
+        mask = angles > min_angle
+        if not mask.any():
+            return []
+        if mask.all():
+            return [int(np.argmax(angles))]
+
+        ''' rotate so that no run wraps around the end of the contour '''
+        shift = int(np.argmin(mask))
+        mask = np.roll(mask, -shift)
+        rolled_angles = np.roll(angles, -shift)
+
+        edges = np.diff(mask.astype(np.int8), prepend=0, append=0)
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        peaks = [(start + int(np.argmax(rolled_angles[start:end])) + shift) % len(angles) for start, end in zip(starts, ends)]
+        return sorted(peaks)
+
+    @staticmethod
+    def _get_quadrilateral(contour: np.ndarray) -> Union[np.ndarray, None]:
+        """ Vertices of contour simplified with cv2.approxPolyDP to four points, None if contour does not simplify to a quadrilateral. """
+        perimeter = cv2.arcLength(contour, True)
+        for factor in (0.01, 0.02, 0.03, 0.05):
+            approx = cv2.approxPolyDP(contour, factor * perimeter, True)
+            if len(approx) == 4:
+                return approx.reshape(-1, 2)
+            if len(approx) < 4:
+                return None
+        return None
@@ -0,0 +1,86 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+from typing import Tuple, Union
+import numpy as np
+
+from .features import Features
+
+class FeatureIndex:
+    """
+    Spatial index over corners and contour points of a feature set, used for hit testing clicks in the image editor.
+    Built once per feature set, removals are applied without rebuilding the contour point tree.
+
+    ### Parameters:
+    - features: Features to be indexed, index must be updated through its methods when corners or contours are changed.
+    """
+    def __init__(self, features: Features):
+        ''' deferred since scipy.spatial takes a few hundred ms to import '''
+        from scipy.spatial import cKDTree
+
+        self.features = features
+        self._corners_list = features.corners
+        self._contours_list = features.other_contours
+
+        self.corners = np.asarray(features.corners or [], dtype=np.float64).reshape(-1, 2)
+        self.corner_tree = cKDTree(self.corners) if len(self.corners) else None
+
+        contours = features.other_contours or []
+        if contours:
+            points = np.concatenate([np.asarray(contour, dtype=np.float64).reshape(-1, 2) for contour in contours])
+            ''' contour index owning each point, -1 once the contour is removed '''
+            self.owners = np.repeat(np.arange(len(contours)), [np.asarray(contour).reshape(-1, 2).shape[0] for contour in contours])
+        else:
+            points = np.empty((0, 2), dtype=np.float64)
+            self.owners = np.empty(0, dtype=np.int64)
+        self.contour_tree = cKDTree(points) if len(points) else None
+        self._amt_contours = len(contours)
+
+    def is_current(self, features: Features) -> bool:
+        """ Check whether index still describes the given features, i.e. they were not replaced or changed externally. """
+        return features is self.features and \
+            features.corners is self._corners_list and \
+            features.other_contours is self._contours_list and \
+            len(features.corners or []) == len(self.corners) and \
+            len(features.other_contours or []) == self._amt_contours
+
+    def nearest_corner(self, point: Tuple[float, float], max_distance: float) -> Union[int, None]:
+        """ Index of corner closest to point if closer than max_distance, None otherwise. """
+        if self.corner_tree is None:
+            return None
+        distance, idx = self.corner_tree.query(point, distance_upper_bound=max_distance)
+        return int(idx) if distance < max_distance else None
+
+    def nearest_contour(self, point: Tuple[float, float], max_distance: float) -> Union[int, None]:
+        """ Index of contour with point closest to given point if closer than max_distance, None otherwise. """
+        if self.contour_tree is None:
+            return None
+        candidates = np.asarray(self.contour_tree.query_ball_point(point, max_distance), dtype=np.int64)
+        candidates = candidates[self.owners[candidates] >= 0]
+        if len(candidates) == 0:
+            return None
+        distances = np.hypot(*(self.contour_tree.data[candidates] - np.asarray(point, dtype=np.float64)).T)
+        nearest = np.argmin(distances)
+        return int(self.owners[candidates[nearest]]) if distances[nearest] < max_distance else None
+
+    def add_corner(self, corner: Tuple[float, float]):
+        """ Index corner appended to feature corners. """
+        self._set_corners(np.vstack((self.corners, np.asarray(corner, dtype=np.float64).reshape(1, 2))))
+
+    def remove_corner(self, idx: int):
+        """ Drop corner removed from feature corners at given index. """
+        self._set_corners(np.delete(self.corners, idx, axis=0))
+
+    def remove_contour(self, idx: int):
+        """ Drop points of contour removed from feature contours at given index, following contours shift down by one. """
+        self.owners[self.owners == idx] = -1
+        self.owners[self.owners > idx] -= 1
+        self._amt_contours -= 1
+
+    def _set_corners(self, corners: np.ndarray):
+        ''' few corners, rebuilding is cheaper than tracking removals '''
+        from scipy.spatial import cKDTree
+        self.corners = corners
+        self.corner_tree = cKDTree(corners) if len(corners) else None
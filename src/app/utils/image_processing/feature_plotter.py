@@ -1,3 +1,6 @@
+import functools
+from typing import List, Tuple
+
 import numpy as np
 import cv2
 
@@ -15,21 +18,43 @@ class FeaturePlotter:
     - size: Output image resolution.
     - features: Features to be mapped.
     - colors: Color palette to be used when saving.
+    - scale: Factor applied to resolution and feature coordinates, used for drawing downscaled previews.
     """
-    def __init__(self, dst_path: str, size: Size, features: Features, colors: Colors = Colors()):
+    CORNER_RADIUS = 60
+    CORNER_THICKNESS = 8
+
+    def __init__(self, dst_path: str, size: Size, features: Features, colors: Colors = Colors(), scale: float = 1.0):
+        if scale <= 0:
+            logger.error(f"Attempted to initialize FeaturePlotter with invalid scale: {scale}")
+            raise ValueError()
         self.dst_path = dst_path
         self.size = size
         self.features = features
         self.colors = colors
+        self.scale = scale
     
     def save_features(self):
         """
         Saves image with properties specified at initialization.
         Returns True if successful, False otherwise.
         """
+        canvas = self.get_image()
+
+        """ Save canvas to file """
+        try:
+            cv2.imwrite(self.dst_path, canvas)
+            logger.debug("Successfully performed cv2.imwrite")
+        except Exception as e:
+            logger.error(f"Exception while performing cv2 imwrite: {e}")
+            raise e
+
+    def get_image(self) -> np.ndarray:
+        """
+        Draws features specified at initialization on a new BGR canvas without saving it.
+        """
         try:
-            canvas = np.zeros((int(self.size.h), int(self.size.w), 3), dtype=np.uint8)
-            canvas[:, :] = list(self.colors.background_color)
+            canvas = np.empty((int(self.size.h * self.scale), int(self.size.w * self.scale), 3), dtype=np.uint8)
+            self._fill_background(canvas)
             logger.debug("Initialized canvas.")
         except Exception as e:
             logger.error(f"Encountered exception while initailizing canvas: {e}")
@@ -38,54 +63,109 @@ class FeaturePlotter:
         """ Draw plate contour if available """
         if self.features.plate_contour is not None:
             try:
-                self._draw_contour_points(canvas, self.features.plate_contour, self.colors.plate_color)
+                self._draw_contour_points(canvas, [self.features.plate_contour], self.colors.plate_color)
                 logger.debug("Successfully plotted plate contour")
             except Exception as e:
-                print("Exception occured during plate contour stage")
+                logger.error("Exception occured during plate contour stage")
+                raise e
+
+        """ Draw other contours, selected contour is drawn last so it stays on top """
+        if self.features.other_contours:
+            selected_idx = self.features.selected_contour_idx
+            try:
+                self._draw_contour_points(
+                    canvas, 
+                    [contour for idx, contour in enumerate(self.features.other_contours) if idx != selected_idx], 
+                    self.colors.contour_color
+                )
+                if selected_idx is not None and 0 <= selected_idx < len(self.features.other_contours):
+                    self._draw_contour_points(canvas, [self.features.other_contours[selected_idx]], self.colors.selected_element_color)
+            except Exception as e: 
+                logger.error("Exception occured during other contour stage")
                 raise e
+            logger.debug("Successfully plotted other contours")
 
-        """ Draw other contours """
-        if self.features.other_contours is not None:
-            for idx, contour in enumerate(self.features.other_contours):
-                color = self.colors.selected_element_color if idx == self.features.selected_contour_idx else self.colors.contour_color
-                try:
-                    self._draw_contour_points(canvas, contour, color)
-                except Exception as e: 
-                    logger.error("Exception occured during other contour stage")
-                    raise e
-                logger.debug("Successfully plotted other contours")
-
-        """ Draw corners as individual points """
-        if self.features.corners is not None:
-            for idx, corner in enumerate(self.features.corners):
-                radius = 60 
-                thickness = 8
-                color = self.colors.selected_element_color if idx == self.features.selected_corner_idx else self.colors.corner_color
-                try:
-                    cv2.circle(canvas, tuple(corner), radius, color, thickness)  
-                    cv2.circle(canvas, tuple(corner), thickness, color, thickness)
-                except Exception as e:
-                    logger.error("Exception occured during corner stage")
-                    raise e
+        """ Draw corners as ring with center dot """
+        if self.features.corners:
+            try:
+                self._draw_corners(canvas, self.features.corners, self.features.selected_corner_idx)
+            except Exception as e:
+                logger.error("Exception occured during corner stage")
+                raise e
             logger.debug("Successfully plotted corners")
 
-        """ Save canvas to file """
-        try:
-            cv2.imwrite(self.dst_path, canvas)
-            logger.debug("Successfully performed cv2.imwrite")
-        except Exception as e:
-            logger.error(f"Exception while performing cv2 imwrite: {e}")
-            raise e
+        return canvas
 
-    def _draw_contour_points(self, canvas, contour, color):
+    def _draw_contour_points(self, canvas: np.ndarray, contours: List[np.ndarray], color: Tuple[int, int, int], origin: Tuple[int, int] = (0, 0)):
         """
-        Draw each point in the contour as a separate point on the canvas.
+        Draw each point of the given contours as a small dot on the canvas, all points are written at once.
+        Canvas may be a region of the full image with its top left corner at origin.
         """
-        for i, point in enumerate(contour):
-            x, y = int(point[0][0]), int(point[0][1])
-            try:
-                cv2.circle(canvas, (x, y), 1, color, -1)  
-            except Exception as e:
-                logger.error(f"Encountered exception while attempting to draw point number {i}, {(x, y)}: {e}")
-                print(f"Encountered exception while attempting to draw point number {i}, {(x, y)}: {e}")
-                raise e
+        if not contours:
+            return
+        points = np.concatenate([np.asarray(contour).reshape(-1, 2) for contour in contours])
+        centers = (points * self.scale).astype(np.int64) - origin
+        FeaturePlotter._stamp(canvas, centers, FeaturePlotter._get_circle_offsets(1, -1), color)
+
+    def _draw_corners(self, canvas: np.ndarray, corners: List[tuple], selected_idx: int = None, origin: Tuple[int, int] = (0, 0)):
+        """
+        Draw corner markers on the canvas, selected corner in selected element color.
+        Canvas may be a region of the full image with its top left corner at origin.
+        """
+        centers = self._get_corner_centers(corners) - origin
+        selected = np.arange(len(centers)) == selected_idx
+        marker = self._get_corner_marker()
+        FeaturePlotter._stamp(canvas, centers[~selected], marker, self.colors.corner_color)
+        FeaturePlotter._stamp(canvas, centers[selected], marker, self.colors.selected_element_color)
+
+    def _get_corner_centers(self, corners: List[tuple]) -> np.ndarray:
+        """ Corner marker centers on canvas as (x, y) rows. """
+        return np.rint(np.asarray(corners, dtype=np.float64).reshape(-1, 2) * self.scale).astype(np.int64)
+
+    def _get_corner_marker(self) -> np.ndarray:
+        """ Pixel offsets of corner marker, a ring with center dot, at current scale. """
+        radius = max(1, round(self.CORNER_RADIUS * self.scale))
+        thickness = max(1, round(self.CORNER_THICKNESS * self.scale))
+        return FeaturePlotter._get_ring_offsets(radius, thickness)
+
+    def _fill_background(self, canvas: np.ndarray):
+        """ Fill canvas with background color. """
+        ''' fill first row then copy it down, much faster than broadcasting color to every pixel '''
+        if canvas.shape[0] > 0:
+            canvas[0] = self.colors.background_color
+            canvas[1:] = canvas[0]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_circle_offsets(radius: int, thickness: int) -> np.ndarray:
+        """ 
+        Pixel offsets drawn by cv2.circle with given radius and thickness around the center, as (dx, dy) rows.
+        Stamping these offsets gives the same pixels as calling cv2.circle for each center.
+        """
+        half_size = radius + max(thickness, 1)
+        stamp = np.zeros((2 * half_size + 1, 2 * half_size + 1), dtype=np.uint8)
+        cv2.circle(stamp, (half_size, half_size), radius, 1, thickness)
+        offsets = np.argwhere(stamp)[:, ::-1] - half_size
+        offsets.setflags(write=False)
+        return offsets
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_ring_offsets(radius: int, thickness: int) -> np.ndarray:
+        """ Pixel offsets of ring with given radius and thickness with a center dot, as (dx, dy) rows. """
+        offsets = np.unique(np.concatenate((
+            FeaturePlotter._get_circle_offsets(radius, thickness),
+            FeaturePlotter._get_circle_offsets(thickness, thickness)
+        )), axis=0)
+        offsets.setflags(write=False)
+        return offsets
+
+    @staticmethod
+    def _stamp(canvas: np.ndarray, centers: np.ndarray, offsets: np.ndarray, color: Tuple[int, int, int]):
+        """ Set pixels at every center plus every offset to color, pixels outside the canvas are skipped. """
+        if len(centers) == 0:
+            return
+        xs = (centers[:, 0, None] + offsets[None, :, 0]).ravel()
+        ys = (centers[:, 1, None] + offsets[None, :, 1]).ravel()
+        inside = (xs >= 0) & (xs < canvas.shape[1]) & (ys >= 0) & (ys < canvas.shape[0])
+        canvas[ys[inside], xs[inside]] = color
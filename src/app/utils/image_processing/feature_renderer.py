@@ -0,0 +1,135 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+from typing import Dict, List, Tuple, Set
+
+import numpy as np
+
+from .utils import Size, Colors
+from .features import Features
+from .feature_plotter import FeaturePlotter
+
+from ...logging import logger
+
+''' image region as (x, y, width, height) '''
+Rect = Tuple[int, int, int, int]
+
+class FeatureRenderer(FeaturePlotter):
+    """
+    Draws features for interactive editing in layers.
+    Base layer with plate contour and other contours is drawn once and cached, selected contour and corners are composited on top.
+    Updates only redraw regions of the image affected by changed features.
+
+    ### Parameters:
+    - size: Resolution of feature coordinates.
+    - features: Features to be drawn, copied so later edits to them do not affect the renderer.
+    - colors: Color palette.
+    - scale: Factor applied to resolution and feature coordinates.
+    """
+    def __init__(self, size: Size, features: Features, colors: Colors = Colors(), scale: float = 1.0):
+        super().__init__(None, size, features.copy(), colors, scale)
+        self._draw_layers()
+
+    def get_image(self) -> np.ndarray:
+        """ Composited image of current features. Array is updated in place by update_features. """
+        return self.image
+
+    def update_features(self, features: Features) -> List[Rect]:
+        """
+        Redraw image to match given features.
+        Removed contours are erased from the base layer, overlays are redrawn where selection or corners changed.
+        Adding contours or replacing the plate contour redraws the whole image.
+        Returns changed regions of image as (x, y, width, height).
+        """
+        features = features.copy()
+        old_contours = {id(contour): contour for contour in self.features.other_contours or []}
+        new_contours = {id(contour) for contour in features.other_contours or []}
+
+        if features.plate_contour is not self.features.plate_contour or not new_contours <= old_contours.keys():
+            logger.debug("Contours added or plate contour replaced, redrawing all feature layers.")
+            self.features = features
+            self._draw_layers()
+            return [(0, 0, self.image.shape[1], self.image.shape[0])]
+
+        ''' new contours are a subset of old ones, so regions of all changed elements are known before switching features '''
+        base_rects = [self._contour_rects[key] for key in old_contours if key not in new_contours]
+        overlay_rects = [self._get_element_rect(element) for element in self._get_overlay_elements(self.features) ^ self._get_overlay_elements(features)]
+        self.features = features
+        self._contour_rects = {key: rect for key, rect in self._contour_rects.items() if key in new_contours}
+
+        for rect in base_rects:
+            self._draw_base(rect)
+        dirty_rects = [rect for rect in base_rects + overlay_rects if rect[2] > 0 and rect[3] > 0]
+        for rect in dirty_rects:
+            self._draw_overlays(rect)
+        return dirty_rects
+
+    def _draw_layers(self):
+        """ Draw base layer and composited image from scratch. """
+        height, width = int(self.size.h * self.scale), int(self.size.w * self.scale)
+        self._contour_rects: Dict[int, Rect] = {id(contour): self._get_contour_rect(contour) for contour in self.features.other_contours or []}
+        self.base = np.empty((height, width, 3), dtype=np.uint8)
+        self._draw_base((0, 0, width, height))
+        self.image = np.empty_like(self.base)
+        self._draw_overlays((0, 0, width, height))
+
+    def _draw_base(self, rect: Rect):
+        """ Redraw base layer within region. All contours are drawn in contour color, selection is part of the overlay. """
+        x, y, w, h = rect
+        region = self.base[y:y + h, x:x + w]
+        self._fill_background(region)
+        if self.features.plate_contour is not None:
+            self._draw_contour_points(region, [self.features.plate_contour], self.colors.plate_color, (x, y))
+        contours = [contour for contour in self.features.other_contours or [] if self._intersects(self._contour_rects[id(contour)], rect)]
+        self._draw_contour_points(region, contours, self.colors.contour_color, (x, y))
+
+    def _draw_overlays(self, rect: Rect):
+        """ Copy base layer to image within region, then draw selected contour and corners on top. """
+        x, y, w, h = rect
+        region = self.image[y:y + h, x:x + w]
+        region[:] = self.base[y:y + h, x:x + w]
+        contours = self.features.other_contours or []
+        selected_idx = self.features.selected_contour_idx
+        if selected_idx is not None and 0 <= selected_idx < len(contours):
+            self._draw_contour_points(region, [contours[selected_idx]], self.colors.selected_element_color, (x, y))
+        if self.features.corners:
+            self._draw_corners(region, self.features.corners, self.features.selected_corner_idx, (x, y))
+
+    def _get_overlay_elements(self, features: Features) -> Set[tuple]:
+        """ Elements drawn on overlay, as ('contour', contour id) and ('corner', x, y, selected). """
+        elements = set()
+        contours = features.other_contours or []
+        if features.selected_contour_idx is not None and 0 <= features.selected_contour_idx < len(contours):
+            elements.add(('contour', id(contours[features.selected_contour_idx])))
+        for idx, corner in enumerate(features.corners or []):
+            elements.add(('corner', *corner, idx == features.selected_corner_idx))
+        return elements
+
+    def _get_element_rect(self, element: tuple) -> Rect:
+        """ Region covered by overlay element. """
+        if element[0] == 'contour':
+            return self._contour_rects[element[1]]
+        center = self._get_corner_centers([element[1:3]])[0]
+        extent = int(np.abs(self._get_corner_marker()).max())
+        return self._clip_rect(center[0] - extent, center[1] - extent, center[0] + extent + 1, center[1] + extent + 1)
+
+    def _get_contour_rect(self, contour: np.ndarray) -> Rect:
+        """ Region covered by contour points drawn as dots. """
+        centers = (np.asarray(contour).reshape(-1, 2) * self.scale).astype(np.int64)
+        x0, y0 = centers.min(axis=0) - 1
+        x1, y1 = centers.max(axis=0) + 2
+        return self._clip_rect(x0, y0, x1, y1)
+
+    def _clip_rect(self, x0: int, y0: int, x1: int, y1: int) -> Rect:
+        """ Rect from corner coordinates clipped to image. """
+        height, width = int(self.size.h * self.scale), int(self.size.w * self.scale)
+        x0, y0 = int(min(max(x0, 0), width)), int(min(max(y0, 0), height))
+        x1, y1 = int(min(max(x1, x0), width)), int(min(max(y1, y0), height))
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    @staticmethod
+    def _intersects(a: Rect, b: Rect) -> bool:
+        """ Check whether regions overlap. """
+        return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
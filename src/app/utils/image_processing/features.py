@@ -23,4 +23,14 @@ class Features:
         self.corners: List[tuple] = corners
         self.selected_contour_idx: int = selected_contour_idx
         self.selected_corner_idx: int = selected_corner_idx
+
+    def copy(self) -> 'Features':
+        """ Snapshot with copied feature lists. Contour arrays are shared since they are never modified in place. """
+        return Features(
+            self.plate_contour,
+            list(self.other_contours) if self.other_contours is not None else None,
+            list(self.corners) if self.corners is not None else None,
+            self.selected_contour_idx,
+            self.selected_corner_idx
+        )
         
\ No newline at end of file
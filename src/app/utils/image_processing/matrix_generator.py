@@ -13,6 +13,9 @@ class MatrixGenerator:
     """
     Generates transformation matrix for flattening image contours.
     """
+    ''' maximum distance in mm between a flattened contour point and the simplified contour stored for a plate '''
+    CONTOUR_TOLERANCE = 0.5
+
     def __init__(self, output_resolution: Size, corners: List[Tuple[float, float]]):
         if len(corners) != 4 or not all(isinstance(point, tuple) and len(point) == 2 for point in corners):
             logger.error(f"Attempted to initialize matrix generator with invalid corners: {corners}")
@@ -31,6 +34,25 @@ class MatrixGenerator:
         """ Get transformation matrix."""
         return self.transformation_matrix
 
+    @staticmethod
+    def transform_contours(contours: List[np.ndarray], matrix: np.ndarray) -> List[np.ndarray]:
+        """ Apply perspective transformation to all contour points in a single call. Returns Nx1x2 int32 contours. """
+        if not contours:
+            return []
+        points = [np.asarray(contour, dtype=np.float32).reshape(-1, 1, 2) for contour in contours]
+        transformed = cv2.perspectiveTransform(np.concatenate(points), matrix).astype(np.int32)
+        split_indices = np.cumsum([len(contour_points) for contour_points in points])[:-1]
+        return np.split(transformed, split_indices)
+
+    @staticmethod
+    def simplify_contours(contours: List[np.ndarray], tolerance: float = CONTOUR_TOLERANCE) -> List[np.ndarray]:
+        """
+        Reduce flattened contours to the vertices needed to describe them, using Douglas-Peucker approximation.
+        Vertices are a subset of the original points and every original point lies within tolerance of the simplified closed contour.
+        Returns Nx1x2 int32 contours.
+        """
+        return [cv2.approxPolyDP(np.asarray(contour, dtype=np.int32).reshape(-1, 1, 2), tolerance, True) for contour in contours]
+
     @staticmethod
     def _sort_corners(corners: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
         """
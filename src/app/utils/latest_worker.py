@@ -0,0 +1,92 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import threading
+from typing import Any, Union, Callable, Tuple
+
+from ..logging import logger
+
+''' called with (generation, result or None, error message or None) '''
+LatestCallback = Callable[[int, Any, Union[str, None]], None]
+
+class LatestWorker:
+    """
+    Background thread that only computes the most recently requested task.
+    A request submitted while another task is running replaces any request that has not started yet.
+    Callbacks of tasks that were superseded by a newer request before finishing are not called.
+    Callbacks are called from the worker thread, Qt receivers should be notified through signals.
+    ### Parameters:
+    - name: name of worker thread.
+    """
+    def __init__(self, name: str = "latest-worker"):
+        self.name = name
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._pending: Union[Tuple[int, Callable[[], Any], LatestCallback], None] = None
+        self._running = False
+        self._stopped = False
+        self._thread: Union[threading.Thread, None] = None
+
+    def submit(self, task: Callable[[], Any], callback: LatestCallback = None) -> int:
+        """ Request task to be computed, dropping any request that has not started yet. Returns generation of request. """
+        with self._condition:
+            if self._stopped:
+                logger.error(f"Attempted to submit task to stopped worker {self.name}.")
+                raise RuntimeError("Worker has been shut down.")
+            self._generation += 1
+            self._pending = (self._generation, task, callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+            return self._generation
+
+    def is_latest(self, generation: int) -> bool:
+        """ Check whether no request was submitted after the given one. """
+        with self._condition:
+            return generation == self._generation
+
+    def wait(self, timeout: float = None) -> bool:
+        """ Wait until no task is running or pending. Returns False on timeout. """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._running, timeout)
+
+    def shutdown(self, wait: bool = True):
+        """ Drop pending request and stop worker thread after the running task. """
+        with self._condition:
+            self._stopped = True
+            self._pending = None
+            self._condition.notify_all()
+            thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._stopped)
+                if self._stopped:
+                    self._condition.notify_all()
+                    return
+                generation, task, callback = self._pending
+                self._pending = None
+                self._running = True
+
+            result, error = None, None
+            try:
+                result = task()
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Encountered error in {self.name} task {generation}: {e}")
+
+            try:
+                if callback is not None and self.is_latest(generation):
+                    callback(generation, result, error)
+            except Exception as e:
+                logger.error(f"Encountered error in {self.name} callback {generation}: {e}")
+            finally:
+                with self._condition:
+                    self._running = False
+                    self._condition.notify_all()
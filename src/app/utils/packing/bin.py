@@ -32,6 +32,11 @@ class Bin:
         self.edge_distance = edge_distance
         if self.edge_distance > 0:
             self.add_edge_margins()
+        ''' set by set_free_space, empty area is then counted from stored free area of plate '''
+        self.stored_free_area: Union[float, None] = None
+        self.n_preplaced: int = 0
+        ''' existing contours of plate, only used for drawing previews '''
+        self.existing_contours: List[List[Tuple[float, float]]] = []
     
     """ Accessor methods """
 
@@ -51,7 +56,9 @@ class Bin:
         return area
 
     def get_empty_area(self) -> float:
-        """ Get area not occupied by pieces. """
+        """ Get area not occupied by pieces. Counted from stored free area of plate if free space was set. """
+        if self.stored_free_area is not None:
+            return self.stored_free_area - sum(piece.get_area() for piece in self.placed_pieces[self.n_preplaced:])
         area = self.dimension.width * self.dimension.height
         for piece in self.placed_pieces:
             area -= piece.get_area()
@@ -100,6 +107,24 @@ class Bin:
             )
         ]
 
+    def set_free_space(self, free_rectangles: List[Rectangle2D], free_area: float, margin: float = 0):
+        """
+        Use precomputed free space of a plate with existing contours instead of adding its contours as immovable parts.
+        Existing contours are not buffered by the bit diameter, so sides of free rectangles that are not on the plate border are moved inwards by margin.
+        Rectangles are clipped to edge margins. Empty area is counted from free_area, the true free area of the plate.
+        """
+        inner = self.free_rectangles[0] if self.edge_distance > 0 else Rectangle2D(0, 0, self.dimension.width, self.dimension.height)
+        self.free_rectangles = []
+        for rectangle in free_rectangles:
+            min_x = max(inner.min_x, rectangle.min_x + margin if rectangle.min_x > 0 else rectangle.min_x)
+            min_y = max(inner.min_y, rectangle.min_y + margin if rectangle.min_y > 0 else rectangle.min_y)
+            max_x = min(inner.max_x, rectangle.max_x - margin if rectangle.max_x < self.dimension.width else rectangle.max_x)
+            max_y = min(inner.max_y, rectangle.max_y - margin if rectangle.max_y < self.dimension.height else rectangle.max_y)
+            if max_x > min_x and max_y > min_y:
+                self.free_rectangles.append(Rectangle2D(min_x, min_y, max_x - min_x, max_y - min_y))
+        self.stored_free_area = free_area
+        self.n_preplaced = len(self.placed_pieces)
+
     def add_immovable_part(self, piece: Area2D):
         """ Adds pre-placed part at indicated coordinate. """
         if piece.get_bb().width > self.dimension.width or piece.get_bb().height > self.dimension.height:
@@ -0,0 +1,77 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+from typing import List, Union
+import numpy as np
+
+from .utils.rectangle2d import Rectangle2D
+
+"""
+Free space computation for plates with existing contours.
+Occupied space is approximated by contour bounding boxes, same as in Bin.update_rectangles.
+"""
+
+def get_free_rectangles(width: float, height: float, contours: List[np.ndarray]) -> List[Rectangle2D]:
+    """
+    Split plate of given size into free rectangles around bounding boxes of existing contours.
+    Contours can be given in any shape reshapeable to (n, 2).
+    """
+    free_rectangles = [Rectangle2D(0.0, 0.0, float(width), float(height))]
+    for occupied in get_bounding_boxes(contours):
+        free_rectangles = _split_free_rectangles(occupied, free_rectangles)
+    return free_rectangles
+
+def get_bounding_boxes(contours: List[np.ndarray]) -> List[Rectangle2D]:
+    """ Bounding boxes of non-empty contours. Contours can be given in any shape reshapeable to (n, 2). """
+    boxes = []
+    for contour in contours or []:
+        points = np.asarray(contour, dtype=float).reshape(-1, 2)
+        if len(points) == 0:
+            continue
+        min_x, min_y = points.min(axis=0)
+        max_x, max_y = points.max(axis=0)
+        boxes.append(Rectangle2D(float(min_x), float(min_y), float(max_x - min_x), float(max_y - min_y)))
+    return boxes
+
+def get_largest_rectangle(rectangles: List[Rectangle2D]) -> Union[Rectangle2D, None]:
+    """ Get rectangle with largest area. Returns None for empty list. """
+    if not rectangles:
+        return None
+    return max(rectangles, key=lambda rectangle: rectangle.area)
+
+def _split_free_rectangles(occupied: Rectangle2D, free_rectangles: List[Rectangle2D]) -> List[Rectangle2D]:
+    """
+    Split all free rectangles intersecting occupied rectangle into up to 4 margin rectangles.
+    Occupied rectangle is clipped to each free rectangle before splitting, so partially overlapping contours are handled.
+    """
+    result = []
+
+    for rectangle in free_rectangles:
+        overlap = rectangle.create_intersection(occupied)
+        if overlap is None:
+            result.append(rectangle)
+            continue
+
+        top = overlap.min_y - rectangle.min_y
+        right = rectangle.max_x - overlap.max_x
+        bottom = rectangle.max_y - overlap.max_y
+        left = overlap.min_x - rectangle.min_x
+
+        '''
+        splitting scheme (same as Bin.update_rectangles):
+        T T T
+        L X R
+        B B R
+        '''
+        if top > 0:
+            result.append(Rectangle2D(rectangle.min_x, rectangle.min_y, rectangle.width, top))
+        if right > 0:
+            result.append(Rectangle2D(overlap.max_x, overlap.min_y, right, rectangle.height - top))
+        if bottom > 0:
+            result.append(Rectangle2D(rectangle.min_x, overlap.max_y, rectangle.width - right, bottom))
+        if left > 0:
+            result.append(Rectangle2D(rectangle.min_x, overlap.min_y, left, rectangle.height - top - bottom))
+
+    return result
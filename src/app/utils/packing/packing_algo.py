@@ -3,34 +3,37 @@ from .utils.dimension2d import Dimension2D
 from .utils.rectangle2d import Rectangle2D
 from .utils.area2d import Area2D
 
-from typing import List, Tuple, Dict, Union
+from typing import List, Tuple, Dict, Union, Callable
 
 import os
 import traceback
 
-import matplotlib
-matplotlib.use('Agg')  
-
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-
 def execute_packing_algorithm(
-    input_bins: List[Tuple[str, Tuple[float, float], List[Tuple[float, float]]]], 
+    input_bins: List[Union[
+        Tuple[str, Tuple[float, float], List[List[Tuple[float, float]]]],
+        Tuple[str, Tuple[float, float], List[Tuple[float, float, float, float]], float]
+    ]], 
     input_pieces: List[Tuple[str, List[Tuple[float, float]]]],
     bit_diameter: float,
     min_edge_distance: float,
     preview_filename: str,
-    conversion_factor: float = 1.0
+    conversion_factor: float = 1.0,
+    progress_callback: Callable[[float], None] = None,
+    contour_loader: Callable[[List[str]], Dict[str, List[List[Tuple[float, float]]]]] = None
 ) -> Dict[str, Union[None, Tuple[str, Tuple[float, float]]]]:
     """
     Packs pieces into bins and returns their placements.
 
     Parameters:
-        input_bins: List of tuples containing (bin_id, dimensions, contours).
+        input_bins: List of tuples containing either (bin_id, dimensions, contours), whose existing contours are added as immovable parts,
+            or (bin_id, dimensions, free rectangles as (min_x, min_y, width, height), free area) of plates with stored free space summary.
         input_pieces: List of tuples containing (piece_id, contours).
         preview_filename: File to save preview
         bit_diameter: max of drill and mill bit diameter (tolerance on side of each piece)
         edge_tolerance: minimum distance from edge of plate
+        progress_callback: optional callable receiving the fraction of bins processed (0.0 - 1.0)
+        contour_loader: optional callable returning existing contours by bin id for the given bin ids, 
+            called once for the bins drawn in the preview. Existing contours of bins given by free space are not drawn if None.
 
     Returns:
         A dictionary where:
@@ -44,7 +47,9 @@ def execute_packing_algorithm(
         raise ValueError(f"Preview file must be a png, not {preview_filename}.")
 
     for bin in input_bins:
-        id, dimensions, contours = bin
+        if len(bin) not in (3, 4):
+            raise ValueError(f"Bin {bin} must be a tuple of length 3 or 4.")
+        id, dimensions = bin[:2]
         if not isinstance(id, str):
             raise ValueError(f"Bin ID {id} is not a string.")
         if not isinstance(dimensions, tuple) or len(dimensions) != 2:
@@ -70,10 +75,14 @@ def execute_packing_algorithm(
     res: Dict[str, Union[None, Tuple[str, Tuple[float, float]]]] = {}
 
     for bin in input_bins:
-        bin_id, dimensions, contours = bin
-        width, height = dimensions
+        bin_id, (width, height) = bin[:2]
         bin_obj = Bin(bin_id, Dimension2D(width, height), min_edge_distance)
-        for i, contour in enumerate(contours):
+        if len(bin) == 4:
+            free_rectangles, free_area = bin[2:]
+            bin_obj.set_free_space([Rectangle2D(*rectangle) for rectangle in free_rectangles], free_area, bit_diameter)
+            bins.append(bin_obj)
+            continue
+        for i, contour in enumerate(bin[2]):
             part = Area2D(
                 bin_id+f'ctr{i}', 
                 points=contour, 
@@ -99,12 +108,15 @@ def execute_packing_algorithm(
     used_bins = []
     free_bins = [] # bins that have been selected, but lack sufficient room for placement
 
-    for bin in bins:
+    for bin_idx, bin in enumerate(bins):
         if not pieces:  
             break
         
         pieces = bin.pack(pieces)
 
+        if progress_callback is not None:
+            progress_callback((bin_idx + 1) / len(bins))
+
         if bin.n_placed > 0 and any(not 'edge' in piece.id and not 'ctr' in piece.id for piece in bin.placed_pieces):
             used_bins.append(bin)
             for piece in bin.placed_pieces:
@@ -121,7 +133,15 @@ def execute_packing_algorithm(
             res[piece.id] = None
     
     if len(used_bins) > 0:
-       plot_part_placements(used_bins, free_bins, preview_filename, conversion_factor=conversion_factor)
+        if contour_loader is not None:
+            ''' existing contours are only needed for plotted bins '''
+            existing_contours = contour_loader([bin.id for bin in used_bins + free_bins if bin.stored_free_area is not None])
+            for bin in used_bins + free_bins:
+                bin.existing_contours = existing_contours.get(bin.id, [])
+        plot_part_placements(used_bins, free_bins, preview_filename, conversion_factor=conversion_factor)
+
+    if progress_callback is not None:
+        progress_callback(1.0)
 
     return res
 
@@ -141,12 +161,18 @@ def plot_part_placements(used_bins: list, free_bins: list, filename: str, scale_
     """
 
     try:
+        ''' matplotlib is only needed for layout previews, loaded on first use '''
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        import matplotlib.patches as patches
 
         fig_width = width
         fig_height_per_bin = bin_height
         total_fig_height = fig_height_per_bin * (len(used_bins) + len(free_bins))
 
-        fig, axs = plt.subplots(len(used_bins) + len(free_bins), 1, figsize=(fig_width, total_fig_height), dpi=dpi)
+        fig = Figure(figsize=(fig_width, total_fig_height), dpi=dpi)
+        FigureCanvasAgg(fig)
+        axs = fig.subplots(len(used_bins) + len(free_bins), 1)
 
         if len(used_bins) + len(free_bins) == 1:
             axs = [axs]
@@ -215,6 +241,23 @@ def plot_part_placements(used_bins: list, free_bins: list, filename: str, scale_
                     fontsize=8, color='white', bbox=dict(facecolor='blue', edgecolor='none', alpha=1)
                 )
 
+            for idx, contour in enumerate(bin.existing_contours):
+                ax.add_patch(patches.Polygon(
+                    [(x * conversion_factor, y * conversion_factor) for x, y in contour],
+                    edgecolor='black',
+                    facecolor='none',
+                    linewidth=2,
+                    linestyle='-'
+                ))
+                if len(contour) > 0:
+                    ax.text(
+                        (min(x for x, _ in contour) + text_plot_offset) * conversion_factor, 
+                        (min(y for _, y in contour) + text_plot_offset) * conversion_factor,
+                        f'ctr{idx}', 
+                        verticalalignment='top', horizontalalignment='left',
+                        fontsize=8, color='white', bbox=dict(facecolor='blue', edgecolor='none', alpha=1)
+                    )
+
             for idx, free_rect in enumerate(bin.free_rectangles):
                 rect_patch = patches.Rectangle(
                     (free_rect.min_x * conversion_factor, free_rect.min_y * conversion_factor),
@@ -251,9 +294,8 @@ def plot_part_placements(used_bins: list, free_bins: list, filename: str, scale_
 
             ax.set_title(f"Bin {bin.id}", fontsize=10)
 
-        plt.tight_layout()
-        plt.savefig(filename, bbox_inches='tight', facecolor='white', dpi=dpi)
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(filename, bbox_inches='tight', facecolor='white', dpi=dpi)
 
     except Exception as e:
         traceback.print_exc()
@@ -4,7 +4,6 @@ Date: 2024/09/05
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 
 from shapely.geometry import Polygon, LineString, MultiLineString
 from shapely.affinity import rotate, translate
@@ -0,0 +1,132 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from typing import Dict, List, Tuple, Union
+
+from .stl_parser import STLParser, MIN_QUANTIZED_VALUE, MIN_POINT_DISTANCE, CORNER_ANGLE
+from ..logging import logger
+
+HASH_CHUNK_SIZE = 1 << 20
+
+def get_parser_signature(point_spacing: float = MIN_POINT_DISTANCE) -> str:
+    """ Parser settings affecting parse results and previews. Cached results are invalidated when these change. """
+    return repr((MIN_QUANTIZED_VALUE, point_spacing, CORNER_ANGLE, STLParser.BG_COLOR, STLParser.TEXT_COLOR, STLParser.PLOT_COLOR))
+
+def get_file_hash(filepath: str, point_spacing: float = MIN_POINT_DISTANCE) -> str:
+    """ SHA-256 of file contents combined with parser signature. Raises OSError if file can not be read. """
+    digest = hashlib.sha256(get_parser_signature(point_spacing).encode())
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class PartCache:
+    """
+    Persistent cache of STL parse results keyed by file content hash.
+    Each entry consists of a json file with thickness and serialized outer contour, and a preview image.
+    Least recently used entries are evicted once total size or amount of entries exceeds its maximum.
+    ### Parameters:
+    - cache_directory: directory for storing cache entries.
+    - max_size: maximum total size of cache entries in bytes.
+    - max_entries: maximum amount of cache entries.
+    """
+    DEFAULT_MAX_SIZE: int = 64 * 1024 * 1024
+    DEFAULT_MAX_ENTRIES: int = 500
+
+    def __init__(self, cache_directory: str, max_size: int = DEFAULT_MAX_SIZE, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if not os.path.exists(cache_directory):
+            logger.error(f"Attempted to create part cache with invalid directory: {cache_directory}")
+            raise FileNotFoundError()
+        self.cache_directory = cache_directory
+        self.max_size = max_size
+        self.max_entries = max_entries
+
+    def get(self, content_hash: str, preview_path: str) -> Union[Tuple[float, str], None]:
+        """
+        Get cached parse result and copy cached preview image to preview_path.
+        Returns tuple of (thickness, serialized outer contour), None if entry does not exist or is corrupt.
+        """
+        data_path, image_path = self._get_entry_paths(content_hash)
+        if not os.path.exists(data_path) or not os.path.exists(image_path):
+            return None
+        try:
+            with open(data_path, 'r') as f:
+                data = json.load(f)
+            shutil.copyfile(image_path, preview_path)
+            os.utime(data_path)
+            logger.debug(f"Loaded part {content_hash} from cache.")
+            return float(data['thickness']), data['contours']
+        except Exception as e:
+            logger.error(f"Encountered error while reading part cache entry {content_hash}: {e}")
+            return None
+
+    def put(self, content_hash: str, thickness: float, contours: str, preview_path: str) -> bool:
+        """ Store parse result and copy of preview image. Returns True if successful, False otherwise. """
+        data_path, image_path = self._get_entry_paths(content_hash)
+        try:
+            ''' data file is written last and replaced atomically, entries without it are ignored '''
+            shutil.copyfile(preview_path, image_path)
+            temp_path = f"{data_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'thickness': thickness, 'contours': contours}, f)
+            os.replace(temp_path, data_path)
+        except Exception as e:
+            logger.error(f"Encountered error while writing part cache entry {content_hash}: {e}")
+            return False
+        self._evict()
+        return True
+
+    def clear(self):
+        """ Remove all cache entries. """
+        for filename in os.listdir(self.cache_directory):
+            os.remove(os.path.join(self.cache_directory, filename))
+
+    def get_size(self) -> int:
+        """ Total size of cache entries in bytes. """
+        return sum(size for _, size, _ in self._get_entries())
+
+    def _evict(self):
+        """ Remove least recently used entries until total size and amount of entries are within their maximum. """
+        entries = self._get_entries()
+        total_size = sum(size for _, size, _ in entries)
+        amount = len(entries)
+        for _, size, content_hash in sorted(entries):
+            if total_size <= self.max_size and amount <= self.max_entries:
+                break
+            try:
+                ''' data file is removed first so that a partially removed entry is ignored '''
+                for path in self._get_entry_paths(content_hash):
+                    if os.path.exists(path):
+                        os.remove(path)
+                total_size -= size
+                amount -= 1
+                logger.debug(f"Evicted part cache entry {content_hash}")
+            except OSError as e:
+                logger.error(f"Encountered error while evicting part cache entry {content_hash}: {e}")
+
+    def _get_entries(self) -> List[Tuple[float, int, str]]:
+        """ List of (last access time, size, content hash) of cache entries, including incomplete ones. """
+        access_times: Dict[str, float] = {}
+        sizes: Dict[str, int] = {}
+        for entry in os.scandir(self.cache_directory):
+            content_hash, ext = os.path.splitext(entry.name)
+            if not entry.is_file() or ext not in ('.json', '.png'):
+                continue
+            stat = entry.stat()
+            sizes[content_hash] = sizes.get(content_hash, 0) + stat.st_size
+            ''' access time of an entry is kept on its data file '''
+            if ext == '.json' or content_hash not in access_times:
+                access_times[content_hash] = stat.st_mtime
+        return [(access_times[content_hash], size, content_hash) for content_hash, size in sizes.items()]
+
+    def _get_entry_paths(self, content_hash: str) -> Tuple[str, str]:
+        return (
+            os.path.join(self.cache_directory, f"{content_hash}.json"),
+            os.path.join(self.cache_directory, f"{content_hash}.png")
+        )
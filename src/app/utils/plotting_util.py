@@ -3,12 +3,13 @@ Author: nagan319
 Date: 2024/06/03
 """
 
+import os
+import threading
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Sequence, NamedTuple
 
 """
-Utils for plotting plates and routers.
+Utils for plotting plates, routers and parts.
 """
 
 class PlottingConstants: 
@@ -16,6 +17,15 @@ class PlottingConstants:
     PLOT_TEXT_COLOR = '#000000'
     PLOT_LINE_COLOR = '#000000'
 
+''' included in preview cache keys, cached previews are rendered again when style changes '''
+PREVIEW_STYLE = (PlottingConstants.PLOT_BG_COLOR, PlottingConstants.PLOT_TEXT_COLOR, PlottingConstants.PLOT_LINE_COLOR)
+
+''' lines (sequence of (n, 2) arrays or (n, 2, 2) segment array), linestyle, linewidth (None for default) '''
+LineGroup = Tuple[Sequence[np.ndarray], str, float]
+
+''' each thread reuses its own figures, pyplot global state is never touched '''
+_preview_figures = threading.local()
+
 def _generate_rectangle_coordinates(width: float, height: float, offset_x: float = 0, offset_y: float = 0) -> Tuple[List[float], List[float]]:
     """
     Gets rectangle coordinates given width, height, and offset.
@@ -33,3 +43,86 @@ def _generate_rectangle_coordinates(width: float, height: float, offset_x: float
     x_coordinates = [offset_x, offset_x + width, offset_x + width, offset_x, offset_x]
     y_coordinates = [offset_y, offset_y, offset_y + height, offset_y + height, offset_y]
     return x_coordinates, y_coordinates
+
+def _get_preview_axes(figsize: Tuple[float, float], dpi: int):
+    """
+    Get emptied axes of Agg figure with given size, created once per thread.
+    Axes are reused instead of cleared, since rebuilding ticks takes most of the rendering time.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figures: Dict[Any, Any] = getattr(_preview_figures, 'figures', None)
+    if figures is None:
+        figures = _preview_figures.figures = {}
+    key = (tuple(figsize), dpi)
+    figure = figures.get(key)
+    if figure is None:
+        figure = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(figure)
+        figure.add_subplot().set_aspect('equal')
+        figures[key] = figure
+    axes = figure.axes[0]
+    for collection in list(axes.collections):
+        collection.remove()
+    axes.ignore_existing_data_limits = True
+    return figure, axes
+
+def save_line_preview(
+    dst_path: str,
+    line_groups: List[LineGroup],
+    figsize: Tuple[float, float],
+    dpi: int,
+    invert_y: bool = False,
+    xlabel: str = None,
+    bg_color: str = PlottingConstants.PLOT_BG_COLOR,
+    text_color: str = PlottingConstants.PLOT_TEXT_COLOR,
+    line_color: str = PlottingConstants.PLOT_LINE_COLOR
+):
+    """
+    Save preview image of line groups with equal aspect ratio. 
+    Each group is drawn as a single LineCollection on a reused Agg canvas, safe to call from worker threads and processes.
+    matplotlib is loaded on first call.
+    """
+    from matplotlib import rcParams
+    from matplotlib.collections import LineCollection
+
+    figure, axes = _get_preview_axes(figsize, dpi)
+
+    for lines, linestyle, linewidth in line_groups:
+        if len(lines) == 0:
+            continue
+        axes.add_collection(LineCollection(
+            lines, 
+            colors=line_color, 
+            linestyles=linestyle, 
+            linewidths=linewidth if linewidth is not None else rcParams['lines.linewidth']
+        ))
+    axes.autoscale_view()
+    if axes.yaxis_inverted() != invert_y:
+        axes.invert_yaxis()
+
+    axes.set_xlabel(xlabel or '', fontsize=10, labelpad=5, horizontalalignment='center')
+    axes.set_facecolor(bg_color)
+    axes.tick_params(axis='x', colors=text_color)
+    axes.tick_params(axis='y', colors=text_color)
+    for spine in axes.spines.values():
+        spine.set_color(text_color)
+
+    figure.savefig(dst_path, bbox_inches='tight', facecolor=bg_color, dpi=dpi)
+
+class PreviewJob(NamedTuple):
+    """
+    Picklable preview rendering input: geometry and style passed to save_line_preview.
+    """
+    line_groups: List[LineGroup]
+    figsize: Tuple[float, float]
+    dpi: int
+    options: Dict[str, Any] = {}
+
+    def render(self, dst_path: str) -> str:
+        """ Render preview to dst_path. Image is written to a temporary file first, so readers never see a partial image. """
+        temp_path = f"{dst_path}.tmp.png"
+        save_line_preview(temp_path, self.line_groups, self.figsize, self.dpi, **self.options)
+        os.replace(temp_path, dst_path)
+        return dst_path
@@ -0,0 +1,89 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import os
+import shutil
+import hashlib
+from typing import Any, List, Tuple
+
+from ..logging import logger
+
+class PreviewCache:
+    """
+    Persistent cache of rendered preview images keyed by hash of their rendering inputs.
+    Least recently used images are evicted once total size exceeds max size.
+    ### Parameters:
+    - cache_directory: directory for storing cached images.
+    - max_size: maximum total size of cached images in bytes.
+    """
+    DEFAULT_MAX_SIZE: int = 64 * 1024 * 1024
+
+    def __init__(self, cache_directory: str, max_size: int = DEFAULT_MAX_SIZE):
+        if not os.path.exists(cache_directory):
+            logger.error(f"Attempted to create preview cache with invalid directory: {cache_directory}")
+            raise FileNotFoundError()
+        self.cache_directory = cache_directory
+        self.max_size = max_size
+
+    @staticmethod
+    def get_key(*inputs: Any) -> str:
+        """ Key from rendering inputs. Inputs must have a deterministic repr (numbers, strings, tuples). """
+        return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+    def get(self, key: str, dst_path: str) -> bool:
+        """ Copy cached image to dst_path. Returns True if image was cached, False otherwise. """
+        cache_path = self._get_cache_path(key)
+        if not os.path.exists(cache_path):
+            return False
+        try:
+            shutil.copyfile(cache_path, dst_path)
+            os.utime(cache_path)
+            return True
+        except OSError as e:
+            logger.error(f"Encountered error while reading cached preview {key}: {e}")
+            return False
+
+    def put(self, key: str, src_path: str) -> bool:
+        """ Store copy of rendered image and evict old images if necessary. Returns True if successful, False otherwise. """
+        cache_path = self._get_cache_path(key)
+        try:
+            temp_path = f"{cache_path}.tmp"
+            shutil.copyfile(src_path, temp_path)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logger.error(f"Encountered error while caching preview {key}: {e}")
+            return False
+        self._evict()
+        return True
+
+    def get_size(self) -> int:
+        """ Total size of cached images in bytes. """
+        return sum(size for _, size, _ in self._get_entries())
+
+    def _evict(self):
+        """ Remove least recently used images until total size is within max size. """
+        entries = self._get_entries()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                logger.debug(f"Evicted cached preview {path}")
+            except OSError as e:
+                logger.error(f"Encountered error while evicting cached preview {path}: {e}")
+
+    def _get_entries(self) -> List[Tuple[float, int, str]]:
+        """ List of (last access time, size, path) of cached images. """
+        entries = []
+        for entry in os.scandir(self.cache_directory):
+            if entry.is_file() and entry.name.endswith('.png'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _get_cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_directory, f"{key}.png")
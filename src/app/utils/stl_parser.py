@@ -4,20 +4,32 @@ Date: 2024/04/15
 """
 
 import os
+import re
 import math
-from typing import Tuple, List
+import itertools
+from typing import Tuple, List, Union
 from enum import Enum
-from collections import defaultdict
 
-from stl import mesh
 import numpy as np
-import matplotlib.pyplot as plt
 
+from .plotting_util import save_line_preview
 from ..logging import logger
 
 MIN_QUANTIZED_VALUE = 0.01
 MIN_QUANTIZED_VALUE_DECIMALS = 2
 MIN_POINT_DISTANCE = 10
+CORNER_ANGLE = math.radians(30)
+
+BINARY_HEADER_SIZE = 80
+BINARY_FACET_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vectors', '<f4', (3, 3)),
+    ('attr', '<u2')
+])
+ASCII_CHUNK_SIZE = 1 << 22
+''' initial capacity of vertex buffer of ASCII files '''
+ASCII_INITIAL_VERTICES = 1 << 12
+ASCII_VERTEX_PATTERN = re.compile(rb'vertex\s+(\S+)\s+(\S+)\s+(\S+)')
 
 VectorArrayShape = Tuple[float, float, float]
 EdgeShape = Tuple[Tuple[float, float], Tuple[float, float]]
@@ -30,11 +42,11 @@ class Axis(Enum):
 class STLParser: 
     """
     Converts a valid STL file into a numpy ndarray consisting of a reasonable number of points for use in a 2D packing algorithm.
-    Utilizes the Mesh class from the numpy-stl library for processing.
-    The mesh is converted to vector format during initialization, resulting in a shape of (Nfacets, Nvertices == 3, Ncoordinates == 3).
+    The file is loaded in vector format during initialization, resulting in a shape of (Nfacets, Nvertices == 3, Ncoordinates == 3).
+    Binary files are read in a single call, ASCII files are parsed in chunks.
     
     ### Criteria for a valid STL file:
-    - Must be in ASCII format.
+    - Must be in ASCII or binary format.
     - File must represent a single 2D shape extruded along a third axis, which aligns with the x, y, or z axis.
     - Files with improper orientation may produce erroneous results (a stricter check will be added in future versions).
 
@@ -42,9 +54,9 @@ class STLParser:
     - Flat axis (int in range 0-2): Represents the axis along which there is a minimum number of unique points, rounded to a tolerance threshold.    
     - Thickness (float): Represents the distance between the minimum and maximum point along the flat axis.
     - Flattened mesh (np array): Represents the mesh with all coordinates along the flat axis set to 0.
-    - Outer edges (list of tuples): Represents an unsorted list of the outer edges of the polygon.
+    - Outer edges (np array): Represents the unsorted outer edges of the polygon, in shape (Nedges, 2, 2).
     - Outer contour (np array): Contour created from edges with largest bounding box
-    The outer contour is refined to include an amount of vertices appropriate for processing.
+    The outer contour is resampled at point spacing (in file units) to include an amount of vertices appropriate for processing.
 
     ### Raises:
     - FileNotFoundError if file path is invalid.
@@ -57,22 +69,23 @@ class STLParser:
     TEXT_COLOR: str = '#000000'
     PLOT_COLOR: str = '#000000'
 
-    def __init__(self, src_path: str):
+    def __init__(self, src_path: str, point_spacing: float = MIN_POINT_DISTANCE):
         logger.debug(f"Initializing STLParser with source path: {src_path}")
 
         self.parsing_complete = False
+        self.point_spacing: float = point_spacing
 
         if not os.path.exists(src_path):
             logger.error(f"STL file {src_path} does not exist") 
             raise FileNotFoundError(f"STL file {src_path} does not exist") 
         
-        if not STLParser.stl_file_valid(src_path):
-            logger.error(f"STL file {src_path} is invalid")
+        try:
+            self.stl_mesh_vector: np.array = STLParser.load_stl_vectors(src_path)
+        except Exception as e:
+            logger.error(f"STL file {src_path} is invalid: {e}")
             raise ValueError(f"STL file {src_path} is invalid")
 
         self.stl_filepath: str = src_path
-        self.stl_mesh: np.array = mesh.Mesh.from_file(self.stl_filepath)
-        self.stl_mesh_vector: np.array = np.array(self.stl_mesh.vectors)
         
         if not STLParser.stl_mesh_valid(self.stl_mesh_vector):
             e = f"STL file {self.stl_filepath} must be in mesh vector format. Current shape is {self.stl_mesh_vector.shape}"
@@ -91,13 +104,13 @@ class STLParser:
         logger.debug(f"Flattening mesh...")
         self.flattened_mesh: np.array = STLParser.get_flattened_mesh(self.stl_mesh_vector, self.flat_axis)
         logger.debug(f"Finding outer edges...")
-        self.outer_edges: List[EdgeShape] = STLParser.get_outer_edges(self.flattened_mesh, self.flat_axis)
+        self.outer_edges: np.array = STLParser.get_outer_edge_array(self.flattened_mesh, self.flat_axis)
         logger.debug(f"Finding contours...")
         self.contours: List[np.array] = STLParser.get_contours(self.outer_edges)
         logger.debug(f"Finding outermost contour...")
         self.outer_contour: np.array = STLParser.get_outermost_contour(self.contours)
         logger.debug(f"Smoothing contour...")
-        self.outer_contour = STLParser.get_smooth_contour(self.outer_contour)
+        self.outer_contour = STLParser.get_smooth_contour(self.outer_contour, self.point_spacing)
         self.parsing_complete = True
         logger.debug(f"Parsing complete.")
 
@@ -107,11 +120,77 @@ class STLParser:
         Check if an STL file is valid.
         """
         try:
-            mesh.Mesh.from_file(filepath)
+            STLParser.load_stl_vectors(filepath)
             return True
         except Exception:
             return False
 
+    @staticmethod
+    def load_stl_vectors(filepath: str) -> np.array:
+        """
+        Load facet vertices of an ASCII or binary STL file in a single pass. Returns array of shape (Nfacets, 3, 3).
+        The file is closed before returning. Raises ValueError if the file is not a valid STL file.
+        """
+        file_size = os.path.getsize(filepath)
+        with open(filepath, 'rb') as file:
+            header = file.read(BINARY_HEADER_SIZE + 4)
+
+        if len(header) == BINARY_HEADER_SIZE + 4:
+            n_facets = int(np.frombuffer(header, dtype='<u4', offset=BINARY_HEADER_SIZE)[0])
+            if n_facets > 0 and file_size == BINARY_HEADER_SIZE + 4 + n_facets * BINARY_FACET_DTYPE.itemsize:
+                return STLParser._load_binary_stl(filepath, n_facets)
+
+        if header.lstrip().startswith(b'solid'):
+            return STLParser._load_ascii_stl(filepath)
+
+        raise ValueError(f"File {filepath} is neither an ASCII nor a binary STL file")
+
+    @staticmethod
+    def _load_binary_stl(filepath: str, n_facets: int) -> np.array:
+        """ Read facet records of a binary STL file and return their vertices. """
+        ''' read into memory rather than memory-mapped, so no handle stays open and cached part files can be replaced '''
+        with open(filepath, 'rb') as file:
+            file.seek(BINARY_HEADER_SIZE + 4)
+            records = np.fromfile(file, dtype=BINARY_FACET_DTYPE, count=n_facets)
+        if len(records) != n_facets:
+            raise ValueError(f"Binary STL file {filepath} is truncated")
+        return np.ascontiguousarray(records['vectors'])
+
+    @staticmethod
+    def _load_ascii_stl(filepath: str, chunk_size: int = ASCII_CHUNK_SIZE) -> np.array:
+        """ Parse vertices of an ASCII STL file chunk by chunk into a float32 buffer, doubled in size whenever it is full. """
+        vertices = np.empty((ASCII_INITIAL_VERTICES, 3), dtype=np.float32)
+        n_vertices = 0
+        n_facets = 0
+        remainder = b""
+
+        with open(filepath, 'rb') as file:
+            while True:
+                chunk = file.read(chunk_size)
+                data = remainder + chunk
+                if chunk:
+                    split_idx = data.rfind(b'\n') + 1
+                    data, remainder = data[:split_idx], data[split_idx:]
+                n_facets += data.count(b'endfacet')
+                ''' matched coordinate text is converted as it is iterated, raising ValueError for invalid coordinates '''
+                coordinates = np.fromiter(
+                    itertools.chain.from_iterable(match.groups() for match in ASCII_VERTEX_PATTERN.finditer(data)), 
+                    dtype=np.float32
+                ).reshape(-1, 3)
+                if n_vertices + len(coordinates) > len(vertices):
+                    grown = np.empty((max(n_vertices + len(coordinates), 2 * len(vertices)), 3), dtype=np.float32)
+                    grown[:n_vertices] = vertices[:n_vertices]
+                    vertices = grown
+                vertices[n_vertices:n_vertices + len(coordinates)] = coordinates
+                n_vertices += len(coordinates)
+                if not chunk:
+                    break
+
+        if n_facets == 0 or n_vertices != 3 * n_facets:
+            raise ValueError(f"ASCII STL file {filepath} contains {n_vertices} vertices in {n_facets} facets")
+
+        return vertices[:n_vertices].reshape(-1, 3, 3)
+
     @staticmethod
     def stl_mesh_valid(stl_mesh: np.array) -> bool:
         """
@@ -161,53 +240,82 @@ class STLParser:
         Get the outer edges of a flattened STL mesh. 
         Returns a list of unsorted edges.
         """
+        outer_edges = STLParser.get_outer_edge_array(flattened_mesh, flat_axis)
+        return [tuple(map(tuple, edge)) for edge in outer_edges]
+
+    @staticmethod
+    def get_outer_edge_array(flattened_mesh: np.array, flat_axis: Axis) -> np.array:
+        """
+        Get the outer edges of a flattened STL mesh as an array of shape (Nedges, 2, 2).
+        Edges are canonicalized so that their first point is lexicographically smaller; outer edges are those belonging to a single facet.
+        Edges are ordered by first occurrence in the mesh.
+        """
         if flat_axis not in Axis:
             raise ValueError(f"Invalid axis {flat_axis}")
 
-        edges = []
+        planar_axes = [i for i in range(3) if i != flat_axis.value]
+        vertices = flattened_mesh[:, :, planar_axes]
+        edges = np.stack((vertices, np.roll(vertices, -1, axis=1)), axis=2).reshape(-1, 2, 2)
 
-        for facet in flattened_mesh:
-            for i in range(3):
-                point1 = [facet[i][j] for j in range(3) if j != flat_axis.value]
-                point2 = [facet[(i+1)%3][j] for j in range(3) if j != flat_axis.value]
-                edge = tuple(sorted([tuple(point1), tuple(point2)]))
-                edges.append(edge)
+        if len(edges) == 0:
+            return edges
 
-        edge_counts = defaultdict(int)
-        for edge in edges:
-            edge_counts[edge] += 1
+        point_a, point_b = edges[:, 0], edges[:, 1]
+        swap = (point_a[:, 0] > point_b[:, 0]) | ((point_a[:, 0] == point_b[:, 0]) & (point_a[:, 1] > point_b[:, 1]))
+        edges[swap] = edges[swap][:, ::-1]
 
-        outer_edges = [edge for edge, count in edge_counts.items() if count == 1]
-        return outer_edges
+        _, first_indices, counts = np.unique(edges.reshape(-1, 4), axis=0, return_index=True, return_counts=True)
+        outer_edge_indices = np.sort(first_indices[counts == 1])
+        return edges[outer_edge_indices]
 
     @staticmethod
-    def get_contours(outer_edges: List[EdgeShape]) -> List[np.array]:
+    def get_contours(outer_edges: Union[List[EdgeShape], np.array]) -> List[np.array]:
         """
-        Get contours from a list of outer edges.
+        Get contours from a list or array of outer edges.
         Sorts edges into contours and returns a list of np arrays.
+        Each contour starts at the first unvisited point in order of appearance and follows the first remaining neighbor.
         """
-        points = defaultdict(list)
-
-        for edge in outer_edges:
-            for i, point in enumerate(edge):
-                points[point].append(edge[(i+1)%2])
-
+        edges = np.asarray(outer_edges)
+        if edges.size == 0:
+            return []
+        edges = edges.reshape(-1, 2, 2)
+
+        ''' index points in order of first appearance '''
+        endpoints = edges.reshape(-1, 2)
+        _, first_indices, inverse = np.unique(endpoints, axis=0, return_index=True, return_inverse=True)
+        appearance_order = np.argsort(first_indices)
+        point_ranks = np.empty_like(appearance_order)
+        point_ranks[appearance_order] = np.arange(len(appearance_order))
+        edge_point_ids = point_ranks[inverse.reshape(-1)].reshape(-1, 2)
+        points = endpoints[first_indices[appearance_order]]
+        n_points = len(points)
+
+        ''' adjacency table: neighbors of each point in order of edge appearance '''
+        sources = edge_point_ids.reshape(-1)
+        targets = edge_point_ids[:, ::-1].reshape(-1)
+        neighbor_order = np.argsort(sources, kind='stable')
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=n_points)))).tolist()
+        neighbors = targets[neighbor_order].tolist()
+        remaining = [neighbors[offsets[i]:offsets[i+1]] for i in range(n_points)]
+
+        visited = [False] * n_points
         contours = []
-        iter_list = list(points)
-        while iter_list:
-            point = iter_list[0]
+
+        for start in range(n_points):
+            if visited[start]:
+                continue
+            point = start
             current_contour = []
             while True:
-                current_contour.append(list(point))
-                next_point_options = points[point]
-                next_point = next_point_options[0]
-                points.pop(point)
-                iter_list.remove(point)
-                if not points[next_point]:
+                current_contour.append(point)
+                next_point = remaining[point][0]
+                visited[point] = True
+                remaining[point] = []
+                if not remaining[next_point]:
                     break
-                points[next_point].remove(point)
+                remaining[next_point].remove(point)
                 point = next_point
-            contours.append(np.array(current_contour))
+            contours.append(points[current_contour])
 
         return contours
 
@@ -239,56 +347,51 @@ class STLParser:
         return np.array([min_x, max_x, min_y, max_y])
 
     @staticmethod
-    def get_smooth_contour(contour: np.array) -> np.array:
-        """
-        Get a smoothed contour by removing and adding points in areas of extreme density.
-        """
-        contour = STLParser._remove_contour_points(contour)
-        contour = STLParser._add_contour_points(contour)
-        return contour
-
-    @staticmethod
-    def _remove_contour_points(contour: np.array) -> np.array:
+    def get_smooth_contour(contour: np.array, spacing: float = MIN_POINT_DISTANCE) -> np.array:
         """
-        Remove points from areas of high density of a contour to smooth it.
+        Get a smoothed contour with points evenly spaced along its perimeter. Sharp corners are kept.
         """
-        new_contour = [contour[0]]
-
-        point_a = contour[0]
-        for point_b in contour[1:]:
-            if np.linalg.norm(point_b - point_a) > MIN_POINT_DISTANCE:
-                new_contour.append(point_a)
-                point_a = point_b
-
-        if np.linalg.norm(contour[-1] - contour[0]) > MIN_POINT_DISTANCE:
-            new_contour.append(contour[-1])
-
-        return np.array(new_contour)
+        return STLParser.resample_contour(contour, spacing)
 
     @staticmethod
-    def _add_contour_points(contour: np.array) -> np.array:
+    def resample_contour(contour: np.array, spacing: float = MIN_POINT_DISTANCE, corner_angle: float = CORNER_ANGLE) -> np.array:
         """
-        Add points to areas of low density of a contour to smooth it.
+        Resample closed contour at fixed arc-length spacing.
+        Vertices where contour direction changes by more than corner_angle (radians) are kept, 
+        regular samples closer than half the spacing to a kept vertex are dropped.
         """
-        new_contour = []
-
-        contour = tuple(map(tuple, contour))
-
-        for i in range(len(contour)):
-            point_a = np.array(contour[i])
-            point_b = np.array(contour[0]) if i == len(contour)-1 else np.array(contour[i+1])
-            angle = math.atan2(point_b[1]-point_a[1], point_b[0]-point_a[0])
-
-            curr_point = point_a
-            while True:
-                distance = np.linalg.norm(point_b-curr_point)
-                if distance < 2 * MIN_POINT_DISTANCE:
-                    new_contour.append(tuple(point_b))
-                    break
-                curr_point += (MIN_POINT_DISTANCE * math.cos(angle), MIN_POINT_DISTANCE * math.sin(angle))
-                new_contour.append(tuple(curr_point))
-
-        return np.array(new_contour)
+        if spacing <= 0:
+            raise ValueError(f"Contour point spacing must be positive, got {spacing}")
+
+        points = np.asarray(contour, dtype=float).reshape(-1, 2)
+        segments = np.roll(points, -1, axis=0) - points
+        lengths = np.hypot(segments[:, 0], segments[:, 1])
+        nonzero = lengths > 0
+        if np.count_nonzero(nonzero) < 2:
+            return np.asarray(contour)
+        points, segments, lengths = points[nonzero], segments[nonzero], lengths[nonzero]
+
+        ''' arc length at start of each segment, closing segment ends at perimeter '''
+        arc_lengths = np.concatenate(([0], np.cumsum(lengths)))
+        perimeter = arc_lengths[-1]
+
+        directions = np.arctan2(segments[:, 1], segments[:, 0])
+        turns = np.abs((directions - np.roll(directions, 1) + np.pi) % (2 * np.pi) - np.pi)
+        corner_positions = arc_lengths[:-1][turns > corner_angle]
+
+        sample_count = max(int(np.ceil(perimeter / spacing)), 3)
+        sample_positions = np.linspace(0, perimeter, sample_count, endpoint=False)
+        if len(corner_positions) > 0:
+            ''' distance to nearest corner, wrapping around contour start '''
+            wrapped = np.concatenate((corner_positions[-1:] - perimeter, corner_positions, corner_positions[:1] + perimeter))
+            index = np.searchsorted(wrapped, sample_positions)
+            nearest = np.minimum(sample_positions - wrapped[index - 1], wrapped[index] - sample_positions)
+            sample_positions = np.sort(np.concatenate((corner_positions, sample_positions[nearest >= spacing / 2])))
+
+        closed_points = np.vstack((points, points[:1]))
+        x = np.interp(sample_positions, arc_lengths, closed_points[:, 0])
+        y = np.interp(sample_positions, arc_lengths, closed_points[:, 1])
+        return np.column_stack((x, y)).astype(np.asarray(contour).dtype, copy=False)
 
     def save_preview_image(self, dst_path: str, scale_factor: float = 1, figsize: tuple = (3.9, 3.75), dpi: int = 80):
         """
@@ -303,29 +406,12 @@ class STLParser:
 
         logger.debug(f"Creating plot for preview image...")
 
-        plt.figure(figsize=figsize)
-
-        for edge in self.outer_edges:
-            x_values, y_values = zip(*edge)
-            if scale_factor != 1:
-                x_values = tuple([x * scale_factor for x in x_values])
-                y_values = tuple([y * scale_factor for y in y_values])
-            plt.plot(x_values, y_values, color=STLParser.PLOT_COLOR)
-
-        plt.xlabel('Z: ' + str(self.thickness) + ' mm', fontsize=10, labelpad=5, horizontalalignment='center')
-
-        plt.grid(True)
-        plt.gca().set_facecolor(STLParser.BG_COLOR)
-        plt.gca().set_aspect('equal')
-        plt.grid(False)
-        plt.tick_params(axis='x', colors=STLParser.TEXT_COLOR)
-        plt.tick_params(axis='y', colors=STLParser.TEXT_COLOR)
-
-        plt.gca().spines['top'].set_color(STLParser.TEXT_COLOR)
-        plt.gca().spines['bottom'].set_color(STLParser.TEXT_COLOR)
-        plt.gca().spines['left'].set_color(STLParser.TEXT_COLOR)
-        plt.gca().spines['right'].set_color(STLParser.TEXT_COLOR)
+        segments = np.asarray(self.outer_edges, dtype=float).reshape(-1, 2, 2) * scale_factor
 
         logger.debug(f"Saving preview image...")
-        plt.savefig(dst_path, bbox_inches='tight', facecolor='#FFFFFF', dpi=dpi)
+        save_line_preview(
+            dst_path, [(segments, 'solid', None)], figsize, dpi,
+            xlabel='Z: ' + str(self.thickness) + ' mm',
+            bg_color=STLParser.BG_COLOR, text_color=STLParser.TEXT_COLOR, line_color=STLParser.PLOT_COLOR
+        )
         logger.debug(f"Image saved to {dst_path}.")
@@ -17,6 +17,7 @@ from ..widgets.image_load_widget import ImageLoadWidget
 from ..widgets.image_threshold_widget import ImageThresholdWidget
 from ..widgets.image_feature_widget import ImageFeatureWidget
 from ..widgets.image_flat_widget import ImageFlatWidget
+from ..widgets.background_runner import BackgroundRunner
 
 from ...paths import IMAGE_PREVIEW_DIR
 
@@ -31,6 +32,7 @@ class EditorViews(enum.Enum):
 class ImageEditorView(QStackedWidget):
     """
     View for processing image and detecting features.
+    Image processing runs on a shared background worker, so the GUI thread never waits for OpenCV.
     """
     editingFinished = pyqtSignal()
 
@@ -40,9 +42,10 @@ class ImageEditorView(QStackedWidget):
         self.language = language
 
         self.plate = plate
-        self.controller = ImageEditingController(session, IMAGE_PREVIEW_DIR, self.plate)
+        self.controller = ImageEditingController(session, IMAGE_PREVIEW_DIR, self.plate, write_stage_images=False)
         self.min_width = min_width
         self.min_height = min_height
+        self.runner = BackgroundRunner()
         self._setup_ui()
     
     def _setup_ui(self):
@@ -51,10 +54,10 @@ class ImageEditorView(QStackedWidget):
         self.image_load_widget = ImageLoadWidget(self.controller, self.language)
         self.image_load_widget.imageImported.connect(self.on_image_imported)
 
-        self.image_threshold_widget = ImageThresholdWidget(self.controller, self.min_height, self.language)
+        self.image_threshold_widget = ImageThresholdWidget(self.controller, self.min_height, self.language, self.runner)
         self.image_threshold_widget.thresholdingFinalized.connect(self.on_thresholding_finalized)
 
-        self.image_feature_widget = ImageFeatureWidget(self.controller, self.min_height, self.language)
+        self.image_feature_widget = ImageFeatureWidget(self.controller, self.min_height, self.language, self.runner)
         self.image_feature_widget.featuresFinalized.connect(self.on_features_finalized)
 
         self.image_flat_widget = ImageFlatWidget(self.controller, self.min_height, self.language)
@@ -74,18 +77,32 @@ class ImageEditorView(QStackedWidget):
     def on_thresholding_finalized(self):
         """ Binary is finalized. """
         self.setCurrentIndex(EditorViews.FEATURES.value)
-        self.controller.extract_image_features()
-        self.image_feature_widget.update()
+        self.runner.run(self.controller.extract_image_features, self.on_features_extracted)
         logger.debug("Image thresholding finished.")
 
+    def on_features_extracted(self, success: bool):
+        """ Feature extraction finished in background. """
+        if success:
+            self.image_feature_widget.update()
+
     def on_features_finalized(self):
         """ Features are finalized. """
         self.setCurrentIndex(EditorViews.FLAT.value)
-        self.controller.get_flattened_contours()
-        self.controller.save_flattened_image()
-        self.image_flat_widget.update()
+        self.runner.run(
+            lambda: self.controller.get_flattened_contours() and self.controller.save_flattened_image(), 
+            self.on_flattened
+        )
         logger.debug("Image features finalized.")
 
+    def on_flattened(self, success: bool):
+        """ Flattened image was saved in background. """
+        if success:
+            self.image_flat_widget.update()
+
+    def shutdown(self):
+        """ Stop background worker. """
+        self.runner.shutdown()
+
     def on_flat_finalized(self):
         """ Flattened image finalized. """
         logger.debug("Image flattening finalized.")
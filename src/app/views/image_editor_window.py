@@ -54,6 +54,7 @@ class ImageEditorWindow(QMainWindow):
 
     def closeEvent(self, event):
         """ Activated on self.close called. """
+        self.image_editor_view.shutdown()
         self.imageEditorClosed.emit()
         logger.debug("Closed image editor window.")
         super().closeEvent(event)
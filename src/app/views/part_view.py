@@ -3,30 +3,42 @@ Author: nagan319
 Date: 2024/06/10
 """
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QScrollArea, QMessageBox
+import os
+from typing import List, Union
+
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QScrollArea, QMessageBox, QProgressDialog, QApplication
 from .view_template import ViewTemplate
 from ..widgets.part_widget import PartWidget
+from ..widgets.background_runner import BackgroundRunner
 
-from ..controllers.part_controller import PartController
+from ..controllers.part_controller import PartController, PartImport
 
 from ..translations import part_view
 from ..logging import logger
 
 class PartView(ViewTemplate):
     """
-    View for handling imported parts. 
+    View for handling imported parts.
+    Files are parsed on a background thread, progress is delivered to the GUI thread through importProgress.
     """
-    def __init__(self, session, part_preview_dir: str, language: int, units: int):
+    importProgress = pyqtSignal(int, int, str, object)
+
+    def __init__(self, session, part_preview_dir: str, language: int, units: int, part_cache_dir: str = None):
         super().__init__()
 
         self.texts = part_view
         self.language = language
         self.units = units
 
-        self.controller = PartController(session, part_preview_dir)
-        self.controller.remove_all_with_previews()
+        self.controller = PartController(session, part_preview_dir, part_cache_dir)
         self.widget_map = {}
 
+        self.runner = BackgroundRunner("part-import-worker")
+        self.progress_dialog: Union[QProgressDialog, None] = None
+        self.importProgress.connect(self.on_import_progress)
+        QApplication.instance().aboutToQuit.connect(self._shutdown_import)
+
         self._setup_ui()
         logger.debug("Successfully initialized PartView.")
 
@@ -43,10 +55,14 @@ class PartView(ViewTemplate):
         self.import_button = QPushButton("Import Parts")
         self.import_button.pressed.connect(self.import_file)
 
+        self.import_folder_button = QPushButton(self.texts['folder_button_text'][self.language])
+        self.import_folder_button.pressed.connect(self.import_folder)
+
         import_button_wrapper = QWidget()
         import_button_wrapper_layout = QHBoxLayout()
         import_button_wrapper_layout.addStretch(2)
         import_button_wrapper_layout.addWidget(self.import_button, 1)
+        import_button_wrapper_layout.addWidget(self.import_folder_button, 1)
         import_button_wrapper_layout.addStretch(2)
         import_button_wrapper.setLayout(import_button_wrapper_layout)
 
@@ -62,43 +78,120 @@ class PartView(ViewTemplate):
 
     def import_file(self) -> None:
         """
-        Import file from selected filepath and create a new widget if valid.
+        Import files from selected filepaths and create new widgets for valid parts.
         """
-        file_path, _ = QFileDialog.getOpenFileName(self, "Select File", "", "STL Files (*.stl)")
-        
-        if file_path:
-            try:
-                part = self.controller.add_from_file(file_path)
-                
-                if part is not None:
-                    new_part_widget = PartWidget(
-                        part.id, 
-                        self.controller._get_preview_image_path(part.id), 
-                        self.language
-                    )
-                    new_part_widget.amountEdited.connect(self.on_amount_edited)
-                    new_part_widget.materialEdited.connect(self.on_material_edited)
-                    new_part_widget.deleteRequested.connect(self.on_delete_requested)
-                    self.scroll_layout.addWidget(new_part_widget)
-                    self.widget_map[part.id] = new_part_widget  
-                    self._update_button_amount()
-                    logger.debug(f"Part added successfully from {file_path}")
-
-                else:
-                    QMessageBox.warning(
-                        self, 
-                        self.texts['import_fail_title'][self.language], 
-                        self.texts['import_fail_text'][self.language]
-                    )
-                    logger.warning(f"Failed to import part from {file_path}")
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Select Files", "", "STL Files (*.stl)")
+        if file_paths:
+            self._import(file_paths)
+
+    def import_folder(self) -> None:
+        """
+        Import all STL files in selected folder and create new widgets for valid parts.
+        """
+        directory = QFileDialog.getExistingDirectory(self, "Select Folder")
+        if not directory:
+            return
+        file_paths = self.controller.get_directory_files(directory)
+        if file_paths is None:
+            self._show_import_error(f"{directory} does not exist.")
+            return
+        self._import(file_paths)
+
+    def _import(self, file_paths: List[str]) -> None:
+        """
+        Parse files on background thread while showing progress, parts are committed once parsing is done.
+        """
+        try:
+            batch = self.controller.prepare_import(file_paths, self.importProgress.emit)
+        except Exception as e:
+            self._show_import_error(str(e))
+            return
 
+        self.progress_dialog = QProgressDialog(self.texts['import_progress_text'][self.language], None, 0, batch.total, self)
+        self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+        self._set_import_enabled(False)
+
+        def parse_task() -> Union[str, None]:
+            ''' errors are returned so that the dialog is always closed on the GUI thread '''
+            try:
+                self.controller.parse_import(batch)
+                return None
             except Exception as e:
-                QMessageBox.critical(
-                    self, 
-                    self.texts['import_error_title'][self.language], 
-                    f"{self.texts['import_error_text'][self.language]}{str(e)}"
-                )
-                logger.error(f"Error importing file {file_path}: {str(e)}")
+                return str(e)
+
+        self.runner.run(parse_task, lambda error: self.on_import_parsed(batch, error))
+
+    def on_import_progress(self, done: int, total: int, file_path: str, error: Union[str, None]) -> None:
+        """ Show progress of running import. """
+        ''' setValue of modal dialog processes events, so the import may finish before the label is set '''
+        progress_dialog = self.progress_dialog
+        if progress_dialog is None:
+            return
+        progress_dialog.setMaximum(total)
+        progress_dialog.setValue(done)
+        progress_dialog.setLabelText(f"{self.texts['import_progress_text'][self.language]}{os.path.basename(file_path)}")
+
+    def on_import_parsed(self, batch: PartImport, error: Union[str, None]) -> None:
+        """ Commit parsed parts, then add widgets and report failed files. """
+        if self.progress_dialog is not None:
+            self.progress_dialog.close()
+            self.progress_dialog = None
+        self._set_import_enabled(True)
+
+        if error is not None:
+            self._show_import_error(error)
+            return
+        try:
+            parts, errors = self.controller.commit_import(batch)
+        except Exception as e:
+            self._show_import_error(str(e))
+            return
+
+        for part in parts:
+            self._add_part_widget(part)
+        self._update_button_amount()
+        logger.debug(f"Imported {len(parts)} parts successfully")
+
+        if errors:
+            QMessageBox.warning(
+                self, 
+                self.texts['import_fail_title'][self.language], 
+                self.texts['import_fail_text'][self.language] + "\n\n" + 
+                "\n".join(f"{os.path.basename(file_path)}: {error}" for file_path, error in errors.items())
+            )
+            logger.warning(f"Failed to import {len(errors)} files")
+
+    def _show_import_error(self, error: str) -> None:
+        QMessageBox.critical(
+            self,
+            self.texts['import_error_title'][self.language],
+            f"{self.texts['import_error_text'][self.language]}{error}"
+        )
+        logger.error(f"Error importing files: {error}")
+
+    def _set_import_enabled(self, enabled: bool) -> None:
+        """ Disable import buttons while an import is running. """
+        self.import_button.setEnabled(enabled)
+        self.import_folder_button.setEnabled(enabled)
+
+    def _shutdown_import(self) -> None:
+        """ Stop import thread and worker processes on exit. """
+        self.runner.shutdown()
+        self.controller.shutdown()
+
+    def _add_part_widget(self, part) -> None:
+        """ Create widget for imported part. """
+        new_part_widget = PartWidget(
+            part.id, 
+            self.controller._get_preview_image_path(part.id), 
+            self.language
+        )
+        new_part_widget.amountEdited.connect(self.on_amount_edited)
+        new_part_widget.materialEdited.connect(self.on_material_edited)
+        new_part_widget.deleteRequested.connect(self.on_delete_requested)
+        self.scroll_layout.addWidget(new_part_widget)
+        self.widget_map[part.id] = new_part_widget  
 
     def on_material_edited(self, part_id: str, new_val: str) -> None:
         """ Update material stored in db to reflect ui change. """
@@ -3,6 +3,9 @@ Author: nagan319
 Date: 2024/06/11
 """
 
+import os
+
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QScrollArea, QMessageBox, QLineEdit
 from .view_template import ViewTemplate
 from ..widgets.plate_widget import PlateWidget
@@ -12,6 +15,7 @@ from ..utils.input_parser import InputParser
 from ..utils.settings_enum import CONVERSION_FACTORS
 
 from ..controllers.plate_controller import PlateController
+from ..service.preview_service import PreviewService
 
 from ..translations import plate_view
 from ..logging import logger
@@ -19,21 +23,27 @@ from ..logging import logger
 class PlateView(ViewTemplate):
     """
     View for handling plates. 
+    If a preview service is given, previews are rendered in the background and widgets are updated once their preview is saved.
     """
-    def __init__(self, session, plate_preview_dir: str, language: int, units: int):
+    previewRendered = pyqtSignal(str)
+
+    def __init__(self, session, plate_preview_dir: str, language: int, units: int, preview_cache_dir: str = None, preview_service: PreviewService = None):
         super().__init__()
 
         self.texts = plate_view
         self.language = language
         self.units = units
 
-        self.controller = PlateController(session, plate_preview_dir, CONVERSION_FACTORS[self.units])
+        self.controller = PlateController(session, plate_preview_dir, CONVERSION_FACTORS[self.units], preview_cache_dir, preview_service)
         self.widget_map = {}
 
         self.image_editor_status = ImageEditorStatus()
 
         self._setup_ui()
         self.populate_plate_widgets()
+        if preview_service is not None:
+            self.previewRendered.connect(self.on_preview_rendered)
+            self.controller.save_all_previews(self._on_preview_saved)
         logger.debug("Successfully initialized PlateView.")
 
     def _setup_ui(self):
@@ -150,6 +160,18 @@ class PlateView(ViewTemplate):
             )
             logger.error(f"Error adding new plate: {str(e)}")
 
+    def _on_preview_saved(self, image_path: str, error: str):
+        """ Called by preview service from a worker thread, widget update is forwarded to the GUI thread. """
+        if error is None:
+            self.previewRendered.emit(image_path)
+
+    def on_preview_rendered(self, image_path: str) -> None:
+        """ Update preview of plate widget whose image was rendered. """
+        plate_id = os.path.splitext(os.path.basename(image_path))[0]
+        plate_widget = self.widget_map.get(plate_id)
+        if plate_widget is not None:
+            plate_widget.update_preview()
+
     def on_selection_changed(self) -> None:
         """ Changes selection status of all plates. """
         for plate_widget in self.widget_map.values():
@@ -3,11 +3,15 @@ Author: nagan319
 Date: 2024/06/12
 """
 
+import os
+
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QScrollArea, QMessageBox
 from .view_template import ViewTemplate
 from ..widgets.router_widget import RouterWidget
 
 from ..controllers.router_controller import RouterController
+from ..service.preview_service import PreviewService
 
 from ..utils.settings_enum import CONVERSION_FACTORS
 
@@ -17,19 +21,25 @@ from ..logging import logger
 class RouterView(ViewTemplate):
     """
     View for handling CNC routers. 
+    If a preview service is given, previews are rendered in the background and widgets are updated once their preview is saved.
     """
-    def __init__(self, session, part_preview_dir: str, language: int, units: int):
+    previewRendered = pyqtSignal(str)
+
+    def __init__(self, session, part_preview_dir: str, language: int, units: int, preview_cache_dir: str = None, preview_service: PreviewService = None):
         super().__init__()
 
         self.texts = router_view
         self.language = language
         self.units = units
 
-        self.controller = RouterController(session, part_preview_dir, CONVERSION_FACTORS[self.units])
+        self.controller = RouterController(session, part_preview_dir, CONVERSION_FACTORS[self.units], preview_cache_dir, preview_service)
         self.widget_map = {}
 
         self._setup_ui()
         self.populate_router_widgets() 
+        if preview_service is not None:
+            self.previewRendered.connect(self.on_preview_rendered)
+            self.controller.save_all_previews(self._on_preview_saved)
         logger.debug("Successfully initialized RouterView.")
 
     def _setup_ui(self):
@@ -118,6 +128,18 @@ class RouterView(ViewTemplate):
             )
             logger.error(f"Error adding new router: {str(e)}")
 
+    def _on_preview_saved(self, image_path: str, error: str):
+        """ Called by preview service from a worker thread, widget update is forwarded to the GUI thread. """
+        if error is None:
+            self.previewRendered.emit(image_path)
+
+    def on_preview_rendered(self, image_path: str) -> None:
+        """ Update preview of router widget whose image was rendered. """
+        router_id = os.path.splitext(os.path.basename(image_path))[0]
+        router_widget = self.widget_map.get(router_id)
+        if router_widget is not None:
+            router_widget.update_preview()
+
     def on_selection_changed(self) -> None:
         """ Changes selection status of all routers. """
         for router_widget in self.widget_map.values():
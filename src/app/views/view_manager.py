@@ -4,31 +4,63 @@ Date: 2024/06/10
 """
 
 from PyQt6.QtWidgets import QWidget, QStackedWidget
-from typing import List
+from typing import List, Union, Callable, Dict
 
 from ..logging import logger
 
 class ViewManager(QStackedWidget):
     """
     Viewer widget for switching between app views.
+    Views can be given as widgets or as factories returning a widget.
+    Factories are called the first time their view is shown, an empty placeholder is kept until then.
     """
-    def __init__(self, widgets: List[QWidget]):
+    def __init__(self, views: List[Union[QWidget, Callable[[], QWidget]]]):
         super().__init__()
 
-        self.amt_widgets = len(widgets)
+        self.amt_widgets = len(views)
+        self.view_factories: Dict[int, Callable[[], QWidget]] = {}
 
-        for widget in widgets:
-            self.addWidget(widget)
+        for i, view in enumerate(views):
+            if isinstance(view, QWidget):
+                self.addWidget(view)
+            else:
+                self.view_factories[i] = view
+                self.addWidget(QWidget())
 
         self.set_view(0)
 
     def set_view(self, i: int) -> bool:
-        """ Set view to given index. Returns false if index is invalid. """
+        """ Set view to given index, constructing view if necessary. Returns false if index is invalid or view could not be constructed. """
         if i < 0 or i >= self.amt_widgets:
             logger.error(f"Attempted to set app view to invalid index: {i}")
             return False
-        
+
+        if not self._construct_view(i):
+            return False
+
         self.setCurrentIndex(i)
         logger.debug(f"Set app view to index {i}")
         return True
-        
\ No newline at end of file
+
+    def is_constructed(self, i: int) -> bool:
+        """ Check whether view at given index has been constructed. """
+        return 0 <= i < self.amt_widgets and i not in self.view_factories
+
+    def _construct_view(self, i: int) -> bool:
+        """ Replace placeholder at given index with view created by its factory. Returns False if factory raises. """
+        factory = self.view_factories.get(i)
+        if factory is None:
+            return True
+        try:
+            view = factory()
+        except Exception as e:
+            logger.error(f"Encountered error while constructing app view at index {i}: {e}")
+            return False
+
+        placeholder = self.widget(i)
+        self.insertWidget(i, view)
+        self.removeWidget(placeholder)
+        placeholder.deleteLater()
+        del self.view_factories[i]
+        logger.debug(f"Constructed app view at index {i}")
+        return True
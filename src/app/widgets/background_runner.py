@@ -0,0 +1,50 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+from typing import Any, Callable, Union
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ..utils.latest_worker import LatestWorker
+
+from ..logging import logger
+
+class BackgroundRunner(QObject):
+    """
+    Runs tasks on a latest-wins background worker and calls their completion handler on the GUI thread.
+    Only the handler of the most recently submitted task is called, results of older tasks are dropped.
+    ### Parameters:
+    - name: name of worker thread.
+    """
+    _taskFinished = pyqtSignal(int, object, object)
+
+    def __init__(self, name: str = "image-editor-worker"):
+        super().__init__()
+        self.worker = LatestWorker(name)
+        self._handler: Union[Callable[[Any], None], None] = None
+        self._taskFinished.connect(self._on_task_finished)
+
+    def run(self, task: Callable[[], Any], on_finished: Callable[[Any], None] = None):
+        """ Run task in background, replacing any task that has not started yet. on_finished is called with task result. """
+        self._handler = on_finished
+        self.worker.submit(task, self._taskFinished.emit)
+
+    def wait(self, timeout: float = None) -> bool:
+        """ Wait until no task is running or pending. Returns False on timeout. """
+        return self.worker.wait(timeout)
+
+    def shutdown(self):
+        """ Stop worker thread, pending task is dropped. """
+        self.worker.shutdown(wait=False)
+
+    def _on_task_finished(self, generation: int, result: Any, error: Union[str, None]):
+        ''' result may have been queued before a newer task was submitted '''
+        if not self.worker.is_latest(generation):
+            return
+        if error is not None:
+            logger.error(f"Background task failed: {error}")
+            return
+        if self._handler is not None:
+            self._handler(result)
@@ -3,15 +3,20 @@ Author: nagan319
 Date: 2024/06/13
 """
 
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, pyqtSignal, QPoint, QRect
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel
-from PyQt6.QtGui import QPixmap
+from PyQt6.QtGui import QPixmap, QPainter
 
 from ..widgets.interactive_preview import InteractivePreview
+from .background_runner import BackgroundRunner
+from .image_utils import get_qimage
 
 import enum
+from typing import Union
 
 from ..controllers.image_editing_controller import ImageEditingController
+from ..utils.image_processing.features import Features
+from ..utils.image_processing.feature_renderer import FeatureRenderer
 
 from ..translations import image_feature_widget
 
@@ -22,10 +27,12 @@ class Mode(enum.Enum):
 class ImageFeatureWidget(QWidget):
     """
     Widget for extracting and managing image features.
+    Feature image is drawn in layers at display resolution. Base layer is drawn in the background once per extracted feature set,
+    edits only redraw and repaint the changed regions of the preview.
     """
     featuresFinalized = pyqtSignal()
 
-    def __init__(self, controller: ImageEditingController, min_height: int, language: int):
+    def __init__(self, controller: ImageEditingController, min_height: int, language: int, runner: BackgroundRunner = None):
         super().__init__()
 
         self.texts = image_feature_widget
@@ -33,7 +40,12 @@ class ImageFeatureWidget(QWidget):
 
         self.controller = controller
         self.min_height = min_height
+        self.runner = runner if runner is not None else BackgroundRunner()
         self.mode = None
+        self.renderer: Union[FeatureRenderer, None] = None
+        ''' feature set the renderer was created for, a new set is drawn from scratch '''
+        self.rendered_features: Union[Features, None] = None
+        self.preview_pixmap: Union[QPixmap, None] = None
         self._setup_ui()
 
     def _setup_ui(self):
@@ -95,8 +107,6 @@ class ImageFeatureWidget(QWidget):
         """ 
         Update all necessary widgets and parameters. 
         """
-        self.controller.save_image_features()
-
         amt_corners = len(self.controller.features.corners)
 
         ''' Update mode '''
@@ -111,8 +121,7 @@ class ImageFeatureWidget(QWidget):
         self.corner_counter.setText(f"{self.texts['corners_amt_text'][self.language]}{amt_corners}/4")
 
         ''' Update preview widget '''
-        pixmap = QPixmap(self.controller.feat_path).scaledToHeight(int(self.min_height * .75))
-        self.preview_widget.setPixmap(pixmap)
+        self._update_preview()
         
         ''' Update mode label '''
         mode_text = self.texts['add_corners_text'][self.language] \
@@ -120,6 +129,38 @@ class ImageFeatureWidget(QWidget):
                 self.texts['remove_excess_text'][self.language]
         self.mode_label.setText(mode_text)
 
+    def _update_preview(self):
+        """ Repaint regions of preview changed since last update, renderer is created in background for new feature sets. """
+        features = self.controller.features
+        if features is not self.rendered_features:
+            self.renderer = None
+            self.rendered_features = features
+            snapshot = features.copy()
+            display_height = int(self.min_height * .75)
+            self.runner.run(lambda: self.controller.get_feature_renderer(snapshot, display_height), self.on_renderer_ready)
+            return
+        if self.renderer is None:
+            return
+
+        rects = self.renderer.update_features(features)
+        if not rects:
+            return
+        image = get_qimage(self.renderer.get_image())
+        painter = QPainter(self.preview_pixmap)
+        for x, y, w, h in rects:
+            painter.drawImage(QPoint(x, y), image, QRect(x, y, w, h))
+        painter.end()
+        self.preview_widget.setPixmap(self.preview_pixmap)
+
+    def on_renderer_ready(self, renderer: FeatureRenderer):
+        """ Layers of latest feature set were drawn, edits made in the meantime are applied before showing. """
+        if renderer is None:
+            return
+        self.renderer = renderer
+        self.preview_pixmap = QPixmap.fromImage(get_qimage(renderer.get_image()))
+        self.preview_widget.setPixmap(self.preview_pixmap)
+        self._update_preview()
+
     def on_mouse_clicked(self, pos: tuple):
         """ User clicks on interactive preview. X needs to be adjusted slightly. """
         scale_factor = self.preview_widget.height() / self.controller.processing_resolution.h * 1.02
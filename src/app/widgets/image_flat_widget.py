@@ -8,6 +8,7 @@ from PyQt6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QPushButt
 from PyQt6.QtGui import QPixmap
 
 from ..controllers.image_editing_controller import ImageEditingController
+from .image_utils import get_qimage
 
 from ..translations import image_flat_widget
 
@@ -67,9 +68,10 @@ class ImageFlatWidget(QWidget):
         """
         Updates preview to display flattened contours.
         """
-        pixmap = QPixmap(self.controller.flat_path)
-        scaled_pixmap = pixmap.scaledToHeight(int(self.min_height * .75))
-        self.preview_widget.setPixmap(scaled_pixmap)
+        if self.controller.flat_image is None:
+            return
+        scaled_image = get_qimage(self.controller.flat_image).scaledToHeight(int(self.min_height * .75))
+        self.preview_widget.setPixmap(QPixmap.fromImage(scaled_image))
 
     def on_save_button_pressed(self):
         """ User presses save button. """
@@ -7,6 +7,11 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QSlider
 from PyQt6.QtGui import QPixmap
 
+import numpy as np
+
+from .background_runner import BackgroundRunner
+from .image_utils import get_qimage
+
 from ..controllers.image_editing_controller import ImageEditingController
 
 from ..translations import image_threshold_widget
@@ -14,6 +19,10 @@ from ..translations import image_threshold_widget
 class ImageThresholdWidget(QWidget):
     """
     Widget for applying binary threshold filter to image. 
+    Binary image is kept in memory while the slider is moved and only saved to disk when thresholding is finalized.
+    Thresholding runs in the background, intermediate slider values are skipped if they are superseded before being computed.
+    Previews are computed on a downscaled image sized to the display, full resolution is only used when saving.
+    Initial threshold is suggested automatically.
     """
     thresholdingFinalized = pyqtSignal()
 
@@ -21,7 +30,7 @@ class ImageThresholdWidget(QWidget):
     COLOR_MAX = 255
     COLOR_MID = (COLOR_MIN + COLOR_MAX)//2
 
-    def __init__(self, controller: ImageEditingController, min_height: int, language: int):
+    def __init__(self, controller: ImageEditingController, min_height: int, language: int, runner: BackgroundRunner = None):
         super().__init__()
 
         self.texts = image_threshold_widget
@@ -29,7 +38,11 @@ class ImageThresholdWidget(QWidget):
 
         self.controller = controller
         self.min_height = min_height
+        self.runner = runner if runner is not None else BackgroundRunner()
         self.threshold = self.COLOR_MID
+        self.display_height = int(self.min_height * .75)
+        ''' displayed QImage shares memory with this array, reference must be kept while image is in use '''
+        self.binary_image: np.ndarray = None
         self._setup_ui()
 
     def _setup_ui(self):
@@ -85,31 +98,63 @@ class ImageThresholdWidget(QWidget):
         """
         save_button_wrapper = QWidget()
         save_button_wrapper_layout = QHBoxLayout()
+        auto_button = QPushButton(self.texts['auto_button'][self.language])
+        auto_button.pressed.connect(self.on_auto_button_pressed)
         save_button = QPushButton(self.texts['save_button'][self.language])
         save_button.pressed.connect(self.on_save_button_pressed)
 
         save_button_wrapper_layout.addStretch(2)
+        save_button_wrapper_layout.addWidget(auto_button, 1)
         save_button_wrapper_layout.addWidget(save_button, 1)
         save_button_wrapper_layout.addStretch(2)
         save_button_wrapper.setLayout(save_button_wrapper_layout)
         return save_button_wrapper
 
     def _update_display(self):
-        pixmap = QPixmap(self.controller.bin_path)
-        scaled_pixmap = pixmap.scaledToHeight(int(self.min_height * .75))
-        self.preview_widget.setPixmap(scaled_pixmap)
+        scaled_image = get_qimage(self.binary_image).scaledToHeight(self.display_height)
+        self.preview_widget.setPixmap(QPixmap.fromImage(scaled_image))
     
     def public_update(self):
         """ External update method for when view is initialized. """
-        self.on_threshold_parameter_edited(self.COLOR_MID)
+        self.on_auto_button_pressed()
 
     def on_threshold_parameter_edited(self, value: int):
-        """ Save image with updated threshold value. """
+        """ Request displayed image to be updated with new threshold value. """
         self.threshold = value
-        self.controller.save_binary_image(self.threshold)
+        display_height = self.display_height
+        self.runner.run(lambda: self.controller.get_binary_image(value, display_height), self.on_binary_image_ready)
+
+    def on_binary_image_ready(self, binary_image: np.ndarray):
+        """ Binary image for latest threshold value was computed. """
+        if binary_image is None:
+            return
+        self.binary_image = binary_image
         self._update_display()
 
+    def on_auto_button_pressed(self):
+        """ Request threshold suggestion for imported image. """
+        self.runner.run(self.controller.suggest_threshold, self.on_threshold_suggested)
+
+    def on_threshold_suggested(self, threshold: int):
+        """ Move slider to suggested threshold, middle value is used if no suggestion is available. """
+        threshold = threshold if threshold is not None else self.COLOR_MID
+        if self.slider.value() == threshold:
+            self.on_threshold_parameter_edited(threshold)
+        else:
+            self.slider.setValue(threshold)
+
     def on_save_button_pressed(self):
-        """ User presses save button. """
-        self.controller.finalize_binary()
-        self.thresholdingFinalized.emit()
+        """ User presses save button. Binary image for current threshold is saved in the background. """
+        threshold = self.threshold
+        ''' controls are disabled so the save task cannot be superseded by a new threshold '''
+        self.setEnabled(False)
+        self.runner.run(
+            lambda: self.controller.get_binary_image(threshold) is not None and self.controller.finalize_binary(), 
+            self.on_binary_finalized
+        )
+
+    def on_binary_finalized(self, success: bool):
+        """ Binary image was saved. """
+        self.setEnabled(True)
+        if success:
+            self.thresholdingFinalized.emit()
@@ -0,0 +1,16 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import numpy as np
+from PyQt6.QtGui import QImage
+
+def get_qimage(image: np.ndarray) -> QImage:
+    """
+    QImage sharing memory with grayscale or BGR image array.
+    Array must be kept alive and unmodified while the QImage is in use.
+    """
+    height, width = image.shape[:2]
+    image_format = QImage.Format.Format_Grayscale8 if image.ndim == 2 else QImage.Format.Format_BGR888
+    return QImage(image.data, width, height, image.strides[0], image_format)
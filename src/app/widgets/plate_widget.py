@@ -12,7 +12,6 @@ from ..controllers.plate_controller import PlateController
 from ..utils.input_parser import InputParser
 from ..utils.settings_enum import CONVERSION_FACTORS
 
-from ..views.image_editor_window import ImageEditorWindow
 from ..utils.image_processing.image_editor_status import ImageEditorStatus
 from ..translations import plate_widget
 from ..logging import logger
@@ -188,6 +187,8 @@ class PlateWidget(QWidget):
                 self.texts['img_editor_initialized_text'][self.language]
             )
             return
+        ''' image editor depends on OpenCV, loaded when first opened '''
+        from ..views.image_editor_window import ImageEditorWindow
         self.image_editor_status.initialized = True
         self.image_editor_window = ImageEditorWindow(self.controller.session, plate, self.language)
         self.image_editor_window.imageEditorClosed.connect(self.on_image_editor_closed)
@@ -49,7 +49,23 @@ if not os.path.exists(LAYOUT_PREVIEW_DIR):
 
 LAYOUT_PREVIEW_PATH  = os.path.join(LAYOUT_PREVIEW_DIR, 'layout.png')
 
-TEMP_DIRS = [IMAGE_PREVIEW_DIR, PART_PREVIEW_DIR, PLATE_PREVIEW_DIR, ROUTER_PREVIEW_DIR, LAYOUT_PREVIEW_DIR]
+''' previews of nesting service jobs are kept between sessions '''
+LAYOUT_JOB_PREVIEW_DIR = os.path.join(CACHE_DIR, 'layout jobs')
+if not os.path.exists(LAYOUT_JOB_PREVIEW_DIR):
+    os.makedirs(LAYOUT_JOB_PREVIEW_DIR)
+
+''' parsed parts are reused between sessions, keyed by file content hash '''
+PART_CACHE_DIR = os.path.join(CACHE_DIR, 'part cache')
+if not os.path.exists(PART_CACHE_DIR):
+    os.makedirs(PART_CACHE_DIR)
+
+''' plate and router previews are rendered again only when their inputs change '''
+PREVIEW_CACHE_DIR = os.path.join(CACHE_DIR, 'preview cache')
+if not os.path.exists(PREVIEW_CACHE_DIR):
+    os.makedirs(PREVIEW_CACHE_DIR)
+
+''' plate and router previews are kept between sessions '''
+TEMP_DIRS = [IMAGE_PREVIEW_DIR, PART_PREVIEW_DIR, LAYOUT_PREVIEW_DIR]
 
 USER_SETTINGS_PATH = os.path.join(DATA_DIR, 'user_settings.json')
 
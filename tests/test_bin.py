@@ -43,6 +43,15 @@ def test_get_area(default_bin, placed_pieces):
     assert bin.get_occupied_area() == placed_pieces[0].get_area()
     assert bin.get_empty_area() == default_bin.dimension.width * default_bin.dimension.height - placed_pieces[0].get_area()
 
+def test_set_free_space():
+    bin = Bin('id', Dimension2D(100, 100), edge_distance=5)
+    # rectangles left and right of an existing contour spanning x 40-60
+    bin.set_free_space([Rectangle2D(0, 0, 40, 100), Rectangle2D(60, 0, 40, 100)], 8000, margin=2)
+    assert [(r.min_x, r.min_y, r.max_x, r.max_y) for r in bin.free_rectangles] == [(5, 5, 38, 95), (62, 5, 95, 95)]
+    assert bin.get_empty_area() == 8000
+    bin.pack([Area2D(id='id', shape=Rectangle2D(0, 0, 20, 20))])
+    assert bin.get_empty_area() == 8000 - 400
+
 """ Tests for update_rectangles """
 
 def test_update_rectangles_all_four(test_preview_directory):
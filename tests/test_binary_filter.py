@@ -7,7 +7,7 @@ import os
 import numpy as np
 import cv2
 import pytest
-from src.app.utils.image_processing.binary_filter import BinaryFilter
+from src.app.utils.image_processing.binary_filter import BinaryFilter, ThresholdMethod, MIN_PYRAMID_HEIGHT
 import tempfile
 
 """
@@ -16,6 +16,9 @@ Tests for binary filter.
 Test coverage:
 - errors in case of invalid input threshold values
 - image saves correctly
+- cached preprocessing stage gives same result as full filter
+- image pyramid levels halve resolution
+- automatic threshold suggestion on full and downscaled image
 """
 
 @pytest.fixture
@@ -71,3 +74,32 @@ def test_binary_filter_save_image(setup_binary_filter):
     original_image = cv2.imread(src_path)
     saved_image = cv2.imread(dst_path)
     assert original_image.shape == saved_image.shape
+
+def test_binary_filter_cached_stages(setup_binary_filter):
+    src_path, dst_path, threshold = setup_binary_filter
+    BinaryFilter(src_path, dst_path, threshold).save_image()
+
+    blurred_image = BinaryFilter.get_blurred_grayscale(cv2.imread(src_path, cv2.IMREAD_COLOR))
+    binary_image = BinaryFilter.apply_threshold(blurred_image, threshold)
+    assert np.array_equal(binary_image, cv2.imread(dst_path, cv2.IMREAD_GRAYSCALE))
+
+def test_binary_filter_pyramid(src_path):
+    blurred_image = BinaryFilter.get_blurred_grayscale(cv2.imread(src_path, cv2.IMREAD_COLOR))
+    pyramid = BinaryFilter.get_pyramid(blurred_image)
+    assert pyramid[0] is blurred_image
+    assert len(pyramid) > 1
+    for larger, smaller in zip(pyramid, pyramid[1:]):
+        assert smaller.shape == ((larger.shape[0] + 1) // 2, (larger.shape[1] + 1) // 2)
+    assert pyramid[-1].shape[0] >= MIN_PYRAMID_HEIGHT
+
+    preview = BinaryFilter.apply_threshold(pyramid[1], 127, 0.5)
+    assert preview.shape == pyramid[1].shape
+    assert set(np.unique(preview)) <= {0, 255}
+
+def test_binary_filter_suggest_threshold(src_path):
+    blurred_image = BinaryFilter.get_blurred_grayscale(cv2.imread(src_path, cv2.IMREAD_COLOR))
+    pyramid = BinaryFilter.get_pyramid(blurred_image)
+    for method in ThresholdMethod:
+        assert 0 < BinaryFilter.suggest_threshold(pyramid[-1], method) < 255
+    otsu_threshold = BinaryFilter.suggest_threshold(pyramid[0], ThresholdMethod.OTSU)
+    assert abs(BinaryFilter.suggest_threshold(pyramid[-1], ThresholdMethod.OTSU) - otsu_threshold) <= 5
@@ -0,0 +1,125 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import pytest
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.app.database import Base
+from src.app.models.plate_model import Plate
+from src.app.models.utils import deserialize_array_list
+from src.app.service.digitization_service import DigitizationService, DigitizationTask, digitize_photo
+
+"""
+Tests for DigitizationService.
+
+Test coverage:
+    - Initialization
+        - invalid amount of workers
+    - Task creation
+        - photos matched to plates by file name
+        - manifest rows use existing plates or create new ones, invalid manifest rejected
+    - Digitization
+        - photo with four detectable corners flattened to plate dimensions
+        - photo without four detectable corners sent to review
+        - contours saved to plates, review queue written, missing plates and images reported
+"""
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test data', 'images')
+''' four corners are detected automatically in the first photo but not in the second '''
+DETECTABLE_IMAGE = os.path.join(IMAGE_DIR, 'image5.jpeg')
+UNDETECTABLE_IMAGE = os.path.join(IMAGE_DIR, 'image11.jpeg')
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Plate(id="plate-a", x=1000.0, y=800.0, z=6.0))
+    session.add(Plate(id="plate-b", x=500.0, y=500.0, z=6.0))
+    session.commit()
+    yield session
+    session.close()
+
+def test_invalid_workers(session):
+    with pytest.raises(ValueError):
+        DigitizationService(session, workers=0)
+
+def test_tasks_from_folder(session, temp_dir):
+    shutil.copy(DETECTABLE_IMAGE, os.path.join(temp_dir, "plate-a.jpeg"))
+    shutil.copy(DETECTABLE_IMAGE, os.path.join(temp_dir, "unknown-plate.jpeg"))
+    open(os.path.join(temp_dir, "plate-b.txt"), 'w').close()
+    tasks = DigitizationService(session).tasks_from_folder(temp_dir)
+    assert tasks == [DigitizationTask(os.path.join(temp_dir, "plate-a.jpeg"), "plate-a")]
+    with pytest.raises(FileNotFoundError):
+        DigitizationService(session).tasks_from_folder(os.path.join(temp_dir, "missing"))
+
+def test_tasks_from_manifest(session, temp_dir):
+    manifest_path = os.path.join(temp_dir, "manifest.csv")
+    with open(manifest_path, 'w') as manifest:
+        manifest.write("image,plate_id,x,y,z,material\n")
+        manifest.write("first.jpeg,plate-b,,,,\n")
+        manifest.write("second.jpeg,,1200,600,3,Steel\n")
+    tasks = DigitizationService(session).tasks_from_manifest(manifest_path)
+    assert tasks[0] == DigitizationTask(os.path.join(temp_dir, "first.jpeg"), "plate-b")
+    new_plate = session.get(Plate, tasks[1].plate_id)
+    assert (new_plate.x, new_plate.y, new_plate.z, new_plate.material) == (1200, 600, 3, "Steel")
+
+    with open(manifest_path, 'w') as manifest:
+        manifest.write("image,plate_id,x,y,z,material\n")
+        manifest.write("third.jpeg,,-5,600,3,Steel\n")
+    with pytest.raises(ValueError):
+        DigitizationService(session).tasks_from_manifest(manifest_path)
+    assert session.query(Plate).count() == 3
+
+def test_digitize_photo():
+    contours, threshold, error = digitize_photo(DETECTABLE_IMAGE, (1000, 800))
+    assert error is None
+    assert 0 < threshold < 255
+    assert len(contours) > 0
+    points = np.concatenate(contours).reshape(-1, 2)
+    assert points.dtype == np.int32
+    assert points.min() >= -10 and points[:, 0].max() <= 1010 and points[:, 1].max() <= 810
+
+    contours, threshold, error = digitize_photo(UNDETECTABLE_IMAGE, (1000, 800))
+    assert contours is None and threshold is None
+    assert "four plate corners" in error
+
+    assert digitize_photo(os.path.join(IMAGE_DIR, "missing.jpeg"), (1000, 800))[2] is not None
+
+def test_digitize(session, temp_dir):
+    tasks = [
+        DigitizationTask(DETECTABLE_IMAGE, "plate-a"),
+        DigitizationTask(UNDETECTABLE_IMAGE, "plate-b"),
+        DigitizationTask(DETECTABLE_IMAGE, "missing-plate"),
+        DigitizationTask(os.path.join(temp_dir, "missing.jpeg"), "plate-b"),
+    ]
+    progress = []
+    results = DigitizationService(session, workers=2).digitize(tasks, lambda *args: progress.append(args))
+    assert [result.image_path for result in results] == [task.image_path for task in tasks]
+    assert [result.error is None for result in results] == [True, False, False, False]
+    assert progress[-1] == (4, 4)
+
+    saved_contours = deserialize_array_list(session.get(Plate, "plate-a").contours)
+    assert len(saved_contours) == len(results[0].contours)
+    assert all(np.array_equal(saved, result) for saved, result in zip(saved_contours, results[0].contours))
+    assert session.get(Plate, "plate-b").contours is None
+
+    review_path = os.path.join(temp_dir, "review_queue.json")
+    assert DigitizationService.save_review_queue(results, review_path) == 3
+    with open(review_path) as file:
+        review = json.load(file)
+    assert [item['plate_id'] for item in review] == ["plate-b", "missing-plate", "plate-b"]
+    assert all(item['reason'] for item in review)
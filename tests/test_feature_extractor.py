@@ -6,6 +6,7 @@ Date: 2024/06/07
 import os
 from typing import Tuple
 import numpy as np
+import cv2
 
 import pytest
 from pytest import raises
@@ -18,7 +19,14 @@ Tests for FeatureExtractor class.
 
 Test coverage:
     Initialization:
+        - binary image array gives same features as image file, invalid array rejected
 
+    Contour extraction:
+        - plate outline, holes and contours nested in holes kept, objects outside plate and small contours discarded
+    Corner detection:
+        - turning angles of square contour
+        - one peak per run of sharp angles, including runs wrapping around contour start
+        - corners of rectangle found, refinement to quadrilateral
 """
 
 @pytest.fixture
@@ -41,6 +49,16 @@ def test_init_invalid_filetype(invalid_filetype):
     with raises(ValueError):
         FeatureExtractor(invalid_filetype, Size(100, 100))
 
+def test_init_from_array(bin_img_path):
+    image = cv2.imread(bin_img_path, cv2.IMREAD_GRAYSCALE)
+    from_file = FeatureExtractor(bin_img_path, Size(1000, 2000)).features
+    from_array = FeatureExtractor(image, Size(1000, 2000)).features
+    assert np.array_equal(from_file.plate_contour, from_array.plate_contour)
+    assert len(from_file.other_contours) == len(from_array.other_contours)
+    assert from_file.corners == from_array.corners
+    with raises(ValueError):
+        FeatureExtractor(cv2.cvtColor(image, cv2.COLOR_GRAY2BGR), Size(1000, 2000))
+
 def test_plate_contour_extraction(bin_img_path):
     extractor = FeatureExtractor(bin_img_path, Size(1000, 2000))
     assert len(extractor.features.plate_contour) > 1000 
@@ -55,3 +73,52 @@ def test_corner_extraction(bin_img_path):
     extractor = FeatureExtractor(bin_img_path, Size(1000, 2000))
     assert len(extractor.features.corners) == 3 
     assert isinstance(extractor.features.corners[0], tuple) 
+
+def test_contour_hierarchy():
+    image = np.zeros((1000, 1000), dtype=np.uint8)
+    cv2.rectangle(image, (200, 200), (800, 800), 255, -1)
+    cv2.rectangle(image, (300, 300), (500, 500), 0, -1)
+    cv2.rectangle(image, (350, 350), (450, 450), 255, -1)
+    cv2.rectangle(image, (600, 600), (700, 700), 0, -1)
+    cv2.rectangle(image, (610, 610), (615, 615), 255, -1)
+    cv2.rectangle(image, (20, 400), (120, 500), 255, -1)
+    cv2.rectangle(image, (900, 400), (980, 500), 255, -1)
+    cv2.rectangle(image, (820, 300), (880, 380), 255, -1)
+
+    extractor = FeatureExtractor.__new__(FeatureExtractor)
+    plate_contour, other_contours = extractor._get_contours(image, Size(1000, 1000))
+    assert cv2.boundingRect(plate_contour) == (200, 200, 601, 601)
+    assert sorted(cv2.boundingRect(contour)[:2] for contour in other_contours) == [(299, 299), (350, 350), (599, 599)]
+
+    plate_contour, other_contours = extractor._get_contours(np.zeros((1000, 1000), dtype=np.uint8), Size(1000, 1000))
+    assert plate_contour is None and other_contours is None
+
+@pytest.fixture
+def rectangle_contour():
+    image = np.zeros((2000, 2000), dtype=np.uint8)
+    cv2.rectangle(image, (200, 200), (1700, 1500), 255, -1)
+    contours, _ = cv2.findContours(image, cv2.RETR_TREE, cv2.CHAIN_APPROX_NONE)
+    return contours[0]
+
+def test_turning_angles():
+    square = np.array([(x, 0) for x in range(10)] + [(10, y) for y in range(10)] + [(x, 10) for x in range(10, 0, -1)] + [(0, y) for y in range(10, 0, -1)])
+    angles = FeatureExtractor._get_turning_angles(square, 1)
+    assert np.allclose(angles[[0, 10, 20, 30]], 90)
+    assert np.allclose(np.delete(angles, [0, 10, 20, 30]), 0)
+
+def test_angle_peaks():
+    angles = np.array([70, 10, 10, 65, 80, 70, 10, 75, 90])
+    assert FeatureExtractor._get_angle_peaks(angles, 60) == [4, 8]
+    assert FeatureExtractor._get_angle_peaks(angles, 95) == []
+    assert FeatureExtractor._get_angle_peaks(np.full(5, 90.0), 60) == [0]
+
+def test_rectangle_corners(rectangle_contour):
+    extractor = FeatureExtractor.__new__(FeatureExtractor)
+    extractor.refine_corners = False
+    corners = extractor._get_corners(rectangle_contour)
+    expected = {(200, 200), (1700, 200), (1700, 1500), (200, 1500)}
+    assert all(isinstance(corner, tuple) for corner in corners)
+    assert set(corners) == expected
+
+    extractor.refine_corners = True
+    assert sorted(extractor._get_corners(rectangle_contour)) == sorted(expected)
@@ -0,0 +1,79 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import pytest
+import numpy as np
+
+from src.app.utils.image_processing.features import Features
+from src.app.utils.image_processing.feature_index import FeatureIndex
+
+"""
+Tests for FeatureIndex class.
+
+Test Coverage:
+    - Initialization
+        - Test empty features
+    - Nearest corner
+        - Test nearest corner within distance returned, None outside distance
+    - Nearest contour
+        - Test matches brute force search over all points
+        - Test removed contour skipped, following indices shifted
+    - Corner updates
+        - Test added and removed corners
+    - Current check
+        - Test replaced or externally modified features detected
+"""
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(0)
+    contours = [rng.integers(0, 1000, size=(rng.integers(1, 300), 1, 2)) for _ in range(20)]
+    return Features(other_contours=contours, corners=[(100, 100), (900, 100), (900, 900)])
+
+def test_empty_features():
+    index = FeatureIndex(Features())
+    assert index.nearest_corner((0, 0), 100) is None
+    assert index.nearest_contour((0, 0), 100) is None
+
+def test_nearest_corner(features):
+    index = FeatureIndex(features)
+    assert index.nearest_corner((880, 120), 100) == 1
+    assert index.nearest_corner((500, 500), 100) is None
+
+def test_nearest_contour(features):
+    index = FeatureIndex(features)
+    rng = np.random.default_rng(1)
+    for point in rng.uniform(0, 1000, size=(200, 2)):
+        distances = [np.min(np.hypot(*(contour.reshape(-1, 2) - point).T)) for contour in features.other_contours]
+        expected = int(np.argmin(distances)) if min(distances) < 50 else None
+        assert index.nearest_contour(tuple(point), 50) == expected
+
+def test_remove_contour():
+    features = Features(other_contours=[np.array([[[0, 0]]]), np.array([[[10, 0]]]), np.array([[[20, 0]]])])
+    index = FeatureIndex(features)
+    del features.other_contours[1]
+    index.remove_contour(1)
+    assert index.nearest_contour((11, 0), 5) is None
+    assert index.nearest_contour((11, 0), 100) == 1
+    assert index.nearest_contour((19, 0), 5) == 1
+    assert index.is_current(features)
+
+def test_corner_updates(features):
+    index = FeatureIndex(features)
+    features.corners.append((100, 900))
+    index.add_corner((100, 900))
+    assert index.nearest_corner((110, 890), 100) == 3
+    del features.corners[0]
+    index.remove_corner(0)
+    assert index.nearest_corner((110, 890), 100) == 2
+    assert index.nearest_corner((100, 100), 100) is None
+    assert index.is_current(features)
+
+def test_is_current(features):
+    index = FeatureIndex(features)
+    assert index.is_current(features)
+    assert not index.is_current(features.copy())
+    features.corners.append((0, 0))
+    assert not index.is_current(features)
@@ -22,6 +22,10 @@ Test coverage:
     - Save features
         Image saves correctly
         Correct image resolution
+    - Get image
+        Scaled image resolution and feature positions
+        Invalid scale
+        Batched drawing matches drawing each point and corner separately, selected elements drawn on top
 """
 
 @pytest.fixture
@@ -64,3 +68,42 @@ def test_save_features(temp_dir):
     image = cv2.imread(dst_path)
     assert image.shape[1] == size.w
     assert image.shape[0] == size.h
+
+def test_get_scaled_image():
+    colors = Colors(bg_col=(100, 100, 100), ctr_col=(33, 33, 33))
+    features = Features(
+        plate_contour=np.array([[[100, 200]], [[200, 200]], [[200, 300]], [[100, 300]]]), 
+        other_contours=[np.array([[[400, 500]], [[500, 500]], [[500, 600]], [[400, 600]]])], 
+        corners=[(150, 250)])
+    image = FeaturePlotter("test_dst_path", Size(1000, 800), features, colors, scale=0.5).get_image()
+    assert image.shape == (400, 500, 3)
+    assert tuple(image[250, 200]) == (33, 33, 33)
+    assert tuple(image[125, 75 + 4]) == colors.corner_color
+
+    with pytest.raises(ValueError):
+        FeaturePlotter("test_dst_path", Size(1000, 800), features, colors, scale=0)
+
+def test_matches_per_point_drawing():
+    colors = Colors(bg_col=(100, 100, 100), ctr_col=(33, 33, 33))
+    plate = np.array([[[100, 200]], [[200, 200]], [[200, 300]], [[100, 300]]])
+    others = [np.array([[[400, 500]], [[500, 500]], [[500, 600]], [[400, 600]]]), np.array([[[700, 100]], [[750, 120]], [[999, 799]]])]
+    corners = [(150, 250), (450, 550), (0, 0)]
+    features = Features(plate_contour=plate, other_contours=others, corners=corners, selected_contour_idx=1, selected_corner_idx=1)
+    image = FeaturePlotter("test_dst_path", Size(1000, 800), features, colors).get_image()
+
+    expected = np.zeros((800, 1000, 3), dtype=np.uint8)
+    expected[:, :] = colors.background_color
+    for point in plate.reshape(-1, 2):
+        cv2.circle(expected, tuple(int(v) for v in point), 1, colors.plate_color, -1)
+    for idx in (0, 1):
+        color = colors.selected_element_color if idx == 1 else colors.contour_color
+        for point in others[idx].reshape(-1, 2):
+            cv2.circle(expected, tuple(int(v) for v in point), 1, color, -1)
+    for idx, corner in enumerate(corners):
+        color = colors.selected_element_color if idx == 1 else colors.corner_color
+        cv2.circle(expected, corner, FeaturePlotter.CORNER_RADIUS, color, FeaturePlotter.CORNER_THICKNESS)
+        cv2.circle(expected, corner, FeaturePlotter.CORNER_THICKNESS, color, FeaturePlotter.CORNER_THICKNESS)
+
+    assert np.array_equal(image, expected)
+    assert tuple(image[120, 750]) == colors.selected_element_color
+    assert tuple(image[550, 450 + FeaturePlotter.CORNER_RADIUS]) == colors.selected_element_color
@@ -0,0 +1,94 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import pytest
+import numpy as np
+
+from src.app.utils.image_processing.utils import Size, Colors
+from src.app.utils.image_processing.features import Features
+from src.app.utils.image_processing.feature_plotter import FeaturePlotter
+from src.app.utils.image_processing.feature_renderer import FeatureRenderer
+
+"""
+Tests for FeatureRenderer class.
+
+Test Coverage:
+    - Initialization
+        - Test image matches FeaturePlotter image
+    - Update features
+        - Test image matches FeaturePlotter image after selections, corner edits and contour removals
+        - Test only regions of changed elements reported, nothing reported without changes
+        - Test added contours redraw whole image
+        - Test features passed to renderer are copied
+"""
+
+SIZE = Size(1000, 800)
+
+def square(x: int, y: int, side: int) -> np.ndarray:
+    points = [(x + i, y) for i in range(side)] + [(x + side, y + i) for i in range(side)] + \
+        [(x + side - i, y + side) for i in range(side)] + [(x, y + side - i) for i in range(side)]
+    return np.array(points, dtype=np.int32).reshape(-1, 1, 2)
+
+@pytest.fixture
+def features():
+    return Features(
+        plate_contour=square(50, 50, 900),
+        other_contours=[square(100 + 80 * i, 100 + 60 * (i % 5), 40) for i in range(10)],
+        corners=[(50, 50), (950, 50), (950, 750)])
+
+def plotted(features: Features, scale: float) -> np.ndarray:
+    return FeaturePlotter(None, SIZE, features, Colors(), scale).get_image()
+
+@pytest.mark.parametrize("scale", [1.0, 0.3])
+def test_init(features, scale):
+    renderer = FeatureRenderer(SIZE, features, scale=scale)
+    assert np.array_equal(renderer.get_image(), plotted(features, scale))
+
+@pytest.mark.parametrize("scale", [1.0, 0.3])
+def test_update_features(features, scale):
+    renderer = FeatureRenderer(SIZE, features, scale=scale)
+    edits = [
+        lambda: setattr(features, 'selected_contour_idx', 3),
+        lambda: features.corners.append((100, 700)),
+        lambda: setattr(features, 'selected_corner_idx', 1),
+        lambda: features.other_contours.pop(3),
+        lambda: setattr(features, 'selected_contour_idx', 5),
+        lambda: features.corners.pop(1),
+        lambda: setattr(features, 'selected_corner_idx', None),
+        lambda: features.other_contours.pop(0),
+    ]
+    for edit in edits:
+        edit()
+        renderer.update_features(features)
+        assert np.array_equal(renderer.get_image(), plotted(features, scale))
+
+def test_dirty_regions(features):
+    renderer = FeatureRenderer(SIZE, features)
+    assert renderer.update_features(features) == []
+
+    features.selected_contour_idx = 2
+    rects = renderer.update_features(features)
+    assert len(rects) == 1
+    x, y, w, h = rects[0]
+    assert (x, y) == (259, 219) and w <= 45 and h <= 45
+
+    features.selected_contour_idx = None
+    features.selected_corner_idx = 0
+    rects = renderer.update_features(features)
+    assert len(rects) == 3
+    assert all(w * h < 200 * 200 for _, _, w, h in rects)
+
+def test_added_contour(features):
+    renderer = FeatureRenderer(SIZE, features)
+    features.other_contours.append(square(600, 600, 50))
+    assert renderer.update_features(features) == [(0, 0, SIZE.w, SIZE.h)]
+    assert np.array_equal(renderer.get_image(), plotted(features, 1.0))
+
+def test_features_copied(features):
+    renderer = FeatureRenderer(SIZE, features)
+    image = renderer.get_image().copy()
+    features.corners.append((500, 500))
+    features.other_contours.pop()
+    assert np.array_equal(renderer.get_image(), image)
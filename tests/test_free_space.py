@@ -0,0 +1,34 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import numpy as np
+from src.app.utils.packing.free_space import get_free_rectangles, get_largest_rectangle
+from src.app.utils.packing.utils.rectangle2d import Rectangle2D
+
+def test_empty_plate():
+    free_rectangles = get_free_rectangles(100, 50, [])
+    assert free_rectangles == [Rectangle2D(0, 0, 100, 50)]
+
+def test_single_contour():
+    contour = np.array([[[10, 10]], [[30, 10]], [[30, 20]], [[10, 20]]])
+    free_rectangles = get_free_rectangles(100, 50, [contour])
+    assert sum(rectangle.area for rectangle in free_rectangles) == 100 * 50 - 20 * 10
+    for rectangle in free_rectangles:
+        assert not rectangle.intersects(Rectangle2D(10, 10, 20, 10))
+
+def test_partially_overlapping_contours():
+    contours = [
+        np.array([[0, 0], [60, 0], [60, 30], [0, 30]]),
+        np.array([[40, 20], [100, 20], [100, 50], [40, 50]])
+    ]
+    free_rectangles = get_free_rectangles(100, 50, contours)
+    assert sum(rectangle.area for rectangle in free_rectangles) == 100 * 50 - 60 * 30 - 60 * 30 + 20 * 10
+    for rectangle in free_rectangles:
+        assert rectangle.min_x >= 0 and rectangle.max_x <= 100
+        assert rectangle.min_y >= 0 and rectangle.max_y <= 50
+
+def test_largest_rectangle():
+    assert get_largest_rectangle([]) is None
+    assert get_largest_rectangle([Rectangle2D(0, 0, 1, 1), Rectangle2D(0, 0, 2, 3)]) == Rectangle2D(0, 0, 2, 3)
@@ -50,6 +50,9 @@ Test coverage:
     - Get image preview path of item
         - Test that preview path == preview directory + id.png
         - Test null input
+    - Save preview
+        - Test background renders finished in reverse order keep newest image
+        - Test background render finished after newer inline render dropped
 """
 
 Base = declarative_base()
@@ -299,3 +302,49 @@ def test_get_image_preview_path_null_value(controller, session):
     with raises(ValueError):
         controller._get_preview_image_path(None) 
         controller._get_preview_image_path("") 
+
+class TextJob:
+    def __init__(self, text):
+        self.text = text
+
+    def render(self, dst_path):
+        with open(dst_path, 'w') as f:
+            f.write(self.text)
+        return dst_path
+
+class ManualPreviewService:
+    def __init__(self):
+        self.requests = []
+
+    def submit(self, job, dst_path, callback=None):
+        self.requests.append((job, dst_path, callback))
+
+    def finish(self, index):
+        job, dst_path, callback = self.requests[index]
+        callback(job.render(dst_path), None)
+
+def test_save_preview_jobs_finished_in_reverse_order(session, temp_dir):
+    service = ManualPreviewService()
+    controller = GenericController(session, SampleTable, temp_dir, preview_service=service)
+    image_path = controller._get_preview_image_path("id")
+    calls = []
+    controller._save_cached_preview(image_path, TextJob("old"), callback=lambda *args: calls.append(args))
+    controller._save_cached_preview(image_path, TextJob("new"), callback=lambda *args: calls.append(args))
+    service.finish(1)
+    service.finish(0)
+    with open(image_path) as f:
+        assert f.read() == "new"
+    assert calls == [(image_path, None)]
+    assert os.listdir(temp_dir) == ["id.png"]
+
+def test_save_preview_inline_after_background_request(session, temp_dir):
+    service = ManualPreviewService()
+    controller = GenericController(session, SampleTable, temp_dir, preview_service=service)
+    image_path = controller._get_preview_image_path("id")
+    calls = []
+    controller._save_cached_preview(image_path, TextJob("background"), callback=lambda *args: calls.append(args))
+    controller._save_cached_preview(image_path, TextJob("inline"))
+    service.finish(0)
+    with open(image_path) as f:
+        assert f.read() == "inline"
+    assert calls == []
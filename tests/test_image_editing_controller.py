@@ -8,14 +8,17 @@ import pytest
 from pytest import raises
 import tempfile
 import numpy as np
+import cv2
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from src.app.models.utils import deserialize_array_list
 from src.app.utils.image_processing.features import Features
 from src.app.utils.image_processing.utils import Size
+from src.app.utils.image_processing.matrix_generator import MatrixGenerator
 from src.app.models.plate_model import Plate, PlateConstants
 from src.app.controllers.image_editing_controller import ImageEditingController, EditorState
+from src.app.utils.image_processing.binary_filter import ThresholdMethod
 
 """
 Tests for ImageController class.
@@ -34,20 +37,32 @@ Test Coverage:
         - successful import
         - correct state transition
         - correct resizing logic
-    Saving binary image:
+    Getting binary image:
         - attempt in wrong state
         - invalid threshold values
-        - successful save
+        - in-memory binary image matches saved image, blurred image reused, nothing written before finalization
+        - downscaled previews sized to display, threshold suggestion
         - correct state transition
+        - finalization without binary image rejected
     Extracting image features:
         - attempt in wrong state
+        - binary image saved to directory not read back if none is held in memory
         - successful extraction
         - correct state transition
-    Saving image features:
-        - attempt in wrong state
-        - successful save
+    Image features preview:
+        - in-memory image of feature snapshot unaffected by later edits
+        - downscaled feature preview
+        - layered renderer at display height, updated renderer matches full feature image
     Finalizing image features:
         - test successful state transition
+    Saving flattened image:
+        - contours of wrong dtype or shape rejected
+    In-memory stages:
+        - full editing flow without writing stage images by default
+        - flattened preview scale bounded for large plates, 1 px per mm for small plates
+    Feature selection:
+        - every contour point hit tested, nearest feature selected
+        - hit testing follows removed and added features
 """
 
 @pytest.fixture
@@ -99,9 +114,16 @@ def controller(session, temp_dir):
     valid_plate = Plate(x=PlateConstants.MAX_X, y=PlateConstants.MAX_Y, z=PlateConstants.MAX_Z)  
     session.add(valid_plate)
     session.commit()
-    controller = ImageEditingController(session, image_editing_directory, valid_plate)
+    controller = ImageEditingController(session, image_editing_directory, valid_plate, write_stage_images=True)
     return controller
 
+@pytest.fixture
+def memory_controller(session, temp_dir):
+    valid_plate = Plate(x=PlateConstants.MAX_X, y=PlateConstants.MAX_Y, z=PlateConstants.MAX_Z)  
+    session.add(valid_plate)
+    session.commit()
+    return ImageEditingController(session, temp_dir, valid_plate)
+
 def test_init_invalid_directory(session):
     with raises(FileNotFoundError):
         ImageEditingController(session, "invalid directory", Plate())
@@ -170,37 +192,78 @@ def test_get_resized_image_invalid_input():
     with pytest.raises(ValueError):
         resized_image = ImageEditingController._resize_image(image, Size(0, 0))
 
-def test_save_binary_invalid_state(controller, valid_raw_path):
+def test_get_binary_invalid_state(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
     controller.state = EditorState.FEATURES
-    assert controller.save_binary_image(128) == False
+    assert controller.get_binary_image(128) is None
 
-def test_save_binary_invalid_threshold(controller, valid_raw_path):
+def test_get_binary_invalid_threshold(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    assert controller.save_binary_image(256) == False
-    assert controller.save_binary_image(-1) == False
-    assert controller.save_binary_image(122.6) == False
+    assert controller.get_binary_image(256) is None
+    assert controller.get_binary_image(-1) is None
+    assert controller.get_binary_image(122.6) is None
 
-def test_save_binary_successful(controller, valid_raw_path):
+def test_get_binary_image(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    assert controller.save_binary_image(128)
-    assert os.path.exists(controller.bin_path)
+    assert controller.get_binary_image(256) is None
+    binary_image = controller.get_binary_image(128)
+    assert binary_image.shape == (controller.processing_resolution.h, controller.processing_resolution.w)
+    assert set(np.unique(binary_image)) <= {0, 255}
+    blurred_image = controller.blurred_image
+    assert not np.array_equal(controller.get_binary_image(64), binary_image)
+    assert controller.blurred_image is blurred_image
+    assert not os.path.exists(controller.bin_path)
+
+    controller.get_binary_image(128)
+    assert controller.finalize_binary()
+    assert np.array_equal(cv2.imread(controller.bin_path, cv2.IMREAD_GRAYSCALE), binary_image)
+    assert controller.get_binary_image(128) is None
+
+def test_binary_preview(controller, valid_raw_path):
+    controller.save_src_image(valid_raw_path)
+    resolution = controller.processing_resolution
+    assert controller.get_preview_scale() == 1.0
+    assert controller.get_preview_scale(resolution.h) == 1.0
+    assert controller.get_preview_scale(resolution.h // 2) == 0.5
+    assert controller.get_preview_scale(resolution.h // 4 - 1) == 0.25
+
+    preview = controller.get_binary_image(128, resolution.h // 2)
+    assert preview.shape[0] >= resolution.h // 2
+    assert preview.shape[0] < resolution.h
+    assert controller.binary_image is None
+
+    threshold = controller.suggest_threshold()
+    assert 0 < threshold < 255
+    assert controller.suggest_threshold(ThresholdMethod.TRIANGLE) is not None
+    controller.state = EditorState.FEATURES
+    assert controller.suggest_threshold() is None
 
-def test_finalize_binary(controller):
-    controller.state = EditorState.BINARY
+def test_finalize_binary(controller, valid_raw_path):
+    controller.save_src_image(valid_raw_path)
+    assert controller.finalize_binary() == False
+    assert controller.state == EditorState.BINARY
+    controller.get_binary_image(128)
     assert controller.finalize_binary() == True
     assert controller.state == EditorState.FEATURES
     assert controller.finalize_binary() == False
 
+def test_extract_features_without_binary_image(controller, valid_raw_path):
+    controller.save_src_image(valid_raw_path)
+    controller.get_binary_image(128)
+    controller.finalize_binary()
+    controller.binary_image = None
+    assert os.path.exists(controller.bin_path)
+    assert controller.extract_image_features() == False
+
 def test_extract_features_invalid_state(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.state = EditorState.RAW
     assert controller.extract_image_features() == False
 
 def test_extract_features_successful(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     assert controller.extract_image_features() == True
     assert controller.features.plate_contour is not None
@@ -275,21 +338,68 @@ def test_check_feature_selected_no_match(controller):
     assert controller.features.selected_corner_idx is None
     assert controller.features.selected_contour_idx is None
 
-def test_save_image_features_invalid_state(controller, valid_raw_path):
+def test_check_feature_selected_dense_contour(controller):
+    ''' points between every 200th sample were previously skipped '''
+    line = np.array([[[x, 0]] for x in range(1000)])
+    other = np.array([[[x, 300]] for x in range(1000)])
+    controller.features = Features(other_contours=[other, line])
+    assert controller.check_feature_selected((150, 50)) == True
+    assert controller.features.selected_contour_idx == 1
+    assert controller.check_feature_selected((150, 260)) == True
+    assert controller.features.selected_contour_idx == 0
+
+def test_check_feature_selected_after_removal(controller):
+    controller.features = Features(
+        other_contours=[np.array([[[0, 0]], [[10, 0]]]), np.array([[[500, 500]], [[510, 500]]])],
+        corners=[(200, 200), (210, 210)])
+    controller.processing_resolution = Size(1000, 1000)
+    controller.select_contour(0)
+    assert controller.remove_selected_contour()
+    assert controller.check_feature_selected((5, 5)) == False
+    assert controller.check_feature_selected((505, 505)) == True
+    assert controller.features.selected_contour_idx == 0
+
+    assert controller.check_feature_selected((212, 212)) == True
+    assert controller.features.selected_corner_idx == 1
+    assert controller.remove_selected_corner()
+    assert controller.check_feature_selected((212, 212)) == True
+    assert controller.features.selected_corner_idx == 0
+    assert controller.add_corner((800, 800))
+    assert controller.check_feature_selected((790, 790)) == True
+    assert controller.features.selected_corner_idx == 1
+
+def test_get_features_image(controller, valid_raw_path):
+    assert controller.get_features_image() is None
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     controller.extract_image_features()
-    controller.state = EditorState.RAW
-    assert controller.save_image_features() == False
+    snapshot = controller.features.copy()
+    features_image = controller.get_features_image(snapshot)
+    assert features_image.shape == (controller.processing_resolution.h, controller.processing_resolution.w, 3)
+
+    controller.features.corners.append((10, 10))
+    assert len(snapshot.corners) == 3
+    assert np.array_equal(controller.get_features_image(snapshot), features_image)
+    assert not np.array_equal(controller.get_features_image(), features_image)
 
-def test_save_image_features_successful(controller, valid_raw_path):
+    preview = controller.get_features_image(snapshot, controller.processing_resolution.h // 2)
+    assert preview.shape[0] == int(controller.processing_resolution.h * 0.5)
+
+def test_get_feature_renderer(controller, valid_raw_path):
+    assert controller.get_feature_renderer() is None
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     controller.extract_image_features()
-    assert controller.save_image_features() == True
-    assert os.path.exists(controller.feat_path)
+    renderer = controller.get_feature_renderer(display_height=600)
+    assert renderer.get_image().shape[0] == 600
+    assert renderer.get_image().shape[1] == int(controller.processing_resolution.w * 600 / controller.processing_resolution.h)
+
+    renderer = controller.get_feature_renderer()
+    controller.select_contour(0)
+    assert len(renderer.update_features(controller.features)) == 1
+    assert np.array_equal(renderer.get_image(), controller.get_features_image())
 
 def test_finalize_features(controller):
     controller.state = EditorState.FEATURES_EXTRACTED
@@ -317,21 +427,19 @@ necessary additions:
 
 def test_get_flattened_contours_wrong_state(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     controller.extract_image_features()
-    controller.save_image_features()
     controller.finalize_features()
     controller.state = EditorState.BINARY
     assert controller.get_flattened_contours() == False
 
 def test_get_flattened_contours_correct_extraction(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     controller.extract_image_features()
     controller.add_corner((1000, 1000))
-    controller.save_image_features()
     controller.finalize_features()
     assert controller.get_flattened_contours() == True
     assert len(controller.flattened_contours) == len(controller.features.other_contours)
@@ -347,11 +455,10 @@ def test_get_flattened_contours_correct_extraction(controller, valid_raw_path):
 
 def test_save_flattened_image_wrong_state(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     controller.extract_image_features()
     controller.add_corner((1000, 1000))
-    controller.save_image_features()
     controller.finalize_features()
     controller.get_flattened_contours()
     controller.state = EditorState.FLAT_FINALIZED
@@ -359,24 +466,60 @@ def test_save_flattened_image_wrong_state(controller, valid_raw_path):
 
 def test_save_flattened_image_successful(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     controller.extract_image_features()
     controller.add_corner((1230, 1610))
-    controller.save_image_features()
     controller.finalize_features()
     controller.get_flattened_contours()
     assert controller.save_flattened_image() == True
     assert os.path.exists(controller.flat_path)
     assert controller.state == EditorState.FLAT_FINALIZED
 
+def test_save_flattened_image_invalid_contours(controller):
+    controller.state = EditorState.FLAT_CTRS_EXTRACTED
+    square = np.array([[[0, 0]], [[100, 0]], [[100, 100]], [[0, 100]]], dtype=np.int32)
+    controller.flattened_contours = [square, square.astype(np.float32)]
+    assert controller.save_flattened_image() == False
+    controller.flattened_contours = [square, square.reshape(-1, 2)]
+    assert controller.save_flattened_image() == False
+    assert controller.state == EditorState.FLAT_CTRS_EXTRACTED
+    controller.flattened_contours = [square, square - 50]
+    assert controller.save_flattened_image() == True
+
+def test_stages_in_memory(memory_controller, valid_raw_path):
+    controller = memory_controller
+    assert controller.save_src_image(valid_raw_path)
+    assert controller.raw_image.shape[:2] == (controller.processing_resolution.h, controller.processing_resolution.w)
+    assert controller.get_binary_image(128) is not None
+    assert controller.finalize_binary()
+    assert controller.extract_image_features()
+    assert len(controller.features.corners) == 3
+    controller.add_corner((1230, 1610))
+    assert controller.finalize_features()
+    assert controller.get_flattened_contours()
+    assert controller.save_flattened_image()
+    assert controller.flat_image.shape == (ImageEditingController.MAX_FLAT_PREVIEW_SIZE.h, ImageEditingController.MAX_FLAT_PREVIEW_SIZE.w, 3)
+    assert controller.update_plate()
+    assert os.listdir(controller.image_editing_directory) == []
+
+def test_flat_preview_scale(session, temp_dir):
+    max_size = ImageEditingController.MAX_FLAT_PREVIEW_SIZE
+    plates = [Plate(x=max_size.w // 2, y=max_size.h // 4, z=10), Plate(x=PlateConstants.MAX_X, y=PlateConstants.MAX_Y // 2, z=10)]
+    session.add_all(plates)
+    session.commit()
+    small, large = (ImageEditingController(session, temp_dir, plate) for plate in plates)
+    assert small.get_flat_preview_scale() == 1.0
+    scale = large.get_flat_preview_scale()
+    assert PlateConstants.MAX_X * scale <= max_size.w and PlateConstants.MAX_Y // 2 * scale <= max_size.h
+    assert scale == max_size.w / PlateConstants.MAX_X
+
 def test_update_plate_wrong_state(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     controller.extract_image_features()
     controller.add_corner((1230, 1610))
-    controller.save_image_features()
     controller.finalize_features()
     controller.get_flattened_contours()
     controller.save_flattened_image()
@@ -385,11 +528,10 @@ def test_update_plate_wrong_state(controller, valid_raw_path):
 
 def test_update_plate_successful(controller, valid_raw_path):
     controller.save_src_image(valid_raw_path)
-    controller.save_binary_image(128)
+    controller.get_binary_image(128)
     controller.finalize_binary()
     controller.extract_image_features()
     controller.add_corner((1230, 1610))
-    controller.save_image_features()
     controller.finalize_features()
     controller.get_flattened_contours()
     controller.save_flattened_image()
@@ -398,7 +540,7 @@ def test_update_plate_successful(controller, valid_raw_path):
     print(plate_in_db)
     db_contours = deserialize_array_list(plate_in_db.contours)
 
-    old = controller.flattened_contours
+    old = MatrixGenerator.simplify_contours(controller.flattened_contours)
     new = db_contours
 
     assert len(old) == len(new), "Length of the lists do not match"
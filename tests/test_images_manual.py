@@ -38,12 +38,12 @@ def test_images_manual():
     controller = ImageEditingController(session, test_directory, plate)
 
     print(f"src saved: {controller.save_src_image(src_image_path)}")
-    print(f"binary saved: {controller.save_binary_image(128)}")
+    print(f"binary computed: {controller.get_binary_image(128) is not None}")
     controller.finalize_binary()
     print(f"features extracted: {controller.extract_image_features()}")
     controller.add_corner((1230, 1610))
     generate_report(controller)
-    print(f"features saved: {controller.save_image_features()}")
+    print(f"features saved: {save_features(controller)}")
     print(f"features finalized: {controller.finalize_features()}")
     print(f"retrieved flattened contours: {controller.get_flattened_contours()}")
     print(f"flattened image saved: {controller.save_flattened_image()}")
@@ -53,30 +53,35 @@ def test_images_manual():
     # check_corner_selection_logic(controller)
     # check_corner_addition_logic(controller)
 
+def save_features(controller: ImageEditingController):
+    path = os.path.join(controller.image_editing_directory, "features.png")
+    FeaturePlotter(path, controller.processing_resolution, controller.features).save_features()
+    return True
+
 def check_contour_selection_logic(controller: ImageEditingController):
     controller.select_contour(0)
-    controller.save_image_features()
+    save_features(controller)
 
 def check_corner_selection_logic(controller: ImageEditingController):
     controller.select_corner(0)
-    controller.save_image_features()
+    save_features(controller)
 
 def check_contour_removing_logic(controller: ImageEditingController):
     controller.select_contour(0)
     controller.remove_selected_contour()
-    controller.save_image_features()
+    save_features(controller)
     controller.select_contour(0)
     controller.remove_selected_contour()
-    controller.save_image_features()
+    save_features(controller)
 
 def check_corner_removing_logic(controller: ImageEditingController):
     controller.select_corner(2)
     controller.remove_selected_corner()
-    controller.save_image_features()
+    save_features(controller)
 
 def check_corner_addition_logic(controller: ImageEditingController):
     controller.add_corner((300, 300))
-    controller.save_image_features()
+    save_features(controller)
 
 def generate_report(controller: ImageEditingController):
     string = f"""
@@ -0,0 +1,65 @@
+'''
+Author: nagan319
+Date: 2026/10/19
+'''
+
+import pytest
+import threading
+from src.app.utils.latest_worker import LatestWorker
+
+"""
+Tests for LatestWorker class.
+
+Test Coverage:
+    - Submit
+        - Test task result passed to callback with generation
+        - Test requests submitted while a task is running are coalesced, only latest is computed and reported
+        - Test task errors reported through callback
+        - Test submit after shutdown
+"""
+
+@pytest.fixture
+def worker():
+    worker = LatestWorker()
+    yield worker
+    worker.shutdown()
+
+def test_submit(worker):
+    calls = []
+    generation = worker.submit(lambda: 42, lambda *args: calls.append(args))
+    assert worker.wait(timeout=10)
+    assert calls == [(generation, 42, None)]
+    assert worker.is_latest(generation)
+
+def test_latest_wins(worker):
+    started, release = threading.Event(), threading.Event()
+    computed, calls = [], []
+
+    def blocking_task():
+        started.set()
+        release.wait(timeout=10)
+        computed.append(0)
+        return 0
+
+    worker.submit(blocking_task, lambda *args: calls.append(args))
+    assert started.wait(timeout=10)
+    generations = [worker.submit(lambda i=i: computed.append(i) or i, lambda *args: calls.append(args)) for i in range(1, 6)]
+    release.set()
+    assert worker.wait(timeout=10)
+
+    assert computed == [0, 5]
+    assert calls == [(generations[-1], 5, None)]
+    assert not worker.is_latest(generations[0])
+
+def test_task_error(worker):
+    calls = []
+    def failing_task():
+        raise ValueError("invalid")
+    generation = worker.submit(failing_task, lambda *args: calls.append(args))
+    assert worker.wait(timeout=10)
+    assert calls == [(generation, None, "invalid")]
+
+def test_submit_after_shutdown(worker):
+    worker.shutdown()
+    with pytest.raises(RuntimeError):
+        worker.submit(lambda: None)
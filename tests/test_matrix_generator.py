@@ -5,6 +5,7 @@ Date: 2024/06/13
 
 import pytest
 import numpy as np
+import cv2
 from src.app.utils.image_processing.utils import Size
 from src.app.utils.image_processing.matrix_generator import MatrixGenerator
 
@@ -19,6 +20,8 @@ Test Coverage:
         - dst corners are retrieved correctly
     - Get matrix
         - correctly returns transformation matrix
+    - Transform contours
+        - contours transformed in one batch match per-contour transformation
 """
 
 @pytest.fixture
@@ -52,3 +55,28 @@ def test_matrix_generator_correct_matrix(valid_generator):
     assert isinstance(valid_generator.transformation_matrix, np.ndarray)
     matrix_func_return = valid_generator.matrix()
     assert np.array_equal(valid_generator.transformation_matrix, matrix_func_return)
+
+def test_transform_contours():
+    matrix = np.array([[2, 0.1, 5], [0.2, 1.5, -3], [0.0001, 0.0002, 1]], dtype=np.float64)
+    contours = [np.array([[[10, 20]], [[30, 40]], [[50, 10]]]), np.array([[[100, 200]]]), np.array([[[7, 8]], [[9, 10]]])]
+    transformed = MatrixGenerator.transform_contours(contours, matrix)
+    assert len(transformed) == len(contours)
+    for contour, result in zip(contours, transformed):
+        expected = cv2.perspectiveTransform(contour.astype(np.float32).reshape(-1, 1, 2), matrix).astype(np.int32)
+        assert result.dtype == np.int32 and result.shape == expected.shape
+        assert np.array_equal(result, expected)
+    assert MatrixGenerator.transform_contours([], matrix) == []
+
+def test_simplify_contours():
+    angles = np.linspace(0, 2 * np.pi, 2000, endpoint=False)
+    circle = np.stack([500 + 400 * np.cos(angles), 500 + 300 * np.sin(angles)], axis=1).astype(np.int32).reshape(-1, 1, 2)
+    square = np.array([[[x, 0]] for x in range(100)] + [[[99, y]] for y in range(1, 100)], dtype=np.int32)
+    simplified = MatrixGenerator.simplify_contours([circle, square])
+    for contour, result in zip([circle, square], simplified):
+        assert result.dtype == np.int32 and result.ndim == 3 and result.shape[1:] == (1, 2)
+        assert len(result) < len(contour) / 2
+        assert {tuple(point) for point in result.reshape(-1, 2)} <= {tuple(point) for point in contour.reshape(-1, 2)}
+        for point in contour.reshape(-1, 2):
+            distance = abs(cv2.pointPolygonTest(result, (float(point[0]), float(point[1])), True))
+            assert distance <= MatrixGenerator.CONTOUR_TOLERANCE + 1e-6
+    assert MatrixGenerator.simplify_contours([]) == []
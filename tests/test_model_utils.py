@@ -6,7 +6,7 @@ Date: 2024/06/01
 import pytest
 import numpy as np
 from sqlalchemy import Integer, Float, String, Text, Boolean
-from src.app.models.utils import get_uuid, serialize_array, deserialize_array, serialize_array_list, deserialize_array_list, get_python_type, is_value_of_type
+from src.app.models.utils import get_uuid, serialize_array, deserialize_array, serialize_array_list, deserialize_array_list, serialize_contour_list, get_python_type, is_value_of_type, COMPRESSED_CONTOURS_PREFIX
 
 """
 Tests for ORM model utility functions.
@@ -15,6 +15,7 @@ Test coverage:
 - retrieval of uuid
 - np array serialization and deserialization
 - list of np arrays serialization and deserialization
+- compressed contour list serialization, read back through array list deserialization
 - converting sql type to python type
 - converting python type to sql type
 """
@@ -76,6 +77,32 @@ def test_serialize_array_list_with_empty_array():
     assert deserialized_list[0].size == 0
     assert np.array_equal(deserialized_list[1], array_list_with_empty_array[1])
 
+@pytest.fixture
+def sample_contours():
+    return [
+        np.array([[[10, 20]], [[11, 20]], [[12, 21]], [[5000, 30]]], dtype=np.int32), 
+        np.array([[[0, 0]]], dtype=np.int32), 
+        np.array([[[7, 8]], [[6, 7]]], dtype=np.int32)
+    ]
+
+def test_serialize_contour_list_round_trip(sample_contours):
+    serialized_list = serialize_contour_list(sample_contours)
+    assert serialized_list.startswith(COMPRESSED_CONTOURS_PREFIX)
+    deserialized_list = deserialize_array_list(serialized_list)
+    assert len(deserialized_list) == len(sample_contours)
+    for original, deserialized in zip(sample_contours, deserialized_list):
+        assert deserialized.dtype == np.int32 and deserialized.shape == original.shape
+        assert np.array_equal(original, deserialized)
+
+def test_serialize_contour_list_smaller_than_array_list():
+    contours = [np.stack([np.arange(1000), np.full(1000, 300)], axis=1).reshape(-1, 1, 2).astype(np.int32)] * 10
+    assert len(serialize_contour_list(contours)) * 10 < len(serialize_array_list(contours))
+
+def test_serialize_contour_list_edge_cases():
+    assert deserialize_array_list(serialize_contour_list([])) == []
+    assert serialize_contour_list(None) is None
+    assert serialize_contour_list([np.array([[[1.5, 2.5]]])]) is None
+
 def test_get_python_type():
     assert get_python_type(Integer()) == int
     assert get_python_type(Float()) == float
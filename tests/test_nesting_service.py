@@ -0,0 +1,194 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import os
+import json
+import asyncio
+import tempfile
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.app.database import Base
+from src.app.models.plate_model import Plate
+from src.app.models.router_model import Router
+from src.app.models.layout_model import LayoutJob, LayoutJobConstants
+from src.app.models.utils import deserialize_array_list
+from src.app.service.nesting_service import NestingService
+from src.app.service.nesting_server import NestingServer
+
+"""
+Tests for NestingService and NestingServer.
+
+Test coverage:
+    - Initialization
+        - invalid preview directory
+    - Job submission
+        - invalid requests rejected
+        - full queue rejected
+    - Job execution
+        - job completes and stores placements
+        - committed job appends contours to plate
+        - higher priority jobs run first
+    - HTTP server
+        - submit, status, and result endpoints
+        - unknown routes and jobs
+"""
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Router(selected=True, min_safe_dist_from_edge=10, drill_bit_diameter=2, mill_bit_diameter=2))
+    session.add(Plate(x=500.0, y=500.0, z=6.0, material="Aluminum"))
+    session.add(Plate(x=800.0, y=400.0, z=6.0, material="Aluminum"))
+    session.add(Plate(x=800.0, y=400.0, z=3.0, material="Aluminum"))
+    session.commit()
+    yield session
+    session.close()
+
+def job_request(**kwargs) -> dict:
+    request = {
+        'material': " aluminum",
+        'thickness': 6,
+        'parts': [{'id': 'bracket', 'contour': [[0, 0], [100, 0], [100, 50], [0, 50]], 'amount': 3}]
+    }
+    request.update(kwargs)
+    return request
+
+def run_with_service(session, temp_dir, coroutine_fn, **kwargs):
+    async def runner():
+        service = NestingService(session, temp_dir, **kwargs)
+        await service.start()
+        try:
+            return await coroutine_fn(service)
+        finally:
+            await service.stop()
+    return asyncio.run(runner())
+
+async def wait_for_job(service: NestingService, job_id: str, timeout: float = 60) -> dict:
+    for _ in range(int(timeout / 0.05)):
+        status = service.get_status(job_id)
+        if status['status'] in (LayoutJobConstants.STATUS_COMPLETED, LayoutJobConstants.STATUS_FAILED):
+            return status
+        await asyncio.sleep(0.05)
+    raise TimeoutError(job_id)
+
+def test_init_invalid_directory(session):
+    with pytest.raises(FileNotFoundError):
+        NestingService(session, "invalid directory")
+
+def test_submit_invalid_requests(session, temp_dir):
+    async def submit_invalid(service):
+        invalid_requests = [
+            [],
+            job_request(parts=[]),
+            job_request(material=""),
+            job_request(thickness=-1),
+            job_request(thickness=9),
+            job_request(parts=[{'id': 'ctr1', 'contour': [[0, 0], [1, 0], [1, 1]]}]),
+            job_request(parts=[{'id': 'a', 'contour': [[0, 0], [1, 0]]}]),
+            job_request(plate_ids=['missing']),
+        ]
+        for request in invalid_requests:
+            with pytest.raises(ValueError):
+                service.submit(request)
+    run_with_service(session, temp_dir, submit_invalid, workers=1)
+
+def test_submit_queue_full(session, temp_dir):
+    async def fill_queue(service):
+        service.submit(job_request())
+        with pytest.raises(asyncio.QueueFull):
+            service.submit(job_request())
+    run_with_service(session, temp_dir, fill_queue, workers=1, max_queue_size=1)
+
+def test_job_completes(session, temp_dir):
+    async def run_job(service):
+        job = service.submit(job_request())
+        status = await wait_for_job(service, job.id)
+        return status, service.get_result(job.id)
+    status, result = run_with_service(session, temp_dir, run_job, workers=1)
+    assert status['status'] == LayoutJobConstants.STATUS_COMPLETED
+    assert status['progress'] == 1.0
+    placed = {piece_id: placement for piece_id, placement in result['placements'].items() if 'bracket' in piece_id}
+    assert len(placed) == 3
+    assert all(placement is not None for placement in placed.values())
+    assert os.path.exists(result['preview_path'])
+    assert result['committed'] == False
+
+def test_job_commit(session, temp_dir):
+    async def run_job(service):
+        job = service.submit(job_request(commit=True))
+        await wait_for_job(service, job.id)
+        return service.get_result(job.id)
+    result = run_with_service(session, temp_dir, run_job, workers=1)
+    assert result['committed'] == True
+    used_plate_ids = {placement[0] for piece_id, placement in result['placements'].items() if 'bracket' in piece_id and placement}
+    for plate_id in used_plate_ids:
+        plate = session.query(Plate).filter(Plate.id == plate_id).first()
+        assert len(deserialize_array_list(plate.contours)) > 0
+
+def test_job_priority(session, temp_dir):
+    async def run_jobs_paused(service):
+        ''' hold the single worker until both jobs are queued '''
+        for task in service._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*service._worker_tasks, return_exceptions=True)
+        low = service.submit(job_request(priority=5))
+        high = service.submit(job_request(priority=0))
+        service._worker_tasks = [asyncio.create_task(service._worker())]
+        await wait_for_job(service, low.id)
+        await wait_for_job(service, high.id)
+        return service.get_status(low.id), service.get_status(high.id)
+
+    low, high = run_with_service(session, temp_dir, run_jobs_paused, workers=1)
+    assert high['finished_at'] <= low['finished_at']
+
+def test_server_endpoints(session, temp_dir):
+    async def send(port: int, method: str, path: str, body: bytes = b""):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        header, _, content = response.partition(b"\r\n\r\n")
+        return int(header.split(b" ")[1]), json.loads(content)
+
+    async def exercise_server(service):
+        server = NestingServer(service, port=0)
+        await server.start()
+        try:
+            status, body = await send(server.port, 'POST', '/jobs', json.dumps(job_request()).encode())
+            assert status == 202
+            job_id = body['id']
+            await wait_for_job(service, job_id)
+            status, body = await send(server.port, 'GET', f'/jobs/{job_id}')
+            assert status == 200 and body['status'] == LayoutJobConstants.STATUS_COMPLETED
+            status, body = await send(server.port, 'GET', f'/jobs/{job_id}/result')
+            assert status == 200 and body['placements'] is not None
+            status, _ = await send(server.port, 'POST', '/jobs', b"not json")
+            assert status == 400
+            status, _ = await send(server.port, 'GET', '/jobs/missing')
+            assert status == 404
+            status, _ = await send(server.port, 'GET', '/unknown')
+            assert status == 404
+        finally:
+            await server.stop()
+    run_with_service(session, temp_dir, exercise_server, workers=1)
+
+def test_interrupted_jobs_marked_failed(session, temp_dir):
+    session.add(LayoutJob(status=LayoutJobConstants.STATUS_RUNNING, request="{}", created_at=0.0))
+    session.commit()
+
+    async def noop(service):
+        return None
+    run_with_service(session, temp_dir, noop, workers=1)
+    assert session.query(LayoutJob).filter(LayoutJob.status == LayoutJobConstants.STATUS_RUNNING).count() == 0
@@ -0,0 +1,128 @@
+"""
+Author: nagan319
+Date: 2026/10/19
+"""
+
+import pytest
+import numpy as np
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from src.app.database import Base
+from src.app.models.plate_model import Plate, get_plate_free_rectangles
+from src.app.models.part_model import Part
+from src.app.models.router_model import Router
+from src.app.models.utils import serialize_array, serialize_array_list, serialize_contour_list, deserialize_array_list, COMPRESSED_CONTOURS_PREFIX
+from src.app.controllers.optimization_controller import OptimizationController
+
+"""
+Tests for OptimizationController packing input and layout saving.
+
+Test coverage:
+    - Packing input
+        - plates given as stored free rectangles and free area
+        - existing contours of plates drawn in preview are loaded by plate id
+        - plates ranked by stored free area
+        - contours of selected plates not loaded
+        - plates exceeding router size excluded
+    - Saving placements
+        - compressed plate contours stay compressed, existing contours kept, placed contours appended shifted and simplified
+        - legacy plate contours converted to compressed format
+        - plates without placements left unchanged
+"""
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+@pytest.fixture
+def router():
+    return Router(plate_x=1000.0, plate_y=1000.0, min_safe_dist_from_edge=10, drill_bit_diameter=2, mill_bit_diameter=3)
+
+def test_packing_input_uses_free_space(session, router):
+    triangle = np.array([[[100, 100]], [[300, 100]], [[200, 250]]], dtype=np.int32)
+    plate = Plate(x=800.0, y=400.0, z=6.0, contours=serialize_array_list([triangle]))
+    session.add(plate)
+    session.commit()
+    bins, pieces, max_bit_diameter, edge_distance = OptimizationController.get_packing_input(
+        [router], [plate], [('part', [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)], 2)]
+    )
+    free_rectangles = [(r.min_x, r.min_y, r.width, r.height) for r in get_plate_free_rectangles(plate)]
+    assert bins == [(plate.id, (800.0, 400.0), free_rectangles, plate.free_area)]
+    assert [piece_id for piece_id, _ in pieces] == ['part__0', 'part__1']
+    assert (max_bit_diameter, edge_distance) == (3, 10)
+
+def test_optimize_ranks_by_free_area(session, router, tmp_path):
+    empty_plate = Plate(id='empty', x=400.0, y=400.0, z=6.0, material='Aluminum', selected=True)
+    used_plate = Plate(id='used', x=400.0, y=400.0, z=6.0, material='Aluminum', selected=True, contours=serialize_contour_list([square(0, 0, 200)]))
+    router.selected = True
+    part = Part(id='part', contours=serialize_array(np.array([[0, 0], [50, 0], [50, 50], [0, 50]], dtype=float)), thickness=6.0, material='Aluminum', amount=1)
+    session.add_all([empty_plate, used_plate, router, part])
+    session.commit()
+    controller = OptimizationController(session, str(tmp_path / 'preview.png'))
+    loaded = []
+    load_plate_contours = controller._load_plate_contours
+    controller._load_plate_contours = lambda plate_ids: loaded.append(sorted(plate_ids)) or load_plate_contours(plate_ids)
+    controller.optimize()
+    bin_id, (x, y) = controller.placements['part__0']
+    # fuller plate is packed first, placed part keeps bit diameter of distance from existing contour
+    assert bin_id == 'used'
+    assert x >= 203 or y >= 203
+    assert loaded == [['used']]
+    assert (tmp_path / 'preview.png').exists()
+
+def test_selected_plates_defer_contours(session, tmp_path):
+    session.add_all([Plate(x=400.0, y=400.0, z=6.0, selected=True, contours=serialize_contour_list([square(0, 0, 200)])), Plate(x=400.0, y=400.0, z=6.0)])
+    session.commit()
+    session.expire_all()
+    plates = OptimizationController(session, str(tmp_path / 'preview.png'))._get_selected_plates()
+    assert len(plates) == 1
+    assert 'contours' in inspect(plates[0]).unloaded
+
+def test_packing_input_excludes_large_plates(session, router):
+    plate = Plate(x=1200.0, y=400.0, z=6.0)
+    session.add(plate)
+    session.commit()
+    with pytest.raises(ValueError):
+        OptimizationController.get_packing_input([router], [plate], [])
+
+def square(x, y, size):
+    return np.array([[[x, y]], [[x + size, y]], [[x + size, y + size]], [[x, y + size]]], dtype=np.int32)
+
+def test_save_placements_compressed(session):
+    existing = [square(0, 0, 100), np.array([[[200, 200]], [[250, 210]], [[300, 200]], [[250, 300]]], dtype=np.int32)]
+    plate = Plate(x=1000.0, y=1000.0, z=6.0, contours=serialize_contour_list(existing))
+    session.add(plate)
+    session.commit()
+    # collinear point of placed contour is removed like in contours saved by the image editor
+    part_contour = [(0, 0), (50, 0), (100, 0), (100, 100), (0, 100)]
+    placements = {'part__0': (plate.id, (400, 400)), 'part__1': (plate.id, (600, 400)), 'part__2': None}
+    used_pieces, used_bins = OptimizationController.save_placements(session, placements, {'part': part_contour})
+    assert used_pieces == {'part__0', 'part__1'}
+    assert used_bins == {plate.id}
+
+    session.refresh(plate)
+    assert plate.contours.startswith(COMPRESSED_CONTOURS_PREFIX)
+    contours = deserialize_array_list(plate.contours)
+    assert len(contours) == 4
+    assert all(np.array_equal(saved, original) for saved, original in zip(contours, existing))
+    assert sorted(map(tuple, contours[2].reshape(-1, 2).tolist())) == [(400, 400), (400, 500), (500, 400), (500, 500)]
+    assert sorted(map(tuple, contours[3].reshape(-1, 2).tolist())) == [(600, 400), (600, 500), (700, 400), (700, 500)]
+
+def test_save_placements_legacy(session):
+    plate = Plate(x=1000.0, y=1000.0, z=6.0, contours=serialize_array_list([square(0, 0, 100)]))
+    unused_plate = Plate(x=1000.0, y=1000.0, z=6.0, contours=serialize_array_list([square(0, 0, 100)]))
+    session.add_all([plate, unused_plate])
+    session.commit()
+    legacy_contours = unused_plate.contours
+    OptimizationController.save_placements(session, {'part__0': (plate.id, (400.0, 400.0))}, {'part': [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0)]})
+    session.refresh(plate)
+    assert plate.contours.startswith(COMPRESSED_CONTOURS_PREFIX)
+    contours = deserialize_array_list(plate.contours)
+    assert np.array_equal(contours[0], square(0, 0, 100))
+    assert contours[1].reshape(-1, 2).tolist() == [[400, 400], [410, 400], [410, 410]]
+    assert unused_plate.contours == legacy_contours
@@ -0,0 +1,104 @@
+'''
+Author: nagan319
+Date: 2026/10/19
+'''
+
+import os
+import shutil
+import pytest
+import tempfile
+from src.app.utils.part_cache import PartCache, get_file_hash
+
+"""
+Tests for PartCache.
+
+Test Coverage:
+    - Initialization
+        - Test invalid directory
+    - File hash
+        - Test identical contents under different names give identical hash
+        - Test different contents give different hash
+        - Test missing file raises OSError
+    - Get and put
+        - Test missing entry
+        - Test stored entry returned and preview copied
+        - Test entry without data file ignored
+    - Eviction
+        - Test least recently used entries evicted above maximum amount
+        - Test entries evicted above maximum size
+"""
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+@pytest.fixture
+def stl_dir():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test data', 'stl files')
+
+@pytest.fixture
+def cache(temp_dir):
+    cache_dir = os.path.join(temp_dir, 'cache')
+    os.makedirs(cache_dir)
+    return PartCache(cache_dir)
+
+@pytest.fixture
+def preview_path(temp_dir):
+    path = os.path.join(temp_dir, 'preview.png')
+    with open(path, 'wb') as f:
+        f.write(b'preview')
+    return path
+
+def test_invalid_directory():
+    with pytest.raises(FileNotFoundError):
+        PartCache("invalid directory")
+
+def test_file_hash(stl_dir, temp_dir):
+    valid = os.path.join(stl_dir, 'RollerConnectorPlate.STL')
+    copy = os.path.join(temp_dir, 'copy.stl')
+    shutil.copy(valid, copy)
+    assert get_file_hash(valid) == get_file_hash(copy)
+    assert get_file_hash(valid) != get_file_hash(os.path.join(stl_dir, 'invalid.STL'))
+
+def test_file_hash_missing(temp_dir):
+    with pytest.raises(OSError):
+        get_file_hash(os.path.join(temp_dir, 'missing.stl'))
+
+def test_get_missing(cache, temp_dir):
+    assert cache.get('missing', os.path.join(temp_dir, 'out.png')) is None
+
+def test_put_and_get(cache, preview_path, temp_dir):
+    assert cache.put('hash', 6.35, 'contours', preview_path)
+    out_path = os.path.join(temp_dir, 'out.png')
+    assert cache.get('hash', out_path) == (6.35, 'contours')
+    with open(out_path, 'rb') as f:
+        assert f.read() == b'preview'
+
+def test_incomplete_entry_ignored(cache, preview_path, temp_dir):
+    cache.put('hash', 6.35, 'contours', preview_path)
+    os.remove(os.path.join(cache.cache_directory, 'hash.json'))
+    assert cache.get('hash', os.path.join(temp_dir, 'out.png')) is None
+
+def test_evict_max_entries(temp_dir, preview_path):
+    cache_dir = os.path.join(temp_dir, 'cache')
+    os.makedirs(cache_dir)
+    cache = PartCache(cache_dir, max_entries=2)
+    cache.put('first', 1.0, 'contours', preview_path)
+    cache.put('second', 2.0, 'contours', preview_path)
+    os.utime(os.path.join(cache_dir, 'first.json'), (0, 0))
+    os.utime(os.path.join(cache_dir, 'second.json'), (1, 1))
+    cache.get('first', os.path.join(temp_dir, 'out.png'))
+    cache.put('third', 3.0, 'contours', preview_path)
+    assert cache.get('second', os.path.join(temp_dir, 'out.png')) is None
+    assert cache.get('first', os.path.join(temp_dir, 'out.png')) == (1.0, 'contours')
+    assert cache.get('third', os.path.join(temp_dir, 'out.png')) == (3.0, 'contours')
+    assert sorted(os.listdir(cache_dir)) == ['first.json', 'first.png', 'third.json', 'third.png']
+
+def test_evict_max_size(temp_dir, preview_path):
+    cache_dir = os.path.join(temp_dir, 'cache')
+    os.makedirs(cache_dir)
+    cache = PartCache(cache_dir, max_size=0)
+    assert cache.put('hash', 6.35, 'contours', preview_path)
+    assert cache.get_size() == 0
+    assert os.listdir(cache_dir) == []
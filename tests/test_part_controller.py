@@ -4,13 +4,16 @@ Date: 2024/06/03
 '''
 
 import os
+import shutil
 import pytest
 import tempfile
+import threading
 import numpy as np
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from src.app.controllers.part_controller import PartController
 from src.app.models.part_model import Part, PartConstants
+from src.app.utils.stl_parser import STLParser, BINARY_FACET_DTYPE
 
 """
 Tests for PartController.
@@ -25,6 +28,16 @@ Test Coverage:
             - correct parameters
             - correct preview image generation
         - Test adding duplicates
+    - Add parts from multiple files
+        - Test valid, invalid, missing, and duplicate files in one batch
+        - Test progress reported for every file
+        - Test parsing in worker processes, pool reused between imports
+        - Test parsing phase on background thread
+    - Add parts from directory
+        - Test only STL files imported
+    - Content hash
+        - Test same geometry under different filename rejected
+        - Test cached files not parsed again
     - Remove part
         // Directly inherits from superclass, no tests necessary
     - Remove all parts
@@ -104,11 +117,21 @@ def create_part_table(engine, Base):
     yield
     Base.drop_all(engine)
 
+def write_binary_stl(filepath, vectors, header=b'', attributes=0):
+    records = np.zeros(len(vectors), dtype=BINARY_FACET_DTYPE)
+    records['vectors'] = vectors
+    records['attr'] = attributes
+    with open(filepath, 'wb') as f:
+        f.write(header.ljust(80, b' '))
+        f.write(np.uint32(len(vectors)).tobytes())
+        f.write(records.tobytes())
+
 @pytest.fixture
 def controller(session, temp_dir):
     preview_image_directory = temp_dir
-    controller = PartController(session, preview_image_directory)
-    return controller
+    controller = PartController(session, preview_image_directory, import_workers=1)
+    yield controller
+    controller.shutdown()
 
 def test_add_part_from_nonexistent_file(controller):
     part = controller.add_from_file("invalid path")
@@ -134,6 +157,88 @@ def test_add_duplicate(controller, stl_file_path_valid):
     assert initial is not None
     assert duplicate is None
 
+def test_add_from_files(controller, stl_file_path_valid, stl_file_path_invalid, temp_dir):
+    progress = []
+    same_filename = os.path.join(temp_dir, os.path.basename(stl_file_path_valid))
+    shutil.copy(stl_file_path_valid, same_filename)
+    filepaths = [stl_file_path_valid, stl_file_path_invalid, "invalid path", same_filename, stl_file_path_valid]
+    parts, errors = controller.add_from_files(filepaths, lambda *args: progress.append(args))
+    assert len(parts) == 1
+    assert os.path.exists(controller._get_preview_image_path(parts[0].id))
+    assert set(errors) == {stl_file_path_invalid, "invalid path", same_filename}
+    assert [done for done, total, _, _ in progress] == [1, 2, 3, 4]
+    assert controller.get_total_amount() == 1
+
+def test_add_from_files_worker_processes(session, stl_file_path_valid, stl_file_path_invalid, temp_dir):
+    controller = PartController(session, temp_dir, import_workers=2)
+    vectors = STLParser.load_stl_vectors(stl_file_path_valid)
+    filepaths = []
+    for i in range(4):
+        filepath = os.path.join(temp_dir, f"part{i}.stl")
+        write_binary_stl(filepath, vectors + np.float32([10 * i, 0, 0]))
+        filepaths.append(filepath)
+    try:
+        parts, errors = controller.add_from_files(filepaths[:2] + [stl_file_path_invalid])
+        pool = controller._import_pool
+        assert pool is not None
+        assert sorted(part.filename for part in parts) == ["part0.stl", "part1.stl"]
+        assert list(errors) == [stl_file_path_invalid]
+        assert all(os.path.exists(controller._get_preview_image_path(part.id)) for part in parts)
+
+        parts, errors = controller.add_from_files(filepaths[2:])
+        assert controller._import_pool is pool
+        assert sorted(part.filename for part in parts) == ["part2.stl", "part3.stl"]
+    finally:
+        controller.shutdown()
+    assert controller._import_pool is None
+
+def test_import_phases_on_background_thread(controller, stl_file_path_valid):
+    progress = []
+    batch = controller.prepare_import([stl_file_path_valid], lambda *args: progress.append(threading.current_thread()))
+    thread = threading.Thread(target=controller.parse_import, args=(batch,))
+    thread.start()
+    thread.join()
+    assert progress == [thread]
+    assert controller.get_total_amount() == 0
+    parts, errors = controller.commit_import(batch)
+    assert len(parts) == 1 and errors == {}
+    assert controller.get_total_amount() == 1
+
+def test_add_from_directory(controller, stl_file_path_valid, non_stl_filepath, temp_dir):
+    import_dir = os.path.join(temp_dir, "import")
+    os.makedirs(import_dir)
+    shutil.copy(stl_file_path_valid, import_dir)
+    shutil.copy(non_stl_filepath, import_dir)
+    parts, errors = controller.add_from_directory(import_dir)
+    assert [part.filename for part in parts] == ['RollerConnectorPlate.STL']
+    assert errors == {}
+    parts, errors = controller.add_from_directory("invalid directory")
+    assert parts == [] and len(errors) == 1
+
+def test_add_same_geometry_different_filename(controller, stl_file_path_valid, temp_dir):
+    renamed = os.path.join(temp_dir, "renamed.stl")
+    shutil.copy(stl_file_path_valid, renamed)
+    assert controller.add_from_file(stl_file_path_valid) is not None
+    parts, errors = controller.add_from_files([renamed])
+    assert parts == []
+    assert "geometry" in errors[renamed]
+
+def test_add_from_cache(session, stl_file_path_valid, temp_dir, monkeypatch):
+    cache_dir = os.path.join(temp_dir, "cache")
+    os.makedirs(cache_dir)
+    controller = PartController(session, temp_dir, cache_dir)
+    part = controller.add_from_file(stl_file_path_valid)
+    contours, thickness = part.contours, part.thickness
+    controller.remove(part.id)
+
+    def fail_parse(*args):
+        raise AssertionError("cached file parsed again")
+    monkeypatch.setattr("src.app.controllers.part_controller.parse_part_file", fail_parse)
+    part = controller.add_from_file(stl_file_path_valid)
+    assert part is not None
+    assert part.contours == contours and part.thickness == thickness
+    assert os.path.exists(controller._get_preview_image_path(part.id))
+
 def test_get_total_part_amount_empty_db(controller):
     assert controller.get_total_amount() == 0
 
@@ -11,7 +11,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from src.app.controllers.plate_controller import PlateController
 from src.app.models.plate_model import Plate, PlateConstants
-from src.app.models.utils import serialize_array, deserialize_array
+from src.app.models.utils import serialize_array, serialize_array_list, deserialize_array
+from src.app.utils.plotting_util import PreviewJob
+from src.app.service.preview_service import PreviewService
 
 """
 Tests for PlateController class.
@@ -19,6 +21,8 @@ Tests for PlateController class.
 Test Coverage:
     - Initialization
         - Test all preview images from existing plates saved    
+        - Test cached previews restored without rendering or decoding contours, changed plates rendered again
+        - Test previews rendered by preview service only when requested, callback called and result cached
     - Add new plate
         - Test attempted add when max amount met
         - Test correct addition of empty plate
@@ -57,6 +61,10 @@ Test Coverage:
     - Edit selected
         - Test Null value
         - Test correct value
+    - Select by property
+        - Test only plates of matching material and thickness selected
+    - Get candidates
+        - Test filtering by material, thickness, and usable rectangle
     - Save preview
         - Test preview image saving correctly
         - Test output image size if possible (related to dpi)
@@ -116,6 +124,50 @@ def test_preview_initialization(session, temp_dir):
         preview_image_path = controller._get_preview_image_path(plate_id)
         assert os.path.exists(preview_image_path), f"Preview image path does not exist for plate ID: {plate_id}"
 
+def test_preview_cache(session, temp_dir, monkeypatch):
+    preview_dir, cache_dir = os.path.join(temp_dir, "previews"), os.path.join(temp_dir, "cache")
+    os.makedirs(preview_dir)
+    os.makedirs(cache_dir)
+    plates = [Plate(), Plate(x=500.0, contours=serialize_array_list([np.array([[[10, 10]], [[20, 10]], [[20, 20]]])]))]
+    session.add_all(plates)
+    session.commit()
+    PlateController(session, preview_dir, preview_cache_directory=cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+    rendered, decoded = [], []
+    monkeypatch.setattr(PreviewJob, "render", lambda job, path: rendered.append(path))
+    monkeypatch.setattr("src.app.controllers.plate_controller.deserialize_array_list", lambda contours: decoded.append(contours) or [])
+    for filename in os.listdir(preview_dir):
+        os.remove(os.path.join(preview_dir, filename))
+    controller = PlateController(session, preview_dir, preview_cache_directory=cache_dir)
+    assert rendered == [] and decoded == []
+    assert all(os.path.exists(controller._get_preview_image_path(plate.id)) for plate in plates)
+
+    plates[0].contours = serialize_array_list([np.array([[[10, 10]], [[20, 10]], [[20, 20]]])])
+    session.commit()
+    controller.save_preview(plates[0])
+    assert rendered == [controller._get_preview_image_path(plates[0].id)]
+
+def test_preview_service(session, temp_dir):
+    preview_dir, cache_dir = os.path.join(temp_dir, "previews"), os.path.join(temp_dir, "cache")
+    os.makedirs(preview_dir)
+    os.makedirs(cache_dir)
+    plates = [Plate(), Plate(x=500.0)]
+    session.add_all(plates)
+    session.commit()
+    service = PreviewService(workers=1)
+    try:
+        controller = PlateController(session, preview_dir, preview_cache_directory=cache_dir, preview_service=service)
+        assert os.listdir(preview_dir) == []
+        saved = []
+        controller.save_all_previews(lambda path, error: saved.append((path, error)))
+        assert service.wait(timeout=60)
+    finally:
+        service.shutdown()
+    assert sorted(saved) == sorted((controller._get_preview_image_path(plate.id), None) for plate in plates)
+    assert all(os.path.exists(path) for path, _ in saved)
+    assert len(os.listdir(cache_dir)) == 2
+
 def test_add_when_amount_exceeded(controller):
     for _ in range(controller.MAX_PLATE_AMOUNT):
         controller.add_new()
@@ -221,6 +273,32 @@ def test_edit_selected(controller):
     assert controller.edit_selected(new_plate.id, True) is not None
     assert controller.get_selected(new_plate.id) == True
 
+def test_select_by_property(controller, session):
+    session.add_all([
+        Plate(z=6.35, material="Aluminum"),
+        Plate(z=6.355, material=" aluminum "),
+        Plate(z=6.5, material="Aluminum"),
+        Plate(z=6.35, material="Steel", selected=True)
+    ])
+    session.commit()
+    assert controller.select_by_property(6.35, "ALUMINUM ")
+    selected = [(plate.material, plate.z) for plate in controller.get_all() if plate.selected]
+    assert sorted(selected) == [(" aluminum ", 6.355), ("Aluminum", 6.35)]
+
+def test_get_candidates(controller, session):
+    used_contour = np.array([[[0, 0]], [[600, 0]], [[600, 1000]], [[0, 1000]]])
+    session.add_all([
+        Plate(x=1000.0, y=1000.0, z=6.0, material="Aluminum"),
+        Plate(x=1000.0, y=1000.0, z=6.0, material="Aluminum", contours=serialize_array_list([used_contour])),
+        Plate(x=1000.0, y=1000.0, z=3.0, material="Aluminum")
+    ])
+    session.commit()
+    assert len(controller.get_candidates(6.0, "aluminum")) == 2
+    assert len(controller.get_candidates(6.0, "aluminum", 500, 450)) == 1
+    assert len(controller.get_candidates(6.0, "aluminum", 500, 250)) == 2
+    assert len(controller.get_candidates(6.0, "aluminum", 300, 250)) == 2
+    assert len(controller.get_candidates(6.0, "steel")) == 0
+
 def test_save_preview(controller, temp_dir):
     os.makedirs(temp_dir, exist_ok=True)
     controller.preview_image_directory = temp_dir
@@ -4,9 +4,13 @@ Date: 2024/06/01
 '''
 
 import pytest
-from sqlalchemy import create_engine
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
-from src.app.models.plate_model import Plate
+from src.app.database import add_missing_columns, backfill_columns
+from src.app.models.plate_model import Plate, PlateConstants, get_plate_free_rectangles, get_plate_occupied_boxes, query_candidate_plates
+from src.app.models.utils import serialize_array_list
+from src.app.utils.packing.utils.rectangle2d import Rectangle2D
 
 '''
 Test CRUD logic for Plate class.
@@ -67,3 +71,81 @@ def test_delete_plate(session, sample_plate_data):
     session.delete(plate)
     session.commit()
     assert session.query(Plate).filter_by(id=plate.id).first() is None
+
+def test_plate_index_on_create(session):
+    plate = Plate(material=" Aluminum ", z=6.354)
+    session.add(plate)
+    session.commit()
+    assert plate.material_key == "aluminum"
+    assert plate.thickness_key == 6.35
+    assert plate.usable_x == PlateConstants.DEFAULT_X
+    assert plate.usable_y == PlateConstants.DEFAULT_Y
+
+def test_plate_index_on_update(session, sample_plate_data):
+    plate = Plate(**sample_plate_data)
+    session.add(plate)
+    session.commit()
+    plate.material = 'Steel'
+    plate.contours = serialize_array_list([np.array([[[0, 0]], [[400, 0]], [[400, 1000]], [[0, 1000]]])])
+    session.commit()
+    assert plate.material_key == 'steel'
+    assert plate.usable_x == 600
+    assert plate.usable_y == 1000
+
+def test_add_missing_columns():
+    old_engine = create_engine('sqlite:///:memory:')
+    with old_engine.begin() as connection:
+        connection.execute(text('CREATE TABLE plates (id VARCHAR PRIMARY KEY, x FLOAT, y FLOAT, z FLOAT, material VARCHAR, contours TEXT, selected BOOLEAN)'))
+    add_missing_columns(old_engine)
+    columns = {column['name'] for column in inspect(old_engine).get_columns('plates')}
+    indexes = {index['name'] for index in inspect(old_engine).get_indexes('plates')}
+    assert {'material_key', 'thickness_key', 'usable_x', 'usable_y'} <= columns
+    assert 'ix_plates_stock' in indexes
+
+def test_backfill_columns():
+    old_engine = create_engine('sqlite:///:memory:')
+    with old_engine.begin() as connection:
+        connection.execute(text('CREATE TABLE plates (id VARCHAR PRIMARY KEY, x FLOAT, y FLOAT, z FLOAT, material VARCHAR, contours TEXT, selected BOOLEAN)'))
+        connection.execute(text("INSERT INTO plates VALUES ('old', 1000, 500, 6.354, ' Aluminum ', NULL, 1)"))
+    add_missing_columns(old_engine)
+    backfill_columns(old_engine)
+    with old_engine.connect() as connection:
+        row = connection.execute(text("SELECT material_key, thickness_key, usable_x, usable_y, free_area FROM plates")).one()
+    assert tuple(row) == ("aluminum", 6.35, 1000, 500, 1000 * 500)
+
+def test_query_candidate_plates_rotated(session):
+    plate = Plate(x=400.0, y=1000.0, z=6.0, contours=serialize_array_list([np.array([[[0, 250]], [[400, 250]], [[400, 1000]], [[0, 1000]]])]))
+    session.add(plate)
+    session.commit()
+    assert (plate.usable_x, plate.usable_y) == (400, 250)
+    assert query_candidate_plates(session, "aluminum", 6.0, 250, 400) == [plate]
+    assert query_candidate_plates(session, "aluminum", 6.0, 260, 400) == []
+
+def test_query_candidate_plates_not_largest_rectangle(session):
+    plate = Plate(x=1000.0, y=1000.0, z=6.0, contours=serialize_array_list([np.array([[[0, 0]], [[600, 0]], [[600, 400]], [[0, 400]]])]))
+    session.add(plate)
+    session.commit()
+    assert (plate.usable_x, plate.usable_y) == (400, 1000)
+    assert query_candidate_plates(session, "aluminum", 6.0, 550, 550) == [plate]
+    assert query_candidate_plates(session, "aluminum", 6.0, 650, 650) == []
+
+def test_plate_free_space_summary(session, sample_plate_data):
+    sample_plate_data['contours'] = serialize_array_list([np.array([[[0, 0]], [[400, 0]], [[400, 500]], [[0, 500]]])])
+    plate = Plate(**sample_plate_data)
+    session.add(plate)
+    session.commit()
+    assert plate.free_area == 1000 * 1000 - 400 * 500
+    free_rectangles = get_plate_free_rectangles(plate)
+    assert sum(rectangle.area for rectangle in free_rectangles) == plate.free_area
+    assert max(rectangle.area for rectangle in free_rectangles) == plate.usable_x * plate.usable_y
+    assert get_plate_occupied_boxes(plate) == [Rectangle2D(0, 0, 400, 500)]
+
+def test_query_candidate_plates_defers_contours(session):
+    fuller_plate = Plate(x=1000.0, y=1000.0, z=6.0, contours=serialize_array_list([np.array([[[0, 0]], [[600, 0]], [[600, 400]], [[0, 400]]])]))
+    empty_plate = Plate(x=1000.0, y=1000.0, z=6.0)
+    session.add_all([empty_plate, fuller_plate])
+    session.commit()
+    session.expire_all()
+    plates = query_candidate_plates(session, "aluminum", 6.0, 100, 100)
+    assert plates == [fuller_plate, empty_plate]
+    assert all('contours' in inspect(plate).unloaded for plate in plates)
@@ -0,0 +1,55 @@
+'''
+Author: nagan319
+Date: 2026/10/19
+'''
+
+import os
+import cv2
+import pytest
+import tempfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from src.app.utils.plotting_util import save_line_preview
+
+"""
+Tests for plotting utils.
+
+Test Coverage:
+    - Save line preview
+        - Test image saved for polylines and segment arrays
+        - Test empty line groups handled
+        - Test reused canvas does not keep lines from previous preview
+        - Test concurrent calls from multiple threads
+"""
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+@pytest.fixture
+def rectangle():
+    return np.array([(0, 0), (100, 0), (100, 50), (0, 50), (0, 0)], dtype=float)
+
+def test_save_line_preview(temp_dir, rectangle):
+    polyline_path = os.path.join(temp_dir, 'polyline.png')
+    save_line_preview(polyline_path, [([rectangle], 'solid', None), ([], 'solid', 1)], (4, 4), 80, invert_y=True)
+    assert os.path.exists(polyline_path)
+
+    segments = np.stack((rectangle[:-1], rectangle[1:]), axis=1)
+    segments_path = os.path.join(temp_dir, 'segments.png')
+    save_line_preview(segments_path, [(segments, 'dashed', 1)], (4, 4), 80, xlabel='Z: 1 mm')
+    assert os.path.exists(segments_path)
+
+def test_reused_canvas_cleared(temp_dir, rectangle):
+    first_path, empty_path = os.path.join(temp_dir, 'first.png'), os.path.join(temp_dir, 'empty.png')
+    save_line_preview(first_path, [([rectangle], 'solid', 5)], (4, 4), 80)
+    save_line_preview(empty_path, [], (4, 4), 80)
+    first, empty = cv2.imread(first_path, cv2.IMREAD_GRAYSCALE), cv2.imread(empty_path, cv2.IMREAD_GRAYSCALE)
+    assert np.count_nonzero(empty < 128) < np.count_nonzero(first < 128)
+
+def test_concurrent_previews(temp_dir, rectangle):
+    paths = [os.path.join(temp_dir, f'{i}.png') for i in range(8)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda path: save_line_preview(path, [([rectangle], 'solid', None)], (4, 4), 80), paths))
+    assert all(os.path.exists(path) for path in paths)
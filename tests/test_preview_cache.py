@@ -0,0 +1,76 @@
+'''
+Author: nagan319
+Date: 2026/10/19
+'''
+
+import os
+import time
+import pytest
+import tempfile
+from src.app.utils.preview_cache import PreviewCache
+
+"""
+Tests for PreviewCache.
+
+Test Coverage:
+    - Initialization
+        - Test invalid directory
+    - Get key
+        - Test identical inputs give identical key, different inputs different key
+    - Get and put
+        - Test missing image
+        - Test stored image copied to destination
+    - Eviction
+        - Test total size kept within max size
+        - Test least recently used images evicted first
+"""
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+@pytest.fixture
+def cache_dir(temp_dir):
+    cache_dir = os.path.join(temp_dir, 'cache')
+    os.makedirs(cache_dir)
+    return cache_dir
+
+def write_image(path: str, size: int) -> str:
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    return path
+
+def test_invalid_directory():
+    with pytest.raises(FileNotFoundError):
+        PreviewCache("invalid directory")
+
+def test_get_key():
+    assert PreviewCache.get_key('plate', 1000.0, None) == PreviewCache.get_key('plate', 1000.0, None)
+    assert PreviewCache.get_key('plate', 1000.0, None) != PreviewCache.get_key('plate', 1000.5, None)
+
+def test_get_missing(cache_dir, temp_dir):
+    cache = PreviewCache(cache_dir)
+    dst_path = os.path.join(temp_dir, 'dst.png')
+    assert not cache.get('missing', dst_path)
+    assert not os.path.exists(dst_path)
+
+def test_put_and_get(cache_dir, temp_dir):
+    cache = PreviewCache(cache_dir)
+    src_path = write_image(os.path.join(temp_dir, 'src.png'), 10)
+    assert cache.put('key', src_path)
+    dst_path = os.path.join(temp_dir, 'dst.png')
+    assert cache.get('key', dst_path)
+    with open(dst_path, 'rb') as f:
+        assert f.read() == b'x' * 10
+
+def test_eviction(cache_dir, temp_dir):
+    cache = PreviewCache(cache_dir, max_size=250)
+    src_path = write_image(os.path.join(temp_dir, 'src.png'), 100)
+    for i, key in enumerate(['a', 'b']):
+        cache.put(key, src_path)
+        os.utime(os.path.join(cache_dir, f'{key}.png'), (time.time() - 100 + i, time.time() - 100 + i))
+    cache.get('a', os.path.join(temp_dir, 'dst.png'))
+    cache.put('c', src_path)
+    assert cache.get_size() <= 250
+    assert sorted(os.listdir(cache_dir)) == ['a.png', 'c.png']
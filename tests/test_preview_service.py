@@ -0,0 +1,80 @@
+'''
+Author: nagan319
+Date: 2026/10/19
+'''
+
+import os
+import pytest
+import tempfile
+import threading
+import numpy as np
+from src.app.service.preview_service import PreviewService
+from src.app.utils.plotting_util import PreviewJob
+
+"""
+Tests for PreviewService class.
+
+Test Coverage:
+    - Initialization
+        - Test invalid amount of workers
+    - Submit
+        - Test image rendered in worker process and callback called without error
+        - Test identical in-flight requests rendered once, all callbacks called
+        - Test rendering error reported through callback
+"""
+
+@pytest.fixture(scope="module")
+def service():
+    service = PreviewService(workers=1)
+    yield service
+    service.shutdown()
+
+@pytest.fixture
+def temp_dir():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+@pytest.fixture
+def job():
+    rectangle = np.array([(0, 0), (100, 0), (100, 50), (0, 50), (0, 0)], dtype=float)
+    return PreviewJob([([rectangle], 'solid', None)], (4, 4), 80, {'invert_y': True})
+
+class CallbackRecorder:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, path, error):
+        with self.lock:
+            self.calls.append((path, error))
+
+def test_invalid_workers():
+    with pytest.raises(ValueError):
+        PreviewService(workers=0)
+
+def test_submit(service, temp_dir, job):
+    dst_path = os.path.join(temp_dir, "preview.png")
+    recorder = CallbackRecorder()
+    service.submit(job, dst_path, recorder)
+    assert service.wait(timeout=60)
+    assert recorder.calls == [(dst_path, None)]
+    assert os.path.exists(dst_path)
+    assert not os.path.exists(f"{dst_path}.tmp.png")
+    assert service.get_pending_amount() == 0
+
+def test_duplicate_requests(service, temp_dir, job):
+    dst_path = os.path.join(temp_dir, "preview.png")
+    recorder = CallbackRecorder()
+    keys = [service.submit(job, dst_path, recorder) for _ in range(3)]
+    assert len(set(keys)) == 1
+    assert service.wait(timeout=60)
+    assert recorder.calls == [(dst_path, None)] * 3
+
+def test_render_error(service, temp_dir, job):
+    dst_path = os.path.join(temp_dir, "missing", "preview.png")
+    recorder = CallbackRecorder()
+    service.submit(job, dst_path, recorder)
+    assert service.wait(timeout=60)
+    assert len(recorder.calls) == 1
+    assert recorder.calls[0][0] == dst_path
+    assert recorder.calls[0][1] is not None
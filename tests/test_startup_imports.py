@@ -0,0 +1,28 @@
+'''
+Author: nagan319
+Date: 2026/10/19
+'''
+
+import os
+import sys
+import subprocess
+
+"""
+Tests for deferred imports at app startup.
+
+Test Coverage:
+    - Importing main window does not load OpenCV, shapely, or matplotlib
+"""
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED_MODULES = ('cv2', 'shapely', 'matplotlib')
+
+def test_heavy_dependencies_deferred():
+    code = (
+        "import sys\n"
+        "import src.app.mainwindow\n"
+        f"print(','.join(module for module in {DEFERRED_MODULES!r} if module in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
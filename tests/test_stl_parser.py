@@ -7,18 +7,26 @@ import os
 import numpy as np
 import pytest
 import tempfile
-from src.app.utils.stl_parser import STLParser, Axis
+from src.app.utils.stl_parser import STLParser, Axis, BINARY_HEADER_SIZE, BINARY_FACET_DTYPE
 
 """
 Tests for STLParser class.
 
 Test coverage:
 - validity of valid file
+- invalid (truncated) file rejected
+- ascii file with invalid coordinate rejected
+- ascii file parsed in small chunks loads same vertices
+- binary file loads same vertices and contour as ASCII file, without keeping file mapped
 - validity of valid mesh
 - flat axis on valid mesh
 - thickness on valid mesh
 - flattening of valid mesh
 - outer edges, contours, outer contour, and contour smoothing on valid mesh
+- outer edge array matches outer edge list
+- contour chaining on synthetic square with hole
+- contour resampling keeps corners and spacing, rejects invalid spacing
+- parsed contour point count follows point spacing
 - saving of preview image
 """
 
@@ -48,6 +56,40 @@ def stl_parser_valid(stl_file_path_valid, temp_dir):
 def test_stl_file_valid(stl_file_path_valid):
     assert STLParser.stl_file_valid(stl_file_path_valid) == True
 
+def test_stl_file_invalid(stl_file_path_invalid):
+    assert STLParser.stl_file_valid(stl_file_path_invalid) == False
+    with pytest.raises(ValueError):
+        STLParser(stl_file_path_invalid)
+
+def test_load_binary_stl(stl_file_path_valid, temp_dir):
+    ascii_vectors = STLParser.load_stl_vectors(stl_file_path_valid)
+    records = np.zeros(len(ascii_vectors), dtype=BINARY_FACET_DTYPE)
+    records['vectors'] = ascii_vectors
+    binary_path = os.path.join(temp_dir, "binary.stl")
+    with open(binary_path, 'wb') as file:
+        file.write(b"binary".ljust(BINARY_HEADER_SIZE, b" "))
+        file.write(np.uint32(len(records)).tobytes())
+        file.write(records.tobytes())
+
+    binary_vectors = STLParser.load_stl_vectors(binary_path)
+    assert np.array_equal(binary_vectors, ascii_vectors)
+    assert not isinstance(binary_vectors, np.memmap) and binary_vectors.flags.owndata
+    ascii_parser, binary_parser = STLParser(stl_file_path_valid), STLParser(binary_path)
+    ascii_parser.parse_stl()
+    binary_parser.parse_stl()
+    assert np.array_equal(ascii_parser.outer_contour, binary_parser.outer_contour)
+
+def test_load_ascii_stl_invalid_coordinate(temp_dir):
+    ascii_path = os.path.join(temp_dir, "invalid_coordinate.stl")
+    with open(ascii_path, 'w') as file:
+        file.write("solid test\nfacet normal 0 0 1\nouter loop\nvertex 0 0 0\nvertex 1 0 0\nvertex 0 one 0\nendloop\nendfacet\nendsolid test\n")
+    assert STLParser.stl_file_valid(ascii_path) == False
+
+def test_load_ascii_stl_chunked(stl_file_path_valid):
+    vectors = STLParser._load_ascii_stl(stl_file_path_valid)
+    assert vectors.dtype == np.float32
+    assert np.array_equal(STLParser._load_ascii_stl(stl_file_path_valid, chunk_size=1000), vectors)
+
 def test_stl_mesh_valid(stl_parser_valid):
     assert STLParser.stl_mesh_valid(stl_parser_valid.stl_mesh_vector) == True
 
@@ -94,3 +136,53 @@ def test_save_preview_image(stl_parser_valid, temp_dir):
     dst_path = os.path.join(temp_dir, "preview_image.png")
     stl_parser_valid.save_preview_image(dst_path)
     assert os.path.exists(dst_path)
+
+def test_get_outer_edge_array(stl_parser_valid):
+    flat_axis = STLParser.get_flat_axis(stl_parser_valid.stl_mesh_vector)
+    flattened_mesh = STLParser.get_flattened_mesh(stl_parser_valid.stl_mesh_vector, flat_axis)
+    outer_edge_array = STLParser.get_outer_edge_array(flattened_mesh, flat_axis)
+    assert outer_edge_array.shape[1:] == (2, 2)
+    assert [tuple(map(tuple, edge)) for edge in outer_edge_array] == STLParser.get_outer_edges(flattened_mesh, flat_axis)
+
+def test_get_contours_square_with_hole():
+    outer = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    inner = [(4, 4), (6, 4), (6, 6), (4, 6)]
+    facets = []
+    for i in range(4):
+        facets.append([outer[i], outer[(i+1)%4], inner[i]])
+        facets.append([inner[i], outer[(i+1)%4], inner[(i+1)%4]])
+    flattened_mesh = np.array([[(x, y, 0) for x, y in facet] for facet in facets], dtype=np.float32)
+    outer_edges = STLParser.get_outer_edge_array(flattened_mesh, Axis.Z)
+    assert len(outer_edges) == 8
+    contours = STLParser.get_contours(outer_edges)
+    assert len(contours) == 2
+    assert sorted(len(contour) for contour in contours) == [4, 4]
+    assert set(map(tuple, contours[0].tolist())) == set(outer)
+    assert set(map(tuple, contours[1].tolist())) == set(inner)
+
+def test_resample_contour_rectangle():
+    rectangle = np.array([(0, 0), (100, 0), (100, 50), (0, 50)], dtype=np.float32)
+    resampled = STLParser.resample_contour(rectangle, 10)
+    assert resampled.dtype == np.float32
+    assert len(resampled) == 30
+    assert {tuple(point) for point in rectangle.tolist()} <= {tuple(point) for point in resampled.tolist()}
+    distances = np.hypot(*np.diff(np.vstack((resampled, resampled[:1])), axis=0).T)
+    assert np.allclose(distances, 10)
+
+def test_resample_contour_circle():
+    angles = np.linspace(0, 2 * np.pi, 10000, endpoint=False)
+    circle = np.column_stack((100 * np.cos(angles), 100 * np.sin(angles)))
+    resampled = STLParser.resample_contour(circle, 5)
+    assert len(resampled) == int(np.ceil(2 * np.pi * 100 / 5))
+    assert np.allclose(np.hypot(resampled[:, 0], resampled[:, 1]), 100, atol=0.1)
+
+def test_resample_contour_invalid_spacing():
+    with pytest.raises(ValueError):
+        STLParser.resample_contour(np.array([(0, 0), (1, 0), (1, 1)]), 0)
+
+def test_point_spacing(stl_file_path_valid):
+    coarse = STLParser(stl_file_path_valid, point_spacing=20)
+    coarse.parse_stl()
+    fine = STLParser(stl_file_path_valid, point_spacing=5)
+    fine.parse_stl()
+    assert len(fine.outer_contour) > 2 * len(coarse.outer_contour)